@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: benchmark_functions
+#
+# Purpose: Custom functions to benchmark the scripts of this repository against
+# synthetic organisations with the offline stand-ins of arcpy and arcgis:
+# parameter files of the scripts, runs in separate processes and reports.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, sys, json, time, shutil, subprocess
+import portal_model as pm
+
+## globale variables
+# scripts which can be benchmarked {name: path relative to the root of the repository}
+SCRIPTS = {"0_clone_users": os.path.join("migrate", "0_clone_users.py"),
+           "1_clone_groups": os.path.join("migrate", "1_clone_groups.py"),
+           "3_clone_items": os.path.join("migrate", "3_clone_items.py"),
+           "publish_service_portal": os.path.join("publish", "publish_service_portal.py"),
+           "publish_webtool_portal": os.path.join("publish", "publish_webtool_portal.py"),
+           "user_report": os.path.join("query", "user_report.py"),
+           "services_and_linked_items": os.path.join("query", "services_and_linked_items.py")}
+ROOT_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# portals of the benchmarks (the source is the synthetic organisation, the target a copy for the migration scripts)
+SOURCE_URL = "https://source.benchmark/portal"
+TARGET_URL = "https://target.benchmark/portal"
+REPLACE_URLS = {"https://source.benchmark/": "https://target.benchmark/"}
+FEDERATED_SERVER_URL = "https://source.benchmark/server"
+
+
+def get_samples(size, sample_size, seed) -> dict:
+    """Get the indexes of the users, groups and web maps which are used by the benchmarks
+    (e.g. the users to clone). The same arguments always give the same samples.
+
+    Required:
+        size -- Number of portal items of the synthetic organisation
+        sample_size -- Number of objects of every kind
+        seed -- Seed of the random generator
+
+    Return:
+        samples -- Dictionary {"users": [index], "groups": [index], "web_maps": [index]}
+    """
+    counts = pm.get_org_counts(size)
+    return {kind: pm.get_sample(counts[kind], sample_size, seed, kind) for kind in ["users", "groups", "web_maps"]}
+
+
+def setup_model(model, size, seed, samples) -> dict:
+    """Generate the portals of a benchmark: the synthetic organisation (source) and a copy of its
+    users, groups and services (target) without the sampled users and groups (so that they can be cloned).
+
+    Required:
+        model -- PortalModel object
+        size -- Number of portal items of the synthetic organisation
+        seed -- Seed of the random generator
+        samples -- Samples of the benchmark (see get_samples)
+
+    Return:
+        counts -- Number of the generated objects (see portal_model.get_org_counts)
+    """
+    source = model.get_portal(SOURCE_URL)
+    counts = pm.generate_org(source, size, seed)
+    pm.mirror_org(source, model.get_portal(TARGET_URL), REPLACE_URLS,
+                  exclude_users=[pm.get_username(index) for index in samples["users"]],
+                  exclude_groups=[pm.get_group_title(index) for index in samples["groups"]])
+    return counts
+
+
+def write_json(file, data) -> str:
+    with open(file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    return file
+
+
+def write_parameter_files(script, samples, folder, publish_count = 3) -> list:
+    """Write the parameter files (JSON) of a script for a benchmark run.
+
+    Required:
+        script -- Name of the script (see SCRIPTS)
+        samples -- Samples of the benchmark (see get_samples)
+        folder -- Folder of the parameter files (the logs and reports of the script are written to subfolders)
+
+    Optional:
+        publish_count -- Number of services (or webtools) which are published by "publish_service_portal"
+                         (or "publish_webtool_portal")
+
+    Return:
+        arguments -- List with the arguments of the script (paths to the parameter files)
+    """
+    usernames = [pm.get_username(index) for index in samples["users"]]
+    group_titles = [pm.get_group_title(index) for index in samples["groups"]]
+    common = {"sign_in_user": pm.ADMIN_USERNAME, "log_folder": os.path.join(folder, "Logs")}
+    share = {"in_override": "OVERRIDE_DEFINITION", "in_public": "False", "in_organization": "True",
+             "in_groups": group_titles[:2]}
+    metadata = {"credits": "Benchmark", "description": "Benchmark", "summary": "Benchmark",
+                "tags": "benchmark", "use_limitations": "None"}
+    if script == "0_clone_users":
+        data = dict(common, source_url=SOURCE_URL, target_url=TARGET_URL, clone_user_names=usernames)
+    elif script == "1_clone_groups":
+        data = dict(common, source_url=SOURCE_URL, target_url=TARGET_URL, clone_group_names=group_titles)
+    elif script == "3_clone_items":
+        clone_source_items = [{"item_id": pm.get_item_id(SOURCE_URL, "web_map", index), "folder": "Benchmark",
+                               "copy_data": "False"} for index in samples["web_maps"]]
+        data = dict(common, source_url=SOURCE_URL, target_url=TARGET_URL, replace_urls=REPLACE_URLS,
+                    clone_source_items=clone_source_items)
+    elif script == "user_report":
+        data = dict(common, target_url=SOURCE_URL, user_name=usernames[0], report_folder=os.path.join(folder, "Reports"))
+    elif script == "services_and_linked_items":
+        data = dict(common, portal_url=SOURCE_URL, report_folder=os.path.join(folder, "Reports"))
+    elif script == "publish_service_portal":
+        aprx_file = write_json(os.path.join(folder, "benchmark.aprx"),
+                               {"maps": [{"name": "Map", "layers": [f'Layer {ii}' for ii in range(5)], "tables": []}]})
+        arguments = []
+        for ii in range(publish_count):
+            data = dict(common, stage="TEST", portal_url=SOURCE_URL, federated_server_url=FEDERATED_SERVER_URL,
+                        aprx=aprx_file, map="Map", service_name=f'benchmark_{ii:03d}', server_folder="Benchmark",
+                        portal_folder="Benchmark", service_documents=folder, enable_extensions=["FeatureServer"],
+                        share=dict(share), metadata=dict(metadata))
+            arguments.append(write_json(os.path.join(folder, f'publish_service_{ii:03d}.json'), data))
+        return arguments
+    elif script == "publish_webtool_portal":
+        toolbox_file = os.path.join(folder, "benchmark.pyt")
+        with open(toolbox_file, 'w', encoding='utf-8') as f:
+            f.write('# toolbox of the benchmark (stand-in)\n')
+        arguments = []
+        for ii in range(publish_count):
+            data = dict(common, stage="TEST", portal_url=SOURCE_URL, federated_server_url=FEDERATED_SERVER_URL,
+                        toolbox_name=toolbox_file, tool_name="BenchmarkTool", tool_parameters=["benchmark", str(ii)],
+                        service_name=f'benchmark_tool_{ii:03d}', server_folder="Benchmark", portal_folder="Benchmark",
+                        service_documents=folder, share=dict(share), metadata=dict(metadata))
+            arguments.append(write_json(os.path.join(folder, f'publish_webtool_{ii:03d}.json'), data))
+        return arguments
+    else:
+        raise ValueError(f'Unknown script "{script}" (valid: {list(SCRIPTS)})')
+    return [write_json(os.path.join(folder, f'{script}.json'), data)]
+
+
+def run_benchmark(script, size, seed, sample_size, folder, latency = 0.0, gp_latency = 0.0, publish_count = 3,
+                  timeout = None, options = None) -> dict:
+    """Run a script against a synthetic organisation in a separate process (see run_standin.py).
+
+    Required:
+        script -- Name of the script (see SCRIPTS)
+        size -- Number of portal items of the synthetic organisation
+        seed -- Seed of the random generator
+        sample_size -- Number of users, groups and web maps which are processed by the scripts
+        folder -- Folder of the run (parameter files, logs, output of the script)
+
+    Optional:
+        latency -- Delay of every REST call in seconds
+        gp_latency -- Delay of every geoprocessing tool in seconds
+        publish_count -- Number of services (or webtools) which are published by the publish scripts
+        timeout -- Maximum duration of the run in seconds
+        options -- List with options of the script (e.g. ["--pipeline"])
+
+    Return:
+        result -- Dictionary with "script", "size", "seconds" (duration of the script), "setup_seconds",
+                  "calls" ({name: count}), "rest_calls", "arcpy_calls", "portals" and "error"
+    """
+    # the script runs in the folder of the run -> absolute paths
+    folder = os.path.abspath(folder)
+    # every run starts without the files of an earlier run (e.g. staged webtools which would be reused)
+    if os.path.isdir(folder):
+        shutil.rmtree(folder)
+    os.makedirs(folder)
+    samples = get_samples(size, sample_size, seed)
+    arguments = write_parameter_files(script, samples, folder, publish_count)
+    run = {"script": script, "script_file": os.path.join(ROOT_FOLDER, SCRIPTS[script]), "arguments": arguments + (options or []),
+           "size": size, "seed": seed, "samples": samples, "latency": latency, "gp_latency": gp_latency,
+           "folder": folder, "result_file": os.path.join(folder, f'{script}_result.json')}
+    run_file = write_json(os.path.join(folder, f'{script}_run.json'), run)
+    if os.path.exists(run["result_file"]):
+        os.remove(run["result_file"])
+    start = time.time()
+    # the output of the script is written to a file (the script logs to the console)
+    with open(os.path.join(folder, f'{script}.out'), 'w', encoding='utf-8') as output_file:
+        try:
+            subprocess.run([sys.executable, os.path.join(os.path.dirname(__file__), "run_standin.py"), run_file],
+                           stdout=output_file, stderr=subprocess.STDOUT, timeout=timeout, cwd=folder)
+        except subprocess.TimeoutExpired:
+            return {"script": script, "size": size, "seconds": round(time.time() - start, 3),
+                    "error": f'Timeout after {timeout} sec'}
+    if not os.path.exists(run["result_file"]):
+        return {"script": script, "size": size, "seconds": round(time.time() - start, 3),
+                "error": f'The run failed, see "{output_file.name}"'}
+    with open(run["result_file"], encoding='utf-8') as f:
+        return json.load(f)
+
+
+def format_result(result) -> str:
+    """Get a readable line of the result of a run (see run_benchmark)."""
+    line = f'{result["script"]} ({result["size"]} items): {result["seconds"]} sec'
+    if "calls" in result:
+        line += f', {result["rest_calls"]} REST calls, {result["arcpy_calls"]} arcpy calls'
+    if result.get("error"):
+        line += f', error: {result["error"]}'
+    return line
+
+
+def compare_results(results, baseline_results, max_regression = 0.2) -> list:
+    """Compare the results of runs with the results of an earlier report (same script and size).
+
+    Required:
+        results -- List with the results of the runs (see run_benchmark)
+        baseline_results -- List with the results of the earlier report
+
+    Optional:
+        max_regression -- Maximum relative increase of the duration or of the calls (e.g. 0.2 = 20%)
+
+    Return:
+        comparisons -- List with dictionaries {"script", "size", "seconds", "baseline_seconds", "calls",
+                       "baseline_calls", "regression" (True if the maximum increase is exceeded)}
+    """
+    baseline = {(result["script"], result["size"]): result for result in baseline_results if not result.get("error")}
+    # short runs vary by a few tenths of a second -> tolerance for the duration
+    tolerance = 0.5
+    comparisons = []
+    for result in results:
+        earlier = baseline.get((result["script"], result["size"]))
+        if earlier is None or result.get("error"):
+            continue
+        calls = result["rest_calls"] + result["arcpy_calls"]
+        baseline_calls = earlier["rest_calls"] + earlier["arcpy_calls"]
+        comparisons.append({"script": result["script"], "size": result["size"],
+                            "seconds": result["seconds"], "baseline_seconds": earlier["seconds"],
+                            "calls": calls, "baseline_calls": baseline_calls,
+                            "regression": result["seconds"] > earlier["seconds"] * (1 + max_regression) + tolerance
+                                          or calls > baseline_calls * (1 + max_regression)})
+    return comparisons
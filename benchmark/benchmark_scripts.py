@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: benchmark_scripts
+#
+# Purpose: Script to benchmark the migration, publish and query scripts offline:
+# every script is run against synthetic organisations of different sizes with
+# the stand-ins of arcpy and arcgis (in-memory portal with configurable latency)
+# and the wall time and the number of calls are written to a report.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, sys, json, time
+# python Skript with my own benchmark functions
+import benchmark_functions as bmf
+import portal_model as pm
+# python Skript with my own logging functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'common'))
+import logging_functions as lgf
+
+
+def create_folder(folder_path) -> None:
+    """Creates a folder if it does not already exist.
+
+    Required:
+        folder_path -- The path to the folder (e.g. log folder).
+    """
+    if not os.path.isdir(folder_path):
+        try:
+            print(f'Creating a folder: {folder_path}')
+            os.makedirs(folder_path)
+        except:
+            raise ValueError(f'The folder "{folder_path}" does not exist and could not be created!')
+
+
+if __name__ == "__main__":
+    # path to a JSON input file
+    paramFile = sys.argv[1] if len(sys.argv) > 1 else None
+    #paramFile = r'C:\Temp\tutorial\benchmark_scripts.json'
+
+    if paramFile:
+        with open(paramFile, encoding='utf-8') as f:
+            data = json.load(f)
+            if "scripts" in data:
+                scripts = data["scripts"]
+                for script in scripts:
+                    if script not in bmf.SCRIPTS:
+                        raise ValueError(f'Unknown script "{script}" (valid: {list(bmf.SCRIPTS)})')
+            else:
+                scripts = list(bmf.SCRIPTS) #default
+            if "sizes" in data:
+                sizes = [int(size) for size in data["sizes"]]
+            else:
+                sizes = [1000, 10000, 100000] #default
+            if "latency" in data:
+                latency = float(data["latency"])
+            else:
+                latency = 0.0 #default
+            if "gp_latency" in data:
+                gp_latency = float(data["gp_latency"])
+            else:
+                gp_latency = 0.0 #default
+            if "sample_size" in data:
+                sample_size = int(data["sample_size"])
+            else:
+                sample_size = 10 #default
+            if "publish_count" in data:
+                publish_count = int(data["publish_count"])
+            else:
+                publish_count = 3 #default
+            if "options" in data:
+                options = data["options"]
+            else:
+                options = {} #default
+            if "seed" in data:
+                seed = int(data["seed"])
+            else:
+                seed = 0 #default
+            if "timeout" in data:
+                timeout = int(data["timeout"])
+            else:
+                timeout = 3600 #default
+            if "baseline_report" in data:
+                baseline_report = data["baseline_report"]
+            else:
+                baseline_report = None #default
+            if "max_regression" in data:
+                max_regression = float(data["max_regression"])
+            else:
+                max_regression = 0.2 #default
+            paramFileFolder = os.path.dirname(paramFile)
+            if "work_folder" in data:
+                work_folder = data["work_folder"]
+            else:
+                work_folder = os.path.join(paramFileFolder, "Benchmark") #default
+            if "log_folder" in data:
+                log_folder = data["log_folder"]
+            else:
+                log_folder = os.path.join(paramFileFolder, "Logs") #default
+            if "report_folder" in data:
+                report_folder = data["report_folder"]
+            else:
+                report_folder = os.path.join(paramFileFolder, "Reports") #default
+    else:
+        print('no Parameter-JSON file specified')
+        sys.exit()
+
+    ## start logging
+    # create logfolder, reportfolder and workfolder
+    create_folder(report_folder)
+    create_folder(log_folder)
+    create_folder(work_folder)
+
+    filename = os.path.splitext(os.path.basename(paramFile))[0]
+    # path to the log file
+    log_file = os.path.join(log_folder, f'{filename}.log')
+    # initialise logging
+    logger = lgf.init_logging(log_file)
+    logger.info(f'******************* Benchmark scripts *******************')
+    logger.info(f'Start logging: {time.ctime()}')
+    start_time = time.time()
+    logger.info(f'Scripts: {scripts}, sizes: {sizes}, latency: {latency} sec, geoprocessing latency: {gp_latency} sec')
+
+    ## run every script against every size of organisation (each run in a separate process)
+    results = []
+    for size in sizes:
+        counts = pm.get_org_counts(size)
+        logger.info(f'Synthetic organisation with {size} items: {counts}')
+        for script in scripts:
+            logger.info(f'Run "{script}" ({size} items)')
+            result = bmf.run_benchmark(script, size, seed, sample_size, os.path.join(work_folder, str(size), script),
+                                       latency, gp_latency, publish_count, timeout, options.get(script))
+            results.append(result)
+            if result.get("error"):
+                logger.error(bmf.format_result(result))
+            else:
+                logger.info(bmf.format_result(result))
+
+    ## compare with an earlier report
+    comparisons = []
+    if baseline_report:
+        with open(baseline_report, encoding='utf-8') as f:
+            baseline_results = json.load(f)["results"]
+        comparisons = bmf.compare_results(results, baseline_results, max_regression)
+        for comparison in comparisons:
+            message = (f'{comparison["script"]} ({comparison["size"]} items): {comparison["seconds"]} sec '
+                       f'(baseline {comparison["baseline_seconds"]} sec), {comparison["calls"]} calls '
+                       f'(baseline {comparison["baseline_calls"]})')
+            if comparison["regression"]:
+                logger.warning(f'Regression: {message}')
+            else:
+                logger.info(message)
+
+    ## report
+    report = {"created": time.ctime(), "scripts": scripts, "sizes": sizes, "latency": latency, "gp_latency": gp_latency,
+              "sample_size": sample_size, "seed": seed, "options": options, "results": results, "comparisons": comparisons}
+    report_file = os.path.join(report_folder, f'{filename}.json')
+    with open(report_file, 'w', encoding='utf-8') as json_file:
+        json.dump(report, json_file, indent=2, ensure_ascii=False)
+    logger.info(f'Report: {report_file}')
+
+    ## end logging
+    end_time = time.time()
+    i_error, i_warning = lgf.get_counts(logger)
+    logger.info("Run Script in " + str(round(end_time - start_time)) + " sec.")
+    logger.info(f'# {i_error} errors found')
+    logger.info(f'# {i_warning} warnings found')
+    logger.info(f'End time: {time.ctime()}')
+    logger.info('****************************************************************\n')
+    lgf.close_logging(logger)
@@ -0,0 +1,518 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: portal_model
+#
+# Purpose: In-memory model of ArcGIS Portals and their federated servers (users,
+# groups, folders, items and services) for the offline stand-ins of arcgis and
+# arcpy. Every call of the stand-ins is counted and can be delayed by a
+# configurable latency. Synthetic organisations of any size can be generated.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import re, time, random, hashlib, threading
+from collections import Counter
+from urllib.parse import urlsplit
+
+## globale variables
+# name of the administrator of every portal (sign in user of the benchmarks)
+ADMIN_USERNAME = "portaladmin"
+# number of results per page of a search (one REST call per page)
+SEARCH_PAGE_SIZE = 100
+# folders of the federated server (the services are distributed over these folders)
+SERVER_FOLDERS = [f'Folder{ii:02d}' for ii in range(10)]
+# extensions of a map service
+MAP_SERVICE_EXTENSIONS = ["FeatureServer", "KmlServer", "WMSServer", "WFSServer", "WCSServer"]
+# item types of the remaining items of a synthetic organisation
+OTHER_ITEM_TYPES = ["Web Mapping Application", "PDF", "CSV", "Microsoft Excel", "Image", "Shapefile"]
+# fields of a search query which have to match exactly (all other fields match a part of the value)
+EXACT_FIELDS = frozenset(["id", "type", "owner", "username"])
+
+_model = None
+
+
+def get_model():
+    """Get the model of the current process (a model without latency is created on first use)."""
+    global _model
+    if _model is None:
+        _model = PortalModel()
+    return _model
+
+
+def set_model(model) -> None:
+    """Set the model of the current process (used by all stand-ins)."""
+    global _model
+    _model = model
+
+
+def normalize_url(url) -> str:
+    """Normalize a portal or server URL (lower case, without "/admin", "/rest" and trailing "/")."""
+    url = str(url).strip().rstrip('/').lower()
+    for suffix in ['/admin', '/rest']:
+        if url.endswith(suffix):
+            url = url[:-len(suffix)]
+    return url
+
+
+def get_item_id(portal_url, kind, index) -> str:
+    """Get the (repeatable) id of a generated object, e.g. the item id of the 5th web map of a portal."""
+    return hashlib.md5(f'{normalize_url(portal_url)}|{kind}|{index}'.encode('utf-8')).hexdigest()
+
+
+def get_username(index) -> str:
+    return f'user{index:06d}'
+
+
+def get_group_title(index) -> str:
+    return f'Group {index:06d}'
+
+
+def get_service_name(index) -> str:
+    return f'service_{index:06d}'
+
+
+def get_web_map_title(index) -> str:
+    return f'Web Map {index:06d}'
+
+
+def get_org_counts(size) -> dict:
+    """Get the number of the objects of a synthetic organisation with "size" items.
+
+    Required:
+        size -- Number of portal items (e.g. 1000, 10000, 100000)
+
+    Return:
+        counts -- Dictionary with the number of "users", "groups", "services", "web_maps", "web_scenes"
+                  and "other_items"
+    """
+    counts = {"users": max(size // 10, 10),
+              "groups": max(size // 20, 5),
+              "services": max(size // 10, 1),
+              "web_maps": max(size // 10, 1),
+              "web_scenes": max(size // 100, 1)}
+    counts["other_items"] = max(size - counts["services"] - counts["web_maps"] - counts["web_scenes"], 0)
+    return counts
+
+
+def compile_query(query, text_fields):
+    """Compile a search query of the portal to a function which checks a record. Supported are
+    "field:value", "field:prefix*", text without field, "*", negations ("!term", "NOT term") and the
+    operators "AND", "&" and "OR" (OR binds weaker than AND). Text matches a part of the value.
+
+    Required:
+        query -- Search query (e.g. 'title:"Group 000001"', '!owner:esri_* & !Basemaps')
+        text_fields -- List with the fields which are searched by text without field
+
+    Return:
+        match -- Function match(record) -> bool
+    """
+    query = (query or "").strip()
+    if query in ["", "*"]:
+        return lambda record: True
+    alternatives = []
+    for part in re.split(r'\s+OR\s+', query):
+        terms = []
+        for term in re.split(r'\s+AND\s+|\s*&\s*', part):
+            term = term.strip()
+            if not term or term == "*":
+                continue
+            negate = False
+            if term.startswith('!'):
+                negate, term = True, term[1:].strip()
+            elif term.upper().startswith('NOT '):
+                negate, term = True, term[4:].strip()
+            field, separator, value = term.partition(':')
+            if separator and re.fullmatch(r'\w+', field.strip()):
+                fields = [field.strip()]
+            else:
+                fields, value = text_fields, term
+            terms.append((negate, fields, value.strip().strip('"').lower()))
+        alternatives.append(terms)
+
+    def match_term(record, fields, value) -> bool:
+        for field in fields:
+            field_value = record.get(field)
+            if field_value is None:
+                continue
+            field_value = str(field_value).lower()
+            if value.endswith('*'):
+                if field_value.startswith(value[:-1]):
+                    return True
+            elif field in EXACT_FIELDS:
+                if field_value == value:
+                    return True
+            elif value in field_value:
+                return True
+        return False
+
+    def match(record) -> bool:
+        return any(all(match_term(record, fields, value) != negate for negate, fields, value in terms)
+                   for terms in alternatives)
+    return match
+
+
+def get_query_ids(query) -> list:
+    """Get the ids of a query which only consists of "id:..." terms (e.g. "id:x OR id:y"), otherwise None."""
+    ids = []
+    for part in re.split(r'\s+OR\s+', (query or "").strip()):
+        match = re.fullmatch(r'id:\s*"?(\w+)"?', part.strip())
+        if not match:
+            return None
+        ids.append(match.group(1))
+    return ids
+
+
+class Portal:
+    """In-memory portal: users, groups, folders and items (records are plain dictionaries)
+    and the federated servers with their services.
+
+    Required:
+        url -- URL of the portal (e.g. "https://source.example/portal")
+    """
+    def __init__(self, url):
+        self.url = str(url).rstrip('/')
+        self.host = urlsplit(self.url).netloc
+        self.users = {}
+        self.groups = {}
+        self.items = {}
+        # {username: [folder]}
+        self.folders = {}
+        # {group id: set with usernames}
+        self.members = {}
+        # {username: set with group ids}
+        self.memberships = {}
+        # {username: [item id]}
+        self.user_items = {}
+        self.servers = []
+        self._next_id = 0
+        self._lock = threading.RLock()
+        self.add_user(ADMIN_USERNAME, role="org_admin", fullName="Portal Administrator", provider="arcgis")
+
+    def new_id(self, kind) -> str:
+        with self._lock:
+            self._next_id += 1
+            return get_item_id(self.url, f'new-{kind}', self._next_id)
+
+    def add_user(self, username, **properties) -> dict:
+        now = int(time.time() * 1000)
+        user = {"id": hashlib.md5(f'{self.url}|user|{username}'.encode('utf-8')).hexdigest(), "username": username,
+                "fullName": username, "firstName": username, "lastName": username, "email": f'{username}@example.com',
+                "provider": "enterprise", "idpUsername": username, "description": None, "level": "2",
+                "role": "org_user", "roleId": "iAAAAAAAAAAAAAAA", "userLicenseTypeId": "creatorUT",
+                "access": "org", "preferredView": None, "tags": [], "culture": "de", "cultureFormat": "ch",
+                "region": "CH", "thumbnail": None, "created": now, "lastLogin": now}
+        user.update(properties)
+        with self._lock:
+            self.users[username] = user
+            self.folders.setdefault(username, [])
+            self.memberships.setdefault(username, set())
+            self.user_items.setdefault(username, [])
+        return user
+
+    def add_group(self, title, owner = ADMIN_USERNAME, group_id = None, members = None, **properties) -> dict:
+        group = {"id": group_id or self.new_id("group"), "title": title, "owner": owner, "access": "org",
+                 "isInvitationOnly": True, "description": None, "snippet": None, "tags": [], "phone": None,
+                 "sortField": "title", "sortOrder": "asc", "isViewOnly": False, "thumbnail": None,
+                 "capabilities": [], "isReadOnly": False, "protected": False, "autoJoin": False,
+                 "notificationsEnabled": False, "provider": None, "providerGroupName": None,
+                 "leavingDisallowed": False, "hiddenMembers": False, "displaySettings": {"itemTypes": ""}}
+        group.update(properties)
+        with self._lock:
+            self.groups[group["id"]] = group
+            self.members[group["id"]] = set()
+        self.add_members(group["id"], [owner] + list(members or []))
+        return group
+
+    def add_members(self, group_id, usernames) -> list:
+        not_added = []
+        with self._lock:
+            for username in usernames:
+                if username not in self.users:
+                    not_added.append(username)
+                    continue
+                self.members[group_id].add(username)
+                self.memberships[username].add(group_id)
+        return not_added
+
+    def add_folder(self, title, owner) -> dict:
+        with self._lock:
+            for folder in self.folders.setdefault(owner, []):
+                if folder["title"] == title:
+                    return folder
+            folder = {"id": self.new_id("folder"), "title": title, "username": owner, "created": int(time.time() * 1000)}
+            self.folders[owner].append(folder)
+            return folder
+
+    def get_folder(self, owner, folder) -> dict:
+        """Get a folder of a user by its title or id (None for the root folder)."""
+        if isinstance(folder, dict):
+            folder = folder.get("id")
+        if not folder or folder == "/":
+            return None
+        for owner_folder in self.folders.get(owner, []):
+            if folder in [owner_folder["title"], owner_folder["id"]]:
+                return owner_folder
+        return None
+
+    def add_item(self, title, item_type, owner = ADMIN_USERNAME, item_id = None, **properties) -> dict:
+        item = {"id": item_id or self.new_id("item"), "title": title, "type": item_type, "owner": owner,
+                "ownerFolder": None, "url": None, "typeKeywords": [], "tags": [], "snippet": None,
+                "description": None, "accessInformation": None, "licenseInfo": None, "access": "private",
+                "groups": [], "dependencies": [], "data": None, "created": int(time.time() * 1000)}
+        item.update(properties)
+        with self._lock:
+            self.items[item["id"]] = item
+            self.user_items.setdefault(owner, []).append(item["id"])
+        return item
+
+    def search_users(self, query) -> list:
+        match = compile_query(query, ["username", "fullName", "email"])
+        return [user for user in self.users.values() if match(user)]
+
+    def search_groups(self, query) -> list:
+        match = compile_query(query, ["title", "snippet", "description"])
+        return [group for group in self.groups.values() if match(group)]
+
+    def search_items(self, query, item_type = None) -> list:
+        ids = get_query_ids(query)
+        if ids is not None:
+            items = [self.items[item_id] for item_id in ids if item_id in self.items]
+        else:
+            match = compile_query(query, ["title", "snippet", "tags"])
+            items = [item for item in self.items.values() if match(item)]
+        if item_type:
+            items = [item for item in items if item["type"].lower() == item_type.lower()]
+        return items
+
+    def add_server(self, url, machines = 2) -> dict:
+        server = {"url": str(url).rstrip('/'), "machines": machines, "folders": {"": {}, "System": {}, "Utilities": {}}}
+        server["folders"]["System"]["CachingTools.GPServer"] = {
+            "serviceName": "CachingTools", "type": "GPServer", "private": False, "capabilities": "",
+            "maxInstancesPerNode": 4, "extensions": [], "portalProperties": {"isHosted": False, "portalItems": []},
+            "status": {"configuredState": "STARTED", "realTimeState": "STARTED"}}
+        with self._lock:
+            self.servers.append(server)
+        return server
+
+    def get_server(self, url) -> dict:
+        for server in self.servers:
+            if normalize_url(server["url"]) == normalize_url(url):
+                return server
+        return None
+
+
+class PortalModel:
+    """Model of all portals of a benchmark. Every call of a stand-in is counted by its name
+    and delayed by the latency (REST calls) or the geoprocessing latency (arcpy tools).
+
+    Optional:
+        latency -- Delay of every REST call in seconds
+        gp_latency -- Delay of every geoprocessing tool (arcpy) in seconds
+    """
+    def __init__(self, latency = 0.0, gp_latency = 0.0):
+        self.latency = latency
+        self.gp_latency = gp_latency
+        self.portals = {}
+        self.calls = Counter()
+        # signed in user of arcpy (arcpy.SignInToPortal): (portal, username)
+        self.arcpy_user = None
+        self._lock = threading.Lock()
+
+    def call(self, name, latency = None) -> None:
+        """Count a call and wait for the latency.
+
+        Required:
+            name -- Name of the call (e.g. "content/search")
+
+        Optional:
+            latency -- Delay in seconds (default: latency of the REST calls)
+        """
+        with self._lock:
+            self.calls[name] += 1
+        latency = self.latency if latency is None else latency
+        if latency:
+            time.sleep(latency)
+
+    def get_portal(self, url) -> Portal:
+        """Get a portal by its URL (an empty portal is created if it does not exist)."""
+        key = normalize_url(url)
+        with self._lock:
+            if key not in self.portals:
+                self.portals[key] = Portal(url)
+            return self.portals[key]
+
+    def find_server(self, url) -> tuple:
+        """Get a federated server by its URL or by the URL of one of its services.
+
+        Return:
+            portal, server -- Portal and server record or (None, None) if not found
+        """
+        url = normalize_url(str(url).split('/services/')[0])
+        for portal in self.portals.values():
+            server = portal.get_server(url)
+            if server:
+                return portal, server
+        return None, None
+
+    def summary(self) -> dict:
+        """Get the number of objects of every portal."""
+        return {portal.url: {"users": len(portal.users), "groups": len(portal.groups), "items": len(portal.items),
+                             "services": sum(len(services) for server in portal.servers
+                                             for services in server["folders"].values())}
+                for portal in self.portals.values()}
+
+
+def get_sample(count, sample_size, seed, kind) -> list:
+    """Get repeatable indexes of objects of a synthetic organisation (e.g. the users to clone).
+
+    Required:
+        count -- Number of objects (see get_org_counts)
+        sample_size -- Number of indexes
+        seed -- Seed of the random generator
+        kind -- Kind of the objects (every kind gets an other sample)
+    """
+    rng = random.Random(f'{seed}|{kind}')
+    return sorted(rng.sample(range(count), min(sample_size, count)))
+
+
+def generate_org(portal, size, seed = 0) -> dict:
+    """Generate a synthetic organisation: users with folders, groups with members, a federated
+    server with map services (each with a portal item), web maps and web scenes which use the
+    services and further items. The same size and seed always give the same organisation.
+
+    Required:
+        portal -- Portal object
+        size -- Number of portal items (see get_org_counts)
+
+    Optional:
+        seed -- Seed of the random generator
+
+    Return:
+        counts -- Number of the generated objects (see get_org_counts)
+    """
+    rng = random.Random(seed)
+    counts = get_org_counts(size)
+    usernames = [get_username(ii) for ii in range(counts["users"])]
+    for ii, username in enumerate(usernames):
+        portal.add_user(username, fullName=f'User {ii:06d}', firstName="User", lastName=f'{ii:06d}')
+        portal.add_folder("Folder A", username)
+        portal.add_folder("Folder B", username)
+    for ii in range(counts["groups"]):
+        portal.add_group(get_group_title(ii), owner=rng.choice(usernames), group_id=get_item_id(portal.url, "group", ii),
+                         members=rng.sample(usernames, min(10, len(usernames))))
+    group_ids = list(portal.groups)
+
+    def add_item(title, item_type, kind, index, **properties):
+        owner = rng.choice(usernames)
+        folder = rng.choice([None, "Folder A", "Folder B"])
+        access = rng.choice(["private", "org", "public"])
+        return portal.add_item(title, item_type, owner=owner, item_id=get_item_id(portal.url, kind, index),
+                               ownerFolder=portal.get_folder(owner, folder)["id"] if folder else None, access=access,
+                               groups=rng.sample(group_ids, min(rng.randint(0, 2), len(group_ids))),
+                               tags=["benchmark", kind], snippet=f'{item_type} {index}', **properties)
+
+    # map services (distributed over the folders of the server) with their portal items
+    server_url = f'https://{portal.host}/server'
+    server = portal.add_server(server_url)
+    service_items = []
+    for ii in range(counts["services"]):
+        name = get_service_name(ii)
+        folder = SERVER_FOLDERS[ii % len(SERVER_FOLDERS)]
+        url = f'{server_url}/rest/services/{folder}/{name}/MapServer'
+        item = add_item(name, "Map Service", "service", ii, url=url, typeKeywords=["Map Service", "ArcGIS Server"])
+        service_items.append(item)
+        server["folders"].setdefault(folder, {})[f'{name}.MapServer'] = get_service_properties(
+            name, "MapServer", [{"itemID": item["id"], "type": "MapServer"}])
+    # web maps and web scenes which use the services
+    for ii in range(counts["web_maps"]):
+        layers = rng.sample(service_items, min(rng.randint(1, 3), len(service_items)))
+        data = {"operationalLayers": [{"id": f'layer{jj}', "title": layer["title"], "layerType": "ArcGISMapServiceLayer",
+                                       "itemId": layer["id"], "url": layer["url"]} for jj, layer in enumerate(layers)],
+                "baseMap": {"baseMapLayers": [{"id": "basemap", "title": "Basemap", "layerType": "ArcGISTiledMapServiceLayer",
+                                               "url": f'https://{portal.host}/server/rest/services/Basemap/MapServer'}]}}
+        add_item(get_web_map_title(ii), "Web Map", "web_map", ii, data=data,
+                 dependencies=[layer["id"] for layer in layers])
+    for ii in range(counts["web_scenes"]):
+        layers = rng.sample(service_items, min(rng.randint(1, 3), len(service_items)))
+        data = {"operationalLayers": [{"id": f'layer{jj}', "title": layer["title"], "layerType": "ArcGISMapServiceLayer",
+                                       "itemId": layer["id"], "url": layer["url"]} for jj, layer in enumerate(layers)],
+                "baseMap": {"baseMapLayers": [{"id": "basemap", "title": "Basemap", "layerType": "ArcGISTiledMapServiceLayer",
+                                               "url": f'https://{portal.host}/server/rest/services/Basemap/MapServer'}]},
+                "ground": {"layers": [{"id": "terrain", "title": "Terrain", "layerType": "ArcGISTiledElevationServiceLayer",
+                                       "url": f'https://{portal.host}/server/rest/services/Terrain/ImageServer'}]}}
+        add_item(f'Web Scene {ii:06d}', "Web Scene", "web_scene", ii, data=data,
+                 dependencies=[layer["id"] for layer in layers])
+    for ii in range(counts["other_items"]):
+        item_type = OTHER_ITEM_TYPES[ii % len(OTHER_ITEM_TYPES)]
+        add_item(f'{item_type} {ii:06d}', item_type, "other", ii)
+    return counts
+
+
+def mirror_org(source, target, replace_urls = None, exclude_users = None, exclude_groups = None) -> None:
+    """Copy the users, the groups and the services (with their portal items) of a portal to a
+    target portal, e.g. as target of the migration scripts. The items of the services get new ids.
+
+    Required:
+        source -- Portal object of the source
+        target -- Portal object of the target
+
+    Optional:
+        replace_urls -- Dictionary {source url: target url} for the URLs of the services
+        exclude_users -- List with the usernames which are not copied
+        exclude_groups -- List with the titles of the groups which are not copied
+    """
+    def replace(url):
+        for source_url, target_url in (replace_urls or {}).items():
+            url = url.replace(source_url, target_url)
+        return url
+
+    exclude_users = set(exclude_users or [])
+    exclude_groups = set(exclude_groups or [])
+    for username, user in source.users.items():
+        if username != ADMIN_USERNAME and username not in exclude_users:
+            target.add_user(username, **{key: value for key, value in user.items() if key not in ["id", "username"]})
+    for group in source.groups.values():
+        if group["title"] not in exclude_groups:
+            target.add_group(**{key: value for key, value in group.items() if key != "id"},
+                             members=source.members[group["id"]])
+    for source_server in source.servers:
+        server = target.add_server(replace(source_server["url"]), source_server["machines"])
+        for folder, services in source_server["folders"].items():
+            if folder in ["System", "Utilities"]:
+                continue
+            for key, properties in services.items():
+                portal_items = []
+                for portal_item in properties["portalProperties"]["portalItems"]:
+                    source_item = source.items[portal_item["itemID"]]
+                    owner = source_item["owner"] if source_item["owner"] in target.users else ADMIN_USERNAME
+                    item = target.add_item(source_item["title"], source_item["type"], owner=owner,
+                                           url=replace(source_item["url"]), typeKeywords=list(source_item["typeKeywords"]),
+                                           access=source_item["access"])
+                    portal_items.append({"itemID": item["id"], "type": portal_item["type"]})
+                server["folders"].setdefault(folder, {})[key] = get_service_properties(
+                    properties["serviceName"], properties["type"], portal_items)
+
+
+def get_service_properties(name, service_type, portal_items, capabilities = "Map,Query,Data",
+                           enabled_extensions = None, state = "STARTED") -> dict:
+    """Get the properties of a service (like the admin API of ArcGIS Server).
+
+    Required:
+        name -- Name of the service
+        service_type -- Type of the service (e.g. "MapServer", "GPServer")
+        portal_items -- List with the portal items {"itemID": ..., "type": ...}
+
+    Optional:
+        capabilities -- Capabilities of the service
+        enabled_extensions -- List with the type names of the enabled extensions
+        state -- Configured state of the service ("STARTED" or "STOPPED")
+    """
+    extensions = []
+    if service_type == "MapServer":
+        extensions = [{"typeName": extension, "enabled": str(extension in (enabled_extensions or [])).lower(),
+                       "capabilities": None, "properties": {}} for extension in MAP_SERVICE_EXTENSIONS]
+    return {"serviceName": name, "type": service_type, "private": False, "capabilities": capabilities,
+            "minInstancesPerNode": 1, "maxInstancesPerNode": 2, "extensions": extensions,
+            "portalProperties": {"isHosted": False, "portalItems": portal_items},
+            "status": {"configuredState": state, "realTimeState": state}}
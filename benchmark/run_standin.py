@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: run_standin
+#
+# Purpose: Run one script of this repository against a synthetic organisation
+# with the offline stand-ins of arcpy and arcgis (called by benchmark_scripts.py
+# in a separate process for every run). The duration of the script and the
+# number of calls of the stand-ins are written to the result file of the run.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, sys, json, time, runpy, shutil, logging, tempfile, traceback
+import getpass
+
+# the stand-ins are found before an installed arcpy, arcgis or IPython
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'standin'))
+import portal_model as pm
+import benchmark_functions as bmf
+
+
+if __name__ == "__main__":
+    # path to the JSON file of the run (written by benchmark_functions.run_benchmark)
+    run_file = sys.argv[1] if len(sys.argv) > 1 else None
+    if not run_file:
+        print('no run file specified')
+        sys.exit()
+    with open(run_file, encoding='utf-8') as f:
+        run = json.load(f)
+
+    ## portals of the benchmark
+    setup_start = time.time()
+    model = pm.PortalModel(run["latency"], run["gp_latency"])
+    pm.set_model(model)
+    counts = bmf.setup_model(model, run["size"], run["seed"], run["samples"])
+    setup_seconds = round(time.time() - setup_start, 3)
+    print(f'Generated the portals in {setup_seconds} sec: {model.summary()}')
+
+    ## run the script
+    # the scripts ask for the password
+    getpass.getpass = lambda prompt = '', stream = None: "standin"
+    # temporary files of the scripts (e.g. the group cache) -> every run starts without cached data
+    tempfile.tempdir = run["folder"]
+    script_file = run["script_file"]
+    sys.argv = [script_file] + run["arguments"]
+    sys.path.insert(0, os.path.dirname(script_file))
+    # the overall log files of the publish scripts are written to the folder "Logs" of the script -> moved to the run folder
+    script_log_folder = os.path.join(os.path.dirname(script_file), "Logs")
+    script_log_folder_exists = os.path.isdir(script_log_folder)
+    existing_logs = set(os.listdir(script_log_folder)) if script_log_folder_exists else set()
+    error = None
+    start = time.perf_counter()
+    try:
+        runpy.run_path(script_file, run_name="__main__")
+    except SystemExit as e:
+        if e.code not in [None, 0]:
+            error = f'SystemExit: {e.code}'
+    except Exception as e:
+        traceback.print_exc()
+        error = f'{type(e).__name__}: {e}'
+    seconds = round(time.perf_counter() - start, 3)
+    logging.getLogger('myapp').handlers.clear()
+    if os.path.isdir(script_log_folder):
+        for name in set(os.listdir(script_log_folder)) - existing_logs:
+            os.makedirs(os.path.join(run["folder"], "Logs"), exist_ok=True)
+            shutil.move(os.path.join(script_log_folder, name), os.path.join(run["folder"], "Logs", name))
+        if not script_log_folder_exists:
+            os.rmdir(script_log_folder)
+
+    ## result of the run
+    calls = dict(sorted(model.calls.items()))
+    result = {"script": run["script"], "size": run["size"], "seconds": seconds, "setup_seconds": setup_seconds,
+              "latency": run["latency"], "gp_latency": run["gp_latency"], "counts": counts,
+              "rest_calls": sum(count for name, count in calls.items() if name.startswith(('GET ', 'POST '))),
+              "arcpy_calls": sum(count for name, count in calls.items() if name.startswith('arcpy.')),
+              "calls": calls, "portals": model.summary(), "error": error}
+    with open(run["result_file"], 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f'Run script "{run["script"]}" in {seconds} sec')
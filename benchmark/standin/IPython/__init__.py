@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: IPython (stand-in)
+#
+# Purpose: Stand-in for IPython (only IPython.display.display is used by the
+# scripts of this repository).
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: IPython.display (stand-in)
+#
+# Purpose: Stand-in for IPython.display (objects are printed).
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+
+
+def display(*objs, **kwargs) -> None:
+    for obj in objs:
+        print(obj)
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: arcgis (stand-in)
+#
+# Purpose: Offline stand-in for the ArcGIS API for Python. Only the parts used by
+# the scripts of this repository are implemented, backed by the in-memory
+# portal model (see portal_model.py). Only for benchmarks, not for production!
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+from arcgis.gis import GIS
+
+__version__ = "standin"
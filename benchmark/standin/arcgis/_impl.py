@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: arcgis._impl (stand-in)
+#
+# Purpose: Common classes of the stand-in for the ArcGIS API for Python.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import math
+import portal_model
+
+
+class PropertyMap(dict):
+    """Dictionary whose keys can also be read as attributes (like the PropertyMap of the ArcGIS
+    API for Python). Nested dictionaries and lists are converted as well."""
+    def __init__(self, data = None):
+        super().__init__()
+        for key, value in (data or {}).items():
+            self[key] = convert(value)
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def convert(value):
+    """Convert dictionaries (also in lists) to PropertyMaps."""
+    if isinstance(value, dict):
+        return PropertyMap(value)
+    if isinstance(value, list):
+        return [convert(element) for element in value]
+    return value
+
+
+class Connection:
+    """Connection of a GIS object. Every REST call of the stand-ins goes through "get" or "post",
+    so that the calls can be counted (also by wrappers, see publish/metrics_functions.py)."""
+    def __init__(self, model, baseurl):
+        self._model = model
+        self.baseurl = baseurl
+
+    def get(self, path, params = None, **kwargs) -> dict:
+        self._model.call(f'GET {path}')
+        return {}
+
+    def post(self, path, params = None, **kwargs) -> dict:
+        self._model.call(f'POST {path}')
+        return {}
+
+
+def page_results(con, path, results, max_results) -> list:
+    """Limit the results of a search and count one REST call per page (like the paging of the portal)."""
+    if max_results is not None and max_results >= 0:
+        results = results[:max_results]
+    for _ in range(max(1, math.ceil(len(results) / portal_model.SEARCH_PAGE_SIZE))):
+        con.post(path)
+    return results
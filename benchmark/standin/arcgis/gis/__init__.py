@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: arcgis.gis (stand-in)
+#
+# Purpose: Stand-in for arcgis.gis: GIS with content, users, groups and
+# admin.servers, backed by the in-memory portal model.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, json
+import portal_model
+from arcgis._impl import PropertyMap, Connection, page_results
+
+
+class GIS:
+    """Stand-in for arcgis.gis.GIS. The portal is taken from the portal model by its URL
+    (an empty portal is created for unknown URLs).
+
+    Optional:
+        url -- URL of the portal
+        username -- Name of the user (must exist in the portal)
+        password -- Password (not checked)
+    """
+    def __init__(self, url = None, username = None, password = None, verify_cert = True, **kwargs):
+        self._model = portal_model.get_model()
+        self._portal = self._model.get_portal(url or "https://www.arcgis.com")
+        self.url = self._portal.url
+        self._con = Connection(self._model, self.url)
+        self._con.post("generateToken")
+        if username and username not in self._portal.users:
+            raise Exception('Unable to generate token. Invalid username or password.')
+        self._username = username or portal_model.ADMIN_USERNAME
+        self.users = UserManager(self)
+        self.groups = GroupManager(self)
+        self.content = ContentManager(self)
+        self._admin = None
+
+    @property
+    def admin(self):
+        if self._admin is None:
+            self._admin = AdminManager(self)
+        return self._admin
+
+    def __repr__(self):
+        return f'GIS @ {self.url} version:standin'
+
+    __str__ = __repr__
+
+
+class PortalObject:
+    """Base class of users, groups and items: the properties of the record in the portal model can
+    be read as attributes or keys."""
+    def __init__(self, gis, record):
+        self._gis = gis
+        self._record = record
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self._record[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __getitem__(self, key):
+        return self._record[key]
+
+    def __contains__(self, key):
+        return key in self._record
+
+    def get(self, key, default = None):
+        return self._record.get(key, default)
+
+    def keys(self):
+        return self._record.keys()
+
+    def __eq__(self, other):
+        return isinstance(other, PortalObject) and self._record is other._record
+
+    def __hash__(self):
+        return id(self._record)
+
+    def download_thumbnail(self, save_folder = None):
+        self._gis._con.get("thumbnail")
+        if not self._record.get("thumbnail"):
+            return None
+        file = os.path.join(save_folder or ".", os.path.basename(self._record["thumbnail"]))
+        with open(file, 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n')
+        return file
+
+
+class User(PortalObject):
+    """Stand-in for arcgis.gis.User."""
+    def __repr__(self):
+        return f'<User username:{self._record["username"]}>'
+
+    __str__ = __repr__
+
+    @property
+    def groups(self) -> list:
+        self._gis._con.get("community/users")
+        portal = self._gis._portal
+        return [Group(self._gis, portal.groups[group_id]) for group_id in sorted(portal.memberships.get(self.username, []))]
+
+    @property
+    def folders(self) -> list:
+        self._gis._con.get("content/users")
+        return [dict(folder) for folder in self._gis._portal.folders.get(self.username, [])]
+
+    def items(self, folder = None, max_items = 100) -> list:
+        self._gis._con.get("content/users/items")
+        portal = self._gis._portal
+        folder_record = portal.get_folder(self.username, folder)
+        if folder and folder_record is None:
+            return []
+        folder_id = folder_record["id"] if folder_record else None
+        items = [portal.items[item_id] for item_id in portal.user_items.get(self.username, [])
+                 if item_id in portal.items and portal.items[item_id]["owner"] == self.username]
+        return [Item(self._gis, item) for item in items if item["ownerFolder"] == folder_id][:max_items]
+
+    def update_role(self, role) -> bool:
+        self._gis._con.post("portals/self/updateuserrole")
+        self._record["roleId"] = getattr(role, "role_id", role)
+        return True
+
+    def update(self, access = None, preferred_view = None, description = None, tags = None, thumbnail = None,
+               fullname = None, email = None, culture = None, region = None, first_name = None, last_name = None,
+               culture_format = None, **kwargs) -> bool:
+        self._gis._con.post("community/users/update")
+        properties = {"access": access, "preferredView": preferred_view, "description": description, "tags": tags,
+                      "thumbnail": thumbnail, "fullName": fullname, "email": email, "culture": culture,
+                      "region": region, "firstName": first_name, "lastName": last_name, "cultureFormat": culture_format}
+        self._record.update({key: value for key, value in properties.items() if value is not None})
+        return True
+
+
+class UserManager:
+    """Stand-in for arcgis.gis.UserManager."""
+    def __init__(self, gis):
+        self._gis = gis
+
+    def search(self, query = None, sort_field = 'username', sort_order = 'asc', max_users = 100,
+               outside_org = False, exclude_system = False, user_type = None, role = None) -> list:
+        users = sorted(self._gis._portal.search_users(query), key=lambda user: str(user.get(sort_field) or "").lower(),
+                       reverse=sort_order == 'desc')
+        return [User(self._gis, user) for user in page_results(self._gis._con, "community/users", users, max_users)]
+
+    def get(self, username):
+        self._gis._con.get("community/users")
+        user = self._gis._portal.users.get(username)
+        return User(self._gis, user) if user else None
+
+    @property
+    def me(self):
+        self._gis._con.get("community/self")
+        return User(self._gis, self._gis._portal.users[self._gis._username])
+
+    def create(self, username, password, firstname = None, lastname = None, email = None, role = None,
+               description = None, provider = 'arcgis', idp_username = None, level = 2, thumbnail = None,
+               user_type = None, **kwargs):
+        self._gis._con.post("portals/self/invite")
+        portal = self._gis._portal
+        if username in portal.users:
+            raise Exception(f'User "{username}" already exists.')
+        properties = {"firstName": firstname, "lastName": lastname, "email": email, "description": description,
+                      "provider": provider, "idpUsername": idp_username, "level": str(level), "thumbnail": thumbnail}
+        if role:
+            properties["roleId"] = role
+        user = portal.add_user(username, **{key: value for key, value in properties.items() if value is not None})
+        return User(self._gis, user)
+
+
+class Group(PortalObject):
+    """Stand-in for arcgis.gis.Group."""
+    def __repr__(self):
+        return f'<Group title:"{self._record["title"]}" owner:{self._record["owner"]}>'
+
+    __str__ = __repr__
+
+    def get_members(self) -> dict:
+        self._gis._con.get("community/groups/users")
+        owner = self._record["owner"]
+        users = sorted(username for username in self._gis._portal.members.get(self.id, []) if username != owner)
+        return {"owner": owner, "admins": [owner], "users": users}
+
+    def reassign_to(self, target_owner) -> bool:
+        self._gis._con.post("community/groups/reassign")
+        self._record["owner"] = target_owner
+        self._gis._portal.add_members(self.id, [target_owner])
+        return True
+
+    def add_users(self, usernames = None, admins = None) -> dict:
+        self._gis._con.post("community/groups/addUsers")
+        if isinstance(usernames, str):
+            usernames = usernames.split(',')
+        return {"notAdded": self._gis._portal.add_members(self.id, list(usernames or []) + list(admins or []))}
+
+
+class GroupManager:
+    """Stand-in for arcgis.gis.GroupManager."""
+    def __init__(self, gis):
+        self._gis = gis
+
+    def search(self, query = '', sort_field = 'title', sort_order = 'asc', max_groups = 1000,
+               outside_org = False, categories = None) -> list:
+        groups = sorted(self._gis._portal.search_groups(query), key=lambda group: str(group.get(sort_field) or "").lower(),
+                        reverse=sort_order == 'desc')
+        return [Group(self._gis, group) for group in page_results(self._gis._con, "community/groups", groups, max_groups)]
+
+    def get(self, groupid):
+        self._gis._con.get("community/groups")
+        group = self._gis._portal.groups.get(groupid)
+        return Group(self._gis, group) if group else None
+
+    def create_from_dict(self, dict):
+        self._gis._con.post("community/createGroup")
+        properties = {key: value for key, value in dict.items() if key not in ["id", "owner"] and value is not None}
+        group = self._gis._portal.add_group(owner=self._gis._username, **properties)
+        return Group(self._gis, group)
+
+
+class ItemDependency:
+    def __init__(self, properties):
+        self.properties = PropertyMap(properties)
+
+
+class Item(PortalObject):
+    """Stand-in for arcgis.gis.Item."""
+    def __repr__(self):
+        return f'<Item title:"{self._record["title"]}" type:{self._record["type"]} owner:{self._record["owner"]}>'
+
+    __str__ = __repr__
+
+    @property
+    def itemid(self) -> str:
+        return self._record["id"]
+
+    @property
+    def homepage(self) -> str:
+        return f'{self._gis.url}/home/item.html?id={self._record["id"]}'
+
+    @property
+    def shared_with(self) -> dict:
+        self._gis._con.get("content/items/groups")
+        portal = self._gis._portal
+        return {"everyone": self._record["access"] == "public",
+                "org": self._record["access"] in ["org", "public"],
+                "groups": [Group(self._gis, portal.groups[group_id]) for group_id in self._record["groups"]
+                           if group_id in portal.groups]}
+
+    def dependent_upon(self) -> dict:
+        self._gis._con.get("content/items/dependencies")
+        dependencies = [{"dependencyType": "id", "id": item_id} for item_id in self._record["dependencies"]]
+        return {"total": len(dependencies), "start": 1, "num": len(dependencies), "nextStart": -1, "list": dependencies}
+
+    @property
+    def dependencies(self):
+        self._gis._con.get("content/items/dependencies")
+        return ItemDependency({"items": [{"id": item_id, "dependencyType": "id"} for item_id in self._record["dependencies"]]})
+
+    def get_data(self, try_json = True):
+        self._gis._con.get("content/items/data")
+        return json.loads(json.dumps(self._record["data"])) if self._record["data"] else {}
+
+    def move(self, folder, owner = None) -> dict:
+        self._gis._con.post("content/users/items/move")
+        folder_record = self._gis._portal.get_folder(self._record["owner"], folder)
+        if folder and folder != "/" and folder_record is None:
+            raise Exception(f'Folder "{folder}" not found.')
+        self._record["ownerFolder"] = folder_record["id"] if folder_record else None
+        return {"success": True, "itemId": self.id, "folder": self._record["ownerFolder"]}
+
+    def update(self, item_properties = None, data = None, thumbnail = None, metadata = None, **kwargs) -> bool:
+        self._gis._con.post("content/users/items/update")
+        for key, value in (item_properties or {}).items():
+            self._record[key] = value
+        if data is not None:
+            self._record["data"] = data
+        return True
+
+    def share(self, everyone = False, org = False, groups = None, allow_members_to_edit = False) -> dict:
+        self._gis._con.post("content/users/items/share")
+        self._record["access"] = "public" if everyone else "org" if org else "private"
+        if isinstance(groups, str):
+            groups = groups.split(',')
+        group_ids = [group.id if isinstance(group, Group) else group for group in groups or []]
+        self._record["groups"] = list(dict.fromkeys(self._record["groups"] + group_ids))
+        return {"results": [{"itemId": self.id, "success": True, "notSharedWith": []}]}
+
+
+class ContentManager:
+    """Stand-in for arcgis.gis.ContentManager."""
+    def __init__(self, gis):
+        self._gis = gis
+
+    def get(self, itemid):
+        self._gis._con.get("content/items")
+        item = self._gis._portal.items.get(itemid)
+        return Item(self._gis, item) if item else None
+
+    def search(self, query, item_type = None, sort_field = 'avgRating', sort_order = 'desc', max_items = 10,
+               outside_org = False, categories = None, category_filters = None, enrich = False) -> list:
+        items = self._gis._portal.search_items(query, item_type)
+        return [Item(self._gis, item) for item in page_results(self._gis._con, "search", items, max_items)]
+
+    def create_folder(self, folder, owner = None) -> dict:
+        self._gis._con.post("content/users/createFolder")
+        owner = getattr(owner, "username", owner) or self._gis._username
+        return dict(self._gis._portal.add_folder(folder, owner))
+
+    def clone_items(self, items, folder = None, item_extent = None, use_org_basemap = False, copy_data = True,
+                    copy_global_ids = False, search_existing_items = True, item_mapping = None, group_mapping = None,
+                    owner = None, preserve_item_id = False, **kwargs) -> list:
+        portal = self._gis._portal
+        owner = getattr(owner, "username", owner) or self._gis._username
+        if owner not in portal.users:
+            owner = self._gis._username
+        folder_record = portal.add_folder(folder, owner) if folder else None
+        cloned_items = []
+        for item in items:
+            # read the source item and its data
+            item._gis._con.get("content/items")
+            data = item.get_data()
+            for source_id, target_id in (item_mapping or {}).items():
+                data = json.loads(json.dumps(data).replace(source_id, target_id))
+            record = item._record
+            self._gis._con.post("content/users/addItem")
+            cloned_item = portal.add_item(record["title"], record["type"], owner=owner,
+                                          item_id=record["id"] if preserve_item_id else None,
+                                          ownerFolder=folder_record["id"] if folder_record else None,
+                                          url=record["url"], typeKeywords=list(record["typeKeywords"]),
+                                          tags=list(record["tags"]), snippet=record["snippet"], data=data or None,
+                                          dependencies=[(item_mapping or {}).get(item_id, item_id)
+                                                        for item_id in record["dependencies"]])
+            cloned_items.append(Item(self._gis, cloned_item))
+        return cloned_items
+
+
+class AdminManager:
+    """Stand-in for arcgis.gis.admin.PortalAdminManager (only "servers")."""
+    def __init__(self, gis):
+        from arcgis.gis.server import ServerManager
+        self._gis = gis
+        self.servers = ServerManager(gis)
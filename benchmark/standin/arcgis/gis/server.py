@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: arcgis.gis.server (stand-in)
+#
+# Purpose: Stand-in for the federated servers of a portal (admin API of ArcGIS
+# Server): servers, machines, folders and services.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import json
+from arcgis._impl import PropertyMap
+
+
+class ServerManager:
+    """Stand-in for the servers of a portal (gis.admin.servers)."""
+    def __init__(self, gis):
+        self._gis = gis
+
+    def list(self) -> list:
+        self._gis._con.get("portals/self/servers")
+        return [Server(self._gis, server) for server in self._gis._portal.servers]
+
+    @property
+    def properties(self):
+        self._gis._con.get("portals/self/servers")
+        return PropertyMap({"servers": [{"id": str(ii), "name": server["url"], "url": server["url"],
+                                         "adminUrl": f'{server["url"]}/admin', "serverType": "ArcGIS"}
+                                        for ii, server in enumerate(self._gis._portal.servers)]})
+
+
+class Server:
+    """Stand-in for arcgis.gis.server.Server (the URL is the admin URL)."""
+    def __init__(self, gis, record):
+        self._gis = gis
+        self._record = record
+        self.url = f'{record["url"]}/admin'
+        self.services = ServiceManager(self)
+        self.machines = MachineManager(self)
+
+    def __repr__(self):
+        return f'< Server @ {self.url} >'
+
+    __str__ = __repr__
+
+
+class MachineManager:
+    def __init__(self, server):
+        self._server = server
+
+    def list(self) -> list:
+        self._server._gis._con.get("admin/machines")
+        return [PropertyMap({"machineName": f'machine{ii}'}) for ii in range(self._server._record["machines"])]
+
+
+class ServiceManager:
+    """Stand-in for arcgis.gis.server.ServiceManager."""
+    def __init__(self, server):
+        self._server = server
+
+    def list(self, folder = None, refresh = True) -> list:
+        self._server._gis._con.get("admin/services")
+        services = self._server._record["folders"].get(folder or "", {})
+        return [Service(f'{self._server.url}/services/{folder + "/" if folder else ""}{key}', self._server) for key in services]
+
+    @property
+    def folders(self) -> list:
+        self._server._gis._con.get("admin/services")
+        return [folder for folder in self._server._record["folders"] if folder]
+
+
+class Service:
+    """Stand-in for arcgis.gis.server.Service (created with the admin URL of the service and the
+    server). The properties are loaded on first access and cached until the service is refreshed."""
+    def __init__(self, url, gis):
+        self._server = gis
+        service_path = url.split('/services/', 1)[1].strip('/')
+        self._folder, _, self._key = service_path.rpartition('/')
+        self._properties = None
+        self.url = url
+
+    def __repr__(self):
+        return f'<Service at {self.url}>'
+
+    @property
+    def _service(self) -> dict:
+        return self._server._record["folders"][self._folder][self._key]
+
+    @property
+    def properties(self):
+        if self._properties is None:
+            self._server._gis._con.get("admin/services/service")
+            self._properties = PropertyMap({key: value for key, value in self._service.items() if key != "status"})
+        return self._properties
+
+    def _refresh(self) -> None:
+        self._properties = None
+
+    @property
+    def status(self) -> dict:
+        self._server._gis._con.get("admin/services/status")
+        return dict(self._service["status"])
+
+    def edit(self, service) -> bool:
+        self._server._gis._con.post("admin/services/edit")
+        if isinstance(service, str):
+            service = json.loads(service)
+        self._service.update({key: value for key, value in service.items() if key != "status"})
+        self._refresh()
+        return True
+
+    def start(self) -> bool:
+        self._server._gis._con.post("admin/services/start")
+        self._service["status"] = {"configuredState": "STARTED", "realTimeState": "STARTED"}
+        return True
+
+    def stop(self) -> bool:
+        self._server._gis._con.post("admin/services/stop")
+        self._service["status"] = {"configuredState": "STOPPED", "realTimeState": "STOPPED"}
+        return True
+
+    def restart(self) -> bool:
+        return self.stop() and self.start()
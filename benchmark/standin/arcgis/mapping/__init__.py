@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: arcgis.mapping (stand-in)
+#
+# Purpose: Stand-in for the web maps, web scenes and map image layers of
+# arcgis.mapping (read only).
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+from arcgis._impl import PropertyMap
+
+
+class WebMap:
+    """Stand-in for arcgis.mapping.WebMap (the data of the item is loaded once)."""
+    def __init__(self, webmapitem = None):
+        self.item = webmapitem
+        self._data = PropertyMap(webmapitem.get_data() if webmapitem else {})
+
+    @property
+    def basemap(self):
+        return self._data.get("baseMap", PropertyMap({"baseMapLayers": []}))
+
+    @property
+    def layers(self) -> list:
+        return self._data.get("operationalLayers", [])
+
+    @property
+    def tables(self) -> list:
+        return self._data.get("tables", [])
+
+
+class WebScene(PropertyMap):
+    """Stand-in for arcgis.mapping.WebScene (dictionary with the data of the item)."""
+    def __init__(self, websceneitem = None):
+        super().__init__(websceneitem.get_data() if websceneitem else {})
+        self.item = websceneitem
+
+
+class MapImageLayer:
+    """Stand-in for arcgis.mapping.MapImageLayer (REST properties of a map service of the portal model)."""
+    def __init__(self, url, gis = None):
+        self.url = url
+        self._gis = gis
+        self._properties = None
+
+    @property
+    def properties(self):
+        if self._properties is None:
+            self._gis._con.get("rest/services/service")
+            portal, server = self._gis._model.find_server(self.url)
+            service_path = self.url.split('/services/', 1)[1].strip('/')
+            path, _, service_type = service_path.rpartition('/')
+            folder, _, name = path.rpartition('/')
+            service = server["folders"][folder][f'{name}.{service_type}'] if server else None
+            if service is None:
+                raise Exception(f'Service "{self.url}" not found')
+            self._properties = PropertyMap({key: value for key, value in service.items() if key != "status"})
+        return self._properties
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: arcpy (stand-in)
+#
+# Purpose: Offline stand-in for arcpy. Only the parts used by the scripts of
+# this repository are implemented (sign in, toolboxes, arcpy.mp and
+# arcpy.server), backed by the in-memory portal model (see portal_model.py).
+# Every geoprocessing tool is delayed by the geoprocessing latency of the
+# model. Only for benchmarks, not for production!
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, sys, time
+import portal_model
+
+## globale variables
+# result of the last geoprocessing tool (see GetMessages)
+_last_result = None
+
+
+class ExecuteError(Exception):
+    pass
+
+
+class Result:
+    """Stand-in for the result object of a geoprocessing tool (always succeeded)."""
+    def __init__(self, tool, outputs, messages = None):
+        self._tool = tool
+        self._outputs = list(outputs)
+        self._messages = [(0, f'Start Time: {time.ctime()}')] + list(messages or []) + [(0, f'Succeeded at {time.ctime()}')]
+        self.status = 4
+
+    def __repr__(self):
+        return f'<Result {self._outputs[0] if self._outputs else ""!r}>'
+
+    def __getitem__(self, index):
+        return self._outputs[index]
+
+    def __len__(self):
+        return len(self._outputs)
+
+    @property
+    def outputCount(self) -> int:
+        return len(self._outputs)
+
+    def getOutput(self, index):
+        return self._outputs[index]
+
+    @property
+    def messageCount(self) -> int:
+        return len(self._messages)
+
+    def getMessage(self, index) -> str:
+        return self._messages[index][1]
+
+    def getSeverity(self, index) -> int:
+        return self._messages[index][0]
+
+    def getMessages(self, severity = None) -> str:
+        return "\n".join(message for message_severity, message in self._messages
+                         if severity is None or message_severity == severity)
+
+
+def run_tool(name, outputs, messages = None) -> Result:
+    """Count a geoprocessing tool, wait for the geoprocessing latency and return its result."""
+    global _last_result
+    model = portal_model.get_model()
+    model.call(f'arcpy.{name}', model.gp_latency)
+    _last_result = Result(name, outputs, messages)
+    return _last_result
+
+
+def GetParameterAsText(index) -> str:
+    # the parameters of a script tool are the arguments of the command line
+    return sys.argv[index + 1] if len(sys.argv) > index + 1 else ""
+
+
+def GetMessages(severity = 0) -> str:
+    return _last_result.getMessages(severity) if _last_result else ""
+
+
+def SignInToPortal(portal_url, username = None, password = None, cert_file = None, key_file = None,
+                   token = None, referer = None) -> dict:
+    model = portal_model.get_model()
+    model.call("arcpy.SignInToPortal")
+    portal = model.get_portal(portal_url)
+    if username and username not in portal.users:
+        raise ExecuteError(f'ERROR 000222: Invalid username or password for "{portal_url}".')
+    model.arcpy_user = (portal, username or portal_model.ADMIN_USERNAME)
+    return {"token": "standin", "referer": referer or "", "expires": int(time.time()) + 7200}
+
+
+class Toolbox:
+    """Stand-in for an imported toolbox: every tool returns a result with its parameters as outputs."""
+    def __init__(self, input_file):
+        self._input_file = input_file
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        def tool(*args, **kwargs):
+            return run_tool(name, args, [(0, f'Executing {name} ({os.path.basename(self._input_file)})')])
+        tool.__name__ = name
+        return tool
+
+
+def ImportToolbox(input_file, module_name = None) -> Toolbox:
+    if not os.path.exists(input_file):
+        raise ExecuteError(f'ERROR 000732: Toolbox "{input_file}" does not exist.')
+    run_tool("ImportToolbox", [input_file])
+    return Toolbox(input_file)
+
+
+def CreateGPSDDraft(result, out_sddraft, service_name, server_type = "ARCGIS_SERVER", connection_file_path = None,
+                    copy_data_to_server = False, folder_name = None, summary = None, tags = None,
+                    executionType = "Asynchronous", resultMapServer = False, showMessages = "None",
+                    maximumRecords = 1000, minInstances = 2, maxInstances = 3, maxUsageTime = 600, maxWaitTime = 60,
+                    maxIdleTime = 1800, capabilities = None, constantValues = None, choicelists = None) -> dict:
+    run_tool("CreateGPSDDraft", [out_sddraft])
+    server.write_sddraft(out_sddraft, service_name, "GPServer", folder_name, overwrite=False,
+                         properties={"executionType": executionType, "maximumRecords": maximumRecords,
+                                     "MinInstances": minInstances, "MaxInstances": maxInstances})
+    return {"messages": {}, "warnings": {}, "errors": {}}
+
+
+from arcpy import server, mp
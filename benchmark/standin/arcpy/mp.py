@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: arcpy.mp (stand-in)
+#
+# Purpose: Stand-in for arcpy.mp: ArcGIS Pro projects are JSON files with the
+# maps and their layers and tables, e.g.
+# {"maps": [{"name": "Map", "layers": ["Roads"], "tables": ["Owners"]}]}
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import json
+from arcpy import run_tool, ExecuteError
+from arcpy import server
+
+
+class Layer:
+    def __init__(self, name):
+        self.name = name
+        self.isGroupLayer = False
+
+    def __repr__(self):
+        return f'<Layer {self.name}>'
+
+
+class Table:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f'<Table {self.name}>'
+
+
+class SharingDraft:
+    """Stand-in for the sharing drafts of arcpy.sharing (MapImageSharingDraft, FeatureSharingDraft)."""
+    def __init__(self, server_type, service_type, service_name, layers_and_tables = None):
+        self.serverType = server_type
+        self.serviceType = service_type
+        self.serviceName = service_name
+        self.layersAndTables = layers_and_tables
+        self.checkUniqueIDAssignment = False
+        self.copyDataToServer = False
+        self.federatedServerUrl = None
+        self.overwriteExistingService = False
+        self.portalFolder = None
+        self.serverFolder = None
+        self.credits = None
+        self.description = None
+        self.summary = None
+        self.tags = None
+        self.useLimitations = None
+
+    def exportToSDDraft(self, out_sddraft) -> None:
+        run_tool("sharing.exportToSDDraft", [out_sddraft])
+        server.write_sddraft(out_sddraft, self.serviceName, "MapServer", self.serverFolder, self.overwriteExistingService)
+
+
+class Map:
+    def __init__(self, definition):
+        self.name = definition["name"]
+        self._layers = [Layer(name) for name in definition.get("layers", [])]
+        self._tables = [Table(name) for name in definition.get("tables", [])]
+
+    def __repr__(self):
+        return f'<Map {self.name}>'
+
+    def listLayers(self, wildcard = None) -> list:
+        return [layer for layer in self._layers if not wildcard or wildcard.strip('*').lower() in layer.name.lower()]
+
+    def listTables(self, wildcard = None) -> list:
+        return [table for table in self._tables if not wildcard or wildcard.strip('*').lower() in table.name.lower()]
+
+    def getWebLayerSharingDraft(self, server_type, service_type, service_name, layers_and_tables = None) -> SharingDraft:
+        return SharingDraft(server_type, service_type, service_name, layers_and_tables)
+
+
+class ArcGISProject:
+    """Stand-in for arcpy.mp.ArcGISProject (the project file is read as JSON)."""
+    def __init__(self, aprx_path):
+        run_tool("mp.ArcGISProject", [aprx_path])
+        try:
+            with open(aprx_path, encoding='utf-8') as f:
+                definition = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ExecuteError(f'ERROR 000732: The project "{aprx_path}" can not be opened: {e}')
+        self.filePath = aprx_path
+        self._maps = [Map(map_definition) for map_definition in definition.get("maps", [])]
+
+    def listMaps(self, wildcard = None) -> list:
+        return [m for m in self._maps if not wildcard or wildcard.strip('*').lower() in m.name.lower()]
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: arcpy.server (stand-in)
+#
+# Purpose: Stand-in for arcpy.server: service definition drafts (written as
+# simplified XML with the elements edited by the publish scripts), staging,
+# uploading to the federated server of the portal model and cache tools.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, shutil
+import xml.dom.minidom as DOM
+from xml.sax.saxutils import escape
+import portal_model
+from arcpy import run_tool, ExecuteError
+
+## globale variables
+# default properties of the service configuration of a sddraft
+DEFAULT_PROPERTIES = {"WebCapabilities": "Map,Query,Data", "antialiasingMode": "None", "textAntialiasingMode": "Force",
+                      "maxScale": "0", "minScale": "0", "isCached": "false", "MinInstances": "1", "MaxInstances": "2"}
+# default capabilities of the extensions of a map service
+EXTENSION_CAPABILITIES = {"FeatureServer": "Query,Create,Update,Delete,Uploads,Editing", "KmlServer": "SingleImage",
+                          "WMSServer": "GetCapabilities,GetMap", "WFSServer": "GetCapabilities,GetFeature",
+                          "WCSServer": "GetCapabilities,GetCoverage"}
+# portal item types of the services
+ITEM_TYPES = {"MapServer": "Map Service", "FeatureServer": "Feature Service", "GPServer": "Geoprocessing Service"}
+
+
+def property_array(properties) -> str:
+    return "<PropertyArray>" + "".join(f'<PropertySetProperty><Key>{escape(str(key))}</Key><Value>{escape(str(value))}</Value>'
+                                       f'</PropertySetProperty>' for key, value in properties.items()) + "</PropertyArray>"
+
+
+def write_sddraft(file, service_name, service_type, folder = None, overwrite = False, properties = None,
+                  staging = None) -> None:
+    """Write a simplified service definition draft (XML without whitespace between the elements,
+    like the sddraft files of ArcGIS Pro). The first "Info" element contains the service configuration.
+
+    Required:
+        file -- Path to the sddraft file
+        service_name -- Name of the service
+        service_type -- Type of the service (e.g. "MapServer", "GPServer")
+
+    Optional:
+        folder -- Folder of the service on the server
+        overwrite -- True if an existing service is replaced
+        properties -- Dictionary with further properties of the service configuration
+        staging -- Dictionary with the sharing properties (e.g. {"PackageIsPublic": "false"})
+    """
+    configuration = dict(DEFAULT_PROPERTIES, **(properties or {}))
+    extensions = ""
+    if service_type == "MapServer":
+        for type_name, capabilities in EXTENSION_CAPABILITIES.items():
+            extensions += (f'<SVCExtension><Enabled>false</Enabled><Info>{property_array({"WebCapabilities": capabilities})}'
+                           f'</Info><TypeName>{type_name}</TypeName></SVCExtension>')
+    staging = dict({"PackageUnderMyOrg": "false", "PackageIsPublic": "false", "PackageShareGroups": "false"}, **(staging or {}))
+    definition_type = "esriServiceDefinitionType_Replacement" if overwrite else "esriServiceDefinitionType_New"
+    xml = (f'<?xml version="1.0" encoding="utf-8"?><SVCManifest><Type>{definition_type}</Type>'
+           f'<Name>{escape(service_name)}</Name><ServerFolder>{escape(folder or "")}</ServerFolder>'
+           f'<ServiceType>{service_type}</ServiceType><Configurations><SVCConfiguration><Definition>'
+           f'<Info>{property_array(configuration)}</Info><Extensions>{extensions}</Extensions></Definition>'
+           f'</SVCConfiguration></Configurations><StagingSettings>{property_array(staging)}</StagingSettings></SVCManifest>')
+    with open(file, 'w', encoding='utf-8') as f:
+        f.write(xml)
+
+
+def read_sddraft(file) -> dict:
+    """Read a service definition (draft) written by write_sddraft (and edited by the publish scripts).
+
+    Return:
+        definition -- Dictionary with "name", "type", "folder", "overwrite", "properties" (all keys and values)
+                      and "extensions" (type names of the enabled extensions)
+    """
+    doc = DOM.parse(file)
+
+    def text(tag_name):
+        elements = doc.getElementsByTagName(tag_name)
+        return elements[0].firstChild.data if elements and elements[0].firstChild else ""
+    properties = {}
+    for key in doc.getElementsByTagName('Key'):
+        value = key.nextSibling
+        properties.setdefault(key.firstChild.data, value.firstChild.data if value.firstChild else "")
+    extensions = []
+    for extension in doc.getElementsByTagName('SVCExtension'):
+        enabled = extension.getElementsByTagName('Enabled')[0].firstChild.data
+        if enabled.lower() == "true":
+            extensions.append(extension.getElementsByTagName('TypeName')[0].firstChild.data)
+    return {"name": text('Name'), "type": text('ServiceType'), "folder": text('ServerFolder') or None,
+            "overwrite": text('Type') == "esriServiceDefinitionType_Replacement",
+            "properties": properties, "extensions": extensions}
+
+
+def StageService(in_service_definition_draft, out_service_definition, staging_version = None):
+    if not os.path.exists(in_service_definition_draft):
+        raise ExecuteError(f'ERROR 000732: "{in_service_definition_draft}" does not exist.')
+    result = run_tool("server.StageService", [out_service_definition])
+    shutil.copyfile(in_service_definition_draft, out_service_definition)
+    return result
+
+
+def UploadServiceDefinition(in_sd_file, in_server, in_service_name = None, in_cluster = None,
+                            in_folder_type = "FROM_SERVICE_DEFINITION", in_folder = None, in_startupType = "STARTED",
+                            in_override = "USE_DEFINITION", in_my_contents = "NO_SHARE_ONLINE", in_public = "PRIVATE",
+                            in_organization = "NO_SHARE_ORGANIZATION", in_groups = None):
+    model = portal_model.get_model()
+    if not os.path.exists(in_sd_file):
+        raise ExecuteError(f'ERROR 000732: "{in_sd_file}" does not exist.')
+    portal, server = model.find_server(in_server)
+    if server is None:
+        raise ExecuteError(f'ERROR 001369: Server "{in_server}" not found.')
+    definition = read_sddraft(in_sd_file)
+    name = in_service_name or definition["name"]
+    folder = in_folder if in_folder_type == "EXISTING" and in_folder else definition["folder"]
+    service_type = definition["type"]
+    key = f'{name}.{service_type}'
+    services = server["folders"].setdefault(folder or "", {})
+    if key in services and not definition["overwrite"]:
+        raise ExecuteError(f'ERROR 001117: Service "{key}" already exists.')
+    result = run_tool("server.UploadServiceDefinition",
+                      [f'{server["url"]}/rest/services/{folder + "/" if folder else ""}{name}/{service_type}'])
+    # sharing of the portal items
+    if in_override == "OVERRIDE_DEFINITION":
+        everyone = in_public == "PUBLIC"
+        org = everyone or in_organization == "SHARE_ORGANIZATION"
+    else:
+        everyone = definition["properties"].get("PackageIsPublic") == "true"
+        org = everyone or definition["properties"].get("PackageUnderMyOrg") == "true"
+    owner = model.arcpy_user[1] if model.arcpy_user else portal_model.ADMIN_USERNAME
+    item_types = [service_type]
+    if "FeatureServer" in definition["extensions"]:
+        item_types.append("FeatureServer")
+    portal_items = services[key]["portalProperties"]["portalItems"] if key in services else []
+    existing = {portal_item["type"]: portal_item["itemID"] for portal_item in portal_items if portal_item["itemID"] in portal.items}
+    portal_items = []
+    for item_type in item_types:
+        url = result[0] if item_type == service_type else result[0].rsplit('/', 1)[0] + f'/{item_type}'
+        if item_type in existing:
+            item = portal.items[existing[item_type]]
+            item["url"] = url
+        else:
+            item = portal.add_item(name, ITEM_TYPES.get(item_type, item_type), owner=owner, url=url,
+                                   typeKeywords=[ITEM_TYPES.get(item_type, item_type), "ArcGIS Server"])
+        item["access"] = "public" if everyone else "org" if org else "private"
+        portal_items.append({"itemID": item["id"], "type": item_type})
+    services[key] = portal_model.get_service_properties(
+        name, service_type, portal_items, definition["properties"].get("WebCapabilities", "Map,Query,Data"),
+        definition["extensions"], in_startupType or "STARTED")
+    return result
+
+
+def CreateMapServerCache(input_service, service_cache_directory = None, tiling_scheme_type = None, scales_type = None,
+                         num_of_scales = None, dots_per_inch = None, tile_size = None, **kwargs):
+    return run_tool("server.CreateMapServerCache", [input_service])
+
+
+def ManageMapServerCacheTiles(input_service, scales = None, update_mode = None, num_of_caching_service_instances = None,
+                              area_of_interest = None, update_extent = None, wait_for_job_completion = None, **kwargs):
+    return run_tool("server.ManageMapServerCacheTiles", [input_service])
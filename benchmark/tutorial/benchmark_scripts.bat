@@ -0,0 +1,7 @@
+@echo off
+chcp 65001
+
+rem Benchmark the scripts against synthetic organisations (offline)
+"C:\Program Files\ArcGIS\Pro\bin\Python\envs\arcgispro-py3\python.exe" "..\benchmark_scripts.py" "benchmark_scripts.json"
+
+pause
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: benchmark_tiles
+#
+# Purpose: Script to warm up the cache of a map service and to measure the tile
+# latency: tile requests are generated from the tiling scheme and the extent of
+# the cache and sent concurrently to the service (or to a local stand-in server).
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, sys, json, time
+# python Skript with my own tile request functions
+import tile_request_functions as trf
+# python Skript with the local stand-in tile server
+import tile_server_functions as tsv
+import bundle_functions as bfn
+# python Skript with my own tiling scheme functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'publish'))
+import tiling_scheme_functions as tsf
+# python Skript with my own logging functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'common'))
+import logging_functions as lgf
+
+
+def create_folder(folder_path) -> None:
+    """Creates a folder if it does not already exist.
+
+    Required:
+        folder_path -- The path to the folder (e.g. log folder).
+    """
+    if not os.path.isdir(folder_path):
+        try:
+            print(f'Creating a folder: {folder_path}')
+            os.makedirs(folder_path)
+        except:
+            raise ValueError(f'The folder "{folder_path}" does not exist and could not be created!')
+
+
+if __name__ == "__main__":
+    # path to a JSON input file
+    paramFile = sys.argv[1] if len(sys.argv) > 1 else None
+    #paramFile = r'C:\Temp\tutorial\benchmark_tiles.json'
+
+    if paramFile:
+        with open(paramFile, encoding='utf-8') as f:
+            data = json.load(f)
+            if "service_url" in data:
+                service_url = data["service_url"]
+            else:
+                service_url = None #default
+            if "local_cache_directory" in data:
+                local_cache_directory = data["local_cache_directory"]
+            else:
+                local_cache_directory = None #default
+            if not service_url and not local_cache_directory:
+                raise ValueError('Either "service_url" or "local_cache_directory" must be specified!')
+            if "publish_parameter_file" in data:
+                # use the cache parameters of a parameter file of publish_service_portal.py
+                with open(data["publish_parameter_file"], encoding='utf-8') as f_publish:
+                    data_publish = json.load(f_publish)
+                enable_cache = data_publish.get("enable_cache", {})
+                manage_cache = data_publish.get("manage_cache", {})
+            else:
+                enable_cache = None #default -> tiling scheme of the service
+                manage_cache = {}
+            if "update_extent" in data:
+                update_extent = data["update_extent"]
+            else:
+                update_extent = manage_cache.get("update_extent") #default -> full extent of the service
+            if "levels" in data:
+                levels = [int(level) for level in str(data["levels"]).split(';')]
+            else:
+                levels = None #default -> all levels
+            if "pattern" in data:
+                pattern = data["pattern"]
+                if pattern not in trf.PATTERNS:
+                    raise ValueError(f'Unknown access pattern "{pattern}" (valid: {trf.PATTERNS})')
+            else:
+                pattern = "random" #default
+            if "requests_per_level" in data:
+                requests_per_level = int(data["requests_per_level"])
+            else:
+                requests_per_level = 100 #default
+            if "concurrency" in data:
+                concurrency = int(data["concurrency"])
+            else:
+                concurrency = 8 #default
+            if "viewport" in data:
+                viewport = tuple(int(value) for value in data["viewport"].lower().split('x'))
+            else:
+                viewport = (4, 3) #default
+            if "seed" in data:
+                seed = int(data["seed"])
+            else:
+                seed = 0 #default
+            if "timeout" in data:
+                timeout = int(data["timeout"])
+            else:
+                timeout = 30 #default
+            if "token" in data:
+                token = data["token"]
+            else:
+                token = None #default
+            verify_cert = True #default
+            if "verify_cert" in data:
+                if data["verify_cert"] == "False":
+                    verify_cert = False
+            paramFileFolder = os.path.dirname(paramFile)
+            if "log_folder" in data:
+                log_folder = data["log_folder"]
+            else:
+                log_folder = os.path.join(paramFileFolder, "Logs") #default
+            if "report_folder" in data:
+                report_folder = data["report_folder"]
+            else:
+                report_folder = os.path.join(paramFileFolder, "Reports") #default
+    else:
+        print('no Parameter-JSON file specified')
+        sys.exit()
+
+    ## start logging
+    # create logfolder and reportfolder
+    create_folder(report_folder)
+    create_folder(log_folder)
+
+    filename = os.path.splitext(os.path.basename(paramFile))[0]
+    # path to the log file
+    log_file = os.path.join(log_folder, f'{filename}.log')
+    # initialise logging
+    logger = lgf.init_logging(log_file)
+    logger.info(f'******************* Benchmark tiles *******************')
+    logger.info(f'Start logging: {time.ctime()}')
+    start_time = time.time()
+
+    ## local stand-in server
+    server = None
+    if local_cache_directory:
+        conf_xml = bfn.find_conf_xml(local_cache_directory)
+        if not conf_xml:
+            logger.error(f'The tiling scheme (conf.xml) of the cache "{local_cache_directory}" was not found!')
+            raise ValueError(f'The tiling scheme (conf.xml) of the cache "{local_cache_directory}" was not found!')
+        service_info = {"tileInfo": tsf.get_tile_info(tsf.read_tiling_scheme_xml(conf_xml))}
+        cache_extent = bfn.read_cache_extent(local_cache_directory)
+        if cache_extent:
+            service_info["fullExtent"] = dict(zip(["xmin", "ymin", "xmax", "ymax"], cache_extent))
+        server = tsv.TileServer(local_cache_directory, service_info)
+        server.start()
+        service_url = server.url
+        logger.info(f'Local stand-in server for the cache "{local_cache_directory}": {service_url}')
+
+    client = trf.TileClient(service_url, concurrency, timeout, token, verify_cert)
+    try:
+        ## tiling scheme and extent
+        # without "tile_origin" the tiling scheme is read from the service
+        tiling_scheme = tsf.get_tiling_scheme(enable_cache) if enable_cache else None
+        if not tiling_scheme:
+            service_info = client.get_json()
+            if "tileInfo" not in service_info:
+                logger.error(f'The service "{service_url}" has no tiling scheme (not cached)!')
+                raise ValueError(f'The service "{service_url}" has no tiling scheme (not cached)!')
+            tiling_scheme = tsf.read_tile_info(service_info["tileInfo"])
+            if not update_extent and "fullExtent" in service_info:
+                full_extent = service_info["fullExtent"]
+                update_extent = f'{full_extent["xmin"]} {full_extent["ymin"]} {full_extent["xmax"]} {full_extent["ymax"]}'
+        if not update_extent:
+            logger.error('No extent defined (parameter "update_extent")!')
+            raise ValueError('No extent defined (parameter "update_extent")!')
+        extent = tsf.parse_extent(update_extent)
+        if levels is None:
+            levels = [lod["level"] for lod in tiling_scheme["lods"]]
+        logger.info(f'Extent: {tsf.format_extent(extent)}, pattern "{pattern}", {requests_per_level} requests per level, '
+                    f'concurrency {concurrency}')
+
+        ## requests per level
+        report = {"service_url": service_url, "pattern": pattern, "concurrency": concurrency,
+                  "extent": list(extent), "levels": []}
+        all_results = []
+        all_duration = 0
+        for level in levels:
+            lod = tsf.get_lod(tiling_scheme, level=level)
+            if not lod:
+                logger.warning(f'Level {level} is not defined in the tiling scheme')
+                continue
+            tile_range = tsf.get_tile_range(extent, lod["scale"], tiling_scheme)
+            tile_requests = trf.generate_tile_requests(level, tile_range, pattern, requests_per_level, viewport, seed)
+            results, duration = client.run(tile_requests)
+            all_results.extend(results)
+            all_duration += duration
+            summary = trf.summarize_results(results, duration)
+            report["levels"].append(dict({"level": level, "scale": lod["scale"]}, **summary))
+            if not summary["requests"]:
+                logger.warning(f'Level {level} ({lod["scale"]:g}): no tiles requested')
+                continue
+            logger.info(f'Level {level} ({lod["scale"]:g}): {summary["requests"]} requests, p50 {summary["p50_ms"]} ms, '
+                        f'p95 {summary["p95_ms"]} ms, p99 {summary["p99_ms"]} ms, {summary["requests_per_sec"]} req/s, '
+                        f'miss ratio {summary["miss_ratio"]}')
+            if summary["errors"]:
+                logger.warning(f'Level {level}: {summary["errors"]} requests failed')
+        report["total"] = trf.summarize_results(all_results, all_duration)
+        if all_results:
+            logger.info(f'Total: {report["total"]["requests"]} requests, p50 {report["total"]["p50_ms"]} ms, '
+                        f'p95 {report["total"]["p95_ms"]} ms, p99 {report["total"]["p99_ms"]} ms, '
+                        f'{report["total"]["requests_per_sec"]} req/s, miss ratio {report["total"]["miss_ratio"]}')
+        report_file = os.path.join(report_folder, f'{filename}.json')
+        with open(report_file, 'w', encoding='utf-8') as json_file:
+            json.dump(report, json_file, indent=2, ensure_ascii=False)
+        logger.info(f'Report: {report_file}')
+    finally:
+        client.close()
+        if server:
+            server.stop()
+
+    ## end logging
+    end_time = time.time()
+    i_error, i_warning = lgf.get_counts(logger)
+    logger.info("Run Script in " + str(round(end_time - start_time)) + " sec.")
+    logger.info(f'# {i_error} errors found')
+    logger.info(f'# {i_warning} warnings found')
+    logger.info(f'End time: {time.ctime()}')
+    logger.info('****************************************************************\n')
+    lgf.close_logging(logger)
@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: bundle_functions
+#
+# Purpose: Custom functions to read the bundle files of an ArcGIS compact cache
+# (version 2) without ArcGIS.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, re, sys, mmap, struct
+import xml.dom.minidom as DOM
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+# python Skript with my own tiling scheme functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'publish'))
+import tiling_scheme_functions as tsf
+
+## globale variables
+# layout of a bundle file (compact cache V2): header, tile index (one 8 byte entry per tile), tile data
+BUNDLE_HEADER_BYTES = 64
+BUNDLE_DIMENSION = 128
+BUNDLE_INDEX_BYTES = BUNDLE_DIMENSION * BUNDLE_DIMENSION * 8
+# an index entry contains the offset of the tile (lower 5 bytes) and the size of the tile (upper 3 bytes)
+OFFSET_MASK = (1 << 40) - 1
+SIZE_SHIFT = 40
+# name of a bundle file: row and column of the upper left tile (hexadecimal)
+BUNDLE_NAME = re.compile(r'^R([0-9a-fA-F]+)C([0-9a-fA-F]+)\.bundle$')
+# name of a level folder (e.g. "L05")
+LEVEL_NAME = re.compile(r'^L(\d+)$')
+
+
+def parse_bundle_name(bundle_name) -> tuple:
+    """Get the row and column of the upper left tile of a bundle from its file name.
+
+    Required:
+        bundle_name -- File name of the bundle (e.g. "R0080C0100.bundle")
+
+    Return:
+        row, col -- Row and column of the upper left tile (None, None if the name is not valid)
+    """
+    match = BUNDLE_NAME.match(os.path.basename(bundle_name))
+    if not match:
+        return None, None
+    return int(match.group(1), 16), int(match.group(2), 16)
+
+
+def get_bundle_name(row, col) -> str:
+    """Get the file name of the bundle which contains a tile.
+
+    Required:
+        row, col -- Row and column of the tile
+
+    Return:
+        bundle_name -- File name of the bundle (e.g. "R0080C0100.bundle")
+    """
+    return f'R{row - row % BUNDLE_DIMENSION:04x}C{col - col % BUNDLE_DIMENSION:04x}.bundle'
+
+
+def read_bundle_index(bundle_file) -> tuple:
+    """Read the tile index of a bundle (compact cache V2). Only the header and the index of
+    the bundle are mapped into memory, the tile data is not read.
+
+    Required:
+        bundle_file -- Path to the bundle file
+
+    Return:
+        offsets -- 2d numpy array (128 x 128) with the offsets of the tiles in the bundle file
+        sizes -- 2d numpy array (128 x 128) with the sizes of the tiles in bytes (0 = no tile)
+    """
+    with open(bundle_file, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        if file_size < BUNDLE_HEADER_BYTES + BUNDLE_INDEX_BYTES:
+            raise ValueError(f'The file "{bundle_file}" is not a valid bundle (compact cache V2)')
+        with mmap.mmap(f.fileno(), BUNDLE_HEADER_BYTES + BUNDLE_INDEX_BYTES, access=mmap.ACCESS_READ) as mm:
+            version = struct.unpack_from('<I', mm, 0)[0]
+            if version != 3:
+                raise ValueError(f'The file "{bundle_file}" is not a bundle of a compact cache V2 (version {version})')
+            index = np.frombuffer(mm, dtype='<u8', count=BUNDLE_DIMENSION * BUNDLE_DIMENSION,
+                                  offset=BUNDLE_HEADER_BYTES).copy()
+    offsets = (index & OFFSET_MASK).reshape(BUNDLE_DIMENSION, BUNDLE_DIMENSION)
+    sizes = (index >> SIZE_SHIFT).reshape(BUNDLE_DIMENSION, BUNDLE_DIMENSION)
+    return offsets, sizes
+
+
+def read_tile(bundle_file, row, col) -> bytes:
+    """Read the data of a single tile from a bundle.
+
+    Required:
+        bundle_file -- Path to the bundle file
+        row, col -- Row and column of the tile (absolute or relative to the bundle)
+
+    Return:
+        data -- Tile data (e.g. PNG image) or None if the bundle contains no tile at this position
+    """
+    offsets, sizes = read_bundle_index(bundle_file)
+    row, col = row % BUNDLE_DIMENSION, col % BUNDLE_DIMENSION
+    size = int(sizes[row, col])
+    if size == 0:
+        return None
+    with open(bundle_file, 'rb') as f:
+        f.seek(int(offsets[row, col]))
+        return f.read(size)
+
+
+def find_layers_folder(cache_directory) -> str:
+    """Find the folder "_alllayers" of a cache.
+
+    Required:
+        cache_directory -- Path to the cache of a service (e.g. ".../arcgiscache/Test_citymaps_map_cache"),
+                           to the folder "Layers" or to the folder "_alllayers"
+
+    Return:
+        layers_folder -- Path to the folder "_alllayers"
+    """
+    for candidate in [cache_directory, os.path.join(cache_directory, '_alllayers'),
+                      os.path.join(cache_directory, 'Layers', '_alllayers')]:
+        if os.path.basename(os.path.normpath(candidate)) == '_alllayers' and os.path.isdir(candidate):
+            return candidate
+    raise ValueError(f'The folder "_alllayers" was not found in "{cache_directory}"!')
+
+
+def find_conf_xml(cache_directory) -> str:
+    """Find the tiling scheme file (conf.xml) of a cache.
+
+    Required:
+        cache_directory -- Path to the cache of a service (see find_layers_folder)
+
+    Return:
+        conf_xml -- Path to the file "conf.xml" (None if not found)
+    """
+    layers_folder = os.path.dirname(os.path.normpath(find_layers_folder(cache_directory)))
+    conf_xml = os.path.join(layers_folder, 'conf.xml')
+    if os.path.isfile(conf_xml):
+        return conf_xml
+    return None
+
+
+def read_cache_extent(cache_directory) -> tuple:
+    """Read the extent of a cache from its file "conf.cdi".
+
+    Required:
+        cache_directory -- Path to the cache of a service (see find_layers_folder)
+
+    Return:
+        extent -- Tuple (xmin, ymin, xmax, ymax) or None (if the file does not exist)
+    """
+    layers_folder = os.path.dirname(os.path.normpath(find_layers_folder(cache_directory)))
+    conf_cdi = os.path.join(layers_folder, 'conf.cdi')
+    if not os.path.isfile(conf_cdi):
+        return None
+    doc = DOM.parse(conf_cdi)
+    return tuple(float(doc.getElementsByTagName(tag_name)[0].firstChild.data)
+                 for tag_name in ['XMin', 'YMin', 'XMax', 'YMax'])
+
+
+def list_levels(cache_directory) -> dict:
+    """List the level folders of a cache.
+
+    Required:
+        cache_directory -- Path to the cache of a service (see find_layers_folder)
+
+    Return:
+        levels -- Dictionary {level id: path to the level folder}
+    """
+    layers_folder = find_layers_folder(cache_directory)
+    levels = {}
+    for name in os.listdir(layers_folder):
+        match = LEVEL_NAME.match(name)
+        if match and os.path.isdir(os.path.join(layers_folder, name)):
+            levels[int(match.group(1))] = os.path.join(layers_folder, name)
+    return dict(sorted(levels.items()))
+
+
+def list_bundles(level_folder) -> dict:
+    """List the bundle files of a level.
+
+    Required:
+        level_folder -- Path to the level folder (e.g. ".../_alllayers/L05")
+
+    Return:
+        bundles -- Dictionary {(row, col) of the upper left tile: path to the bundle file}
+    """
+    bundles = {}
+    with os.scandir(level_folder) as entries:
+        for entry in entries:
+            row, col = parse_bundle_name(entry.name)
+            if row is not None and entry.is_file():
+                bundles[(row, col)] = entry.path
+    return bundles
+
+
+def inspect_level(level_folder, empty_tile_max_bytes = 0, tile_range = None, mask = None, histogram_bins = None,
+                  max_workers = 8) -> dict:
+    """Inspect all bundles of a level by reading only the tile indexes.
+
+    Required:
+        level_folder -- Path to the level folder (e.g. ".../_alllayers/L05")
+
+    Optional:
+        empty_tile_max_bytes -- Tiles with a size up to this number of bytes are counted as empty (e.g. blank PNG)
+        tile_range -- Tuple (row_min, row_max, col_min, col_max) with the expected tiles. If specified, missing
+                      tiles are counted within this range, otherwise within the bundles of the level. The tiles,
+                      the bytes and the histogram only include the tiles within this range.
+        mask -- 2d numpy array (bool) with the shape of the tile range: only the tiles where the mask is True
+                are counted (e.g. the tiles covered by a polygon, see tsf.get_covered_tiles)
+        histogram_bins -- List with the bin edges (bytes) of the size histogram (default: powers of 2)
+        max_workers -- Number of threads reading the bundle indexes (helps on network shares)
+
+    Return:
+        result -- Dictionary with "bundles", "tiles", "empty_tiles", "missing_tiles", "bytes", "histogram",
+                  "row_min", "col_min" and "coverage" (2d numpy array: 0 = missing, 1 = empty, 2 = tile)
+    """
+    if histogram_bins is None:
+        histogram_bins = [0] + [2 ** exponent for exponent in range(7, 25)]
+    bundles = list_bundles(level_folder)
+    if tile_range:
+        row_min, row_max, col_min, col_max = tile_range
+    elif bundles:
+        row_min = min(row for row, col in bundles)
+        col_min = min(col for row, col in bundles)
+        row_max = max(row for row, col in bundles) + BUNDLE_DIMENSION - 1
+        col_max = max(col for row, col in bundles) + BUNDLE_DIMENSION - 1
+    else:
+        return {"bundles": 0, "tiles": 0, "empty_tiles": 0, "missing_tiles": 0, "bytes": 0,
+                "histogram": {"bins": histogram_bins, "counts": [0] * (len(histogram_bins) - 1)},
+                "row_min": 0, "col_min": 0, "coverage": np.zeros((0, 0), dtype=np.uint8)}
+    coverage = np.zeros((row_max - row_min + 1, col_max - col_min + 1), dtype=np.uint8)
+    histogram = np.zeros(len(histogram_bins) - 1, dtype=np.int64)
+    total_bytes = 0
+    # the indexes are read in threads, the results are merged in the order of the bundles
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        indexes = executor.map(read_bundle_index, bundles.values())
+        for ((bundle_row, bundle_col), bundle_file), (offsets, sizes) in zip(bundles.items(), indexes):
+            # only the part of the bundle which lies within the coverage grid (and the mask) is counted
+            r0, c0 = bundle_row - row_min, bundle_col - col_min
+            r_start, c_start = max(r0, 0), max(c0, 0)
+            r_end = min(r0 + BUNDLE_DIMENSION, coverage.shape[0])
+            c_end = min(c0 + BUNDLE_DIMENSION, coverage.shape[1])
+            if r_start >= r_end or c_start >= c_end:
+                continue
+            window = sizes[r_start - r0:r_end - r0, c_start - c0:c_end - c0]
+            if mask is not None:
+                window = np.where(mask[r_start:r_end, c_start:c_end], window, 0)
+            present = window[window > 0]
+            total_bytes += int(present.sum())
+            histogram += np.histogram(present, bins=histogram_bins)[0]
+            coverage[r_start:r_end, c_start:c_end] = np.where(window > empty_tile_max_bytes, 2,
+                                                              np.where(window > 0, 1, 0))
+    missing = coverage == 0
+    if mask is not None:
+        missing &= mask
+    return {"bundles": len(bundles),
+            "tiles": int((coverage > 0).sum()),
+            "empty_tiles": int((coverage == 1).sum()),
+            "missing_tiles": int(missing.sum()),
+            "bytes": total_bytes,
+            "histogram": {"bins": histogram_bins, "counts": histogram.tolist()},
+            "row_min": row_min, "col_min": col_min, "coverage": coverage}
+
+
+def write_coverage_map(coverage, image_file) -> None:
+    """Write a coverage grid as grayscale image (PGM format): black = missing tile,
+    gray = empty tile, white = tile.
+
+    Required:
+        coverage -- 2d numpy array (0 = missing, 1 = empty, 2 = tile), see inspect_level
+        image_file -- Path to the image file (.pgm)
+    """
+    pixels = (coverage.astype(np.uint16) * 255 // 2).astype(np.uint8)
+    with open(image_file, 'wb') as f:
+        f.write(f'P5\n{pixels.shape[1]} {pixels.shape[0]}\n255\n'.encode('ascii'))
+        f.write(pixels.tobytes())
+
+
+def compare_bundles(bundle_file_a, bundle_file_b, compare_tiles = False):
+    """Compare the tiles of two bundles at the same position (e.g. of a test and a production cache).
+    Tiles are different if only one bundle contains them or if their sizes differ. The offsets are not
+    compared, because they depend on the order in which the tiles were written.
+
+    Required:
+        bundle_file_a, bundle_file_b -- Paths to the bundle files (None if the bundle does not exist)
+
+    Optional:
+        compare_tiles -- If True, the data of tiles with the same size are also compared (the bundles
+                         are mapped into memory, only these tiles are read)
+
+    Return:
+        differences -- 2d numpy array (128 x 128) with True for every different tile
+    """
+    empty = np.zeros((BUNDLE_DIMENSION, BUNDLE_DIMENSION), dtype=np.uint64)
+    offsets_a, sizes_a = read_bundle_index(bundle_file_a) if bundle_file_a else (empty, empty)
+    offsets_b, sizes_b = read_bundle_index(bundle_file_b) if bundle_file_b else (empty, empty)
+    differences = sizes_a != sizes_b
+    if compare_tiles and bundle_file_a and bundle_file_b:
+        rows, cols = np.nonzero((sizes_a == sizes_b) & (sizes_a > 0))
+        if len(rows):
+            with open(bundle_file_a, 'rb') as fa, open(bundle_file_b, 'rb') as fb:
+                with mmap.mmap(fa.fileno(), 0, access=mmap.ACCESS_READ) as mm_a, \
+                     mmap.mmap(fb.fileno(), 0, access=mmap.ACCESS_READ) as mm_b:
+                    for row, col in zip(rows, cols):
+                        size = int(sizes_a[row, col])
+                        offset_a, offset_b = int(offsets_a[row, col]), int(offsets_b[row, col])
+                        if mm_a[offset_a:offset_a + size] != mm_b[offset_b:offset_b + size]:
+                            differences[row, col] = True
+    return differences
+
+
+def diff_level(level_folder_a, level_folder_b, compare_tiles = False, max_workers = None) -> dict:
+    """Compare all bundles of a level in two caches. The bundle pairs are compared in a process pool.
+
+    Required:
+        level_folder_a, level_folder_b -- Paths to the level folders (a folder may not exist)
+
+    Optional:
+        compare_tiles -- If True, the data of tiles with the same size are also compared (see compare_bundles)
+        max_workers -- Number of processes (default: number of processors)
+
+    Return:
+        differences -- Dictionary {(row, col) of the upper left tile of the bundle: 2d numpy array (128 x 128)
+                       with True for every different tile}, only bundles with differences are listed
+    """
+    bundles_a = list_bundles(level_folder_a) if os.path.isdir(level_folder_a) else {}
+    bundles_b = list_bundles(level_folder_b) if os.path.isdir(level_folder_b) else {}
+    positions = sorted(set(bundles_a) | set(bundles_b))
+    differences = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(compare_bundles, [bundles_a.get(position) for position in positions],
+                               [bundles_b.get(position) for position in positions],
+                               [compare_tiles] * len(positions), chunksize=16)
+        for position, result in zip(positions, results):
+            if result.any():
+                differences[position] = result
+    return differences
+
+
+def get_difference_blocks(differences, max_gap = 0) -> list:
+    """Get rectangular blocks of tiles which cover all different tiles. The different tiles of every row
+    are combined into runs of neighbouring tiles, runs with the same columns in consecutive rows into blocks
+    and overlapping or neighbouring blocks (also of different bundles) are merged (see
+    tiling_scheme_functions.merge_tile_ranges), so that distant tiles of a bundle are not in the same block.
+
+    Required:
+        differences -- Dictionary with the different tiles per bundle (see diff_level)
+
+    Optional:
+        max_gap -- Blocks which are at most max_gap tiles apart are merged (0 = overlapping and neighbouring blocks)
+
+    Return:
+        blocks -- List with tuples (row_min, row_max, col_min, col_max)
+    """
+    tile_ranges = []
+    for (bundle_row, bundle_col), result in differences.items():
+        # open blocks {(col_min, col_max): index of the tile range} of the previous row
+        open_blocks = {}
+        for row in range(result.shape[0]):
+            cols = np.flatnonzero(result[row])
+            if not len(cols):
+                open_blocks = {}
+                continue
+            # runs of neighbouring columns
+            breaks = np.flatnonzero(np.diff(cols) > 1)
+            starts = np.concatenate(([cols[0]], cols[breaks + 1]))
+            ends = np.concatenate((cols[breaks], [cols[-1]]))
+            row_blocks = {}
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                if (start, end) in open_blocks:
+                    index = open_blocks[(start, end)]
+                    row_min, _, col_min, col_max = tile_ranges[index]
+                    tile_ranges[index] = (row_min, bundle_row + row, col_min, col_max)
+                else:
+                    index = len(tile_ranges)
+                    tile_ranges.append((bundle_row + row, bundle_row + row, bundle_col + start, bundle_col + end))
+                row_blocks[(start, end)] = index
+            open_blocks = row_blocks
+    return tsf.merge_tile_ranges(tile_ranges, max_gap)
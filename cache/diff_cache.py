@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: diff_cache
+#
+# Purpose: Script to compare two compact caches (version 2) on disk (e.g. the
+# cache of the test and the production server). The different tiles are reported
+# as extents which can be used as "update_extent" in publish_service_portal.py.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, sys, json, time
+# python Skript with my own bundle functions
+import bundle_functions as bfn
+# python Skript with my own tiling scheme functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'publish'))
+import tiling_scheme_functions as tsf
+# python Skript with my own logging functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'common'))
+import logging_functions as lgf
+
+
+def create_folder(folder_path) -> None:
+    """Creates a folder if it does not already exist.
+
+    Required:
+        folder_path -- The path to the folder (e.g. log folder).
+    """
+    if not os.path.isdir(folder_path):
+        try:
+            print(f'Creating a folder: {folder_path}')
+            os.makedirs(folder_path)
+        except:
+            raise ValueError(f'The folder "{folder_path}" does not exist and could not be created!')
+
+
+if __name__ == "__main__":
+    # path to a JSON input file
+    paramFile = sys.argv[1] if len(sys.argv) > 1 else None
+    #paramFile = r'C:\Temp\tutorial\diff_cache.json'
+
+    if paramFile:
+        with open(paramFile, encoding='utf-8') as f:
+            data = json.load(f)
+            cache_directory = data["cache_directory"]
+            compare_cache_directory = data["compare_cache_directory"]
+            if "levels" in data:
+                levels = [int(level) for level in str(data["levels"]).split(';')]
+            else:
+                levels = None #default -> all levels
+            compare_tiles = False #default
+            if "compare_tiles" in data:
+                if data["compare_tiles"] == "True":
+                    compare_tiles = True
+            if "max_workers" in data:
+                max_workers = int(data["max_workers"])
+            else:
+                max_workers = None #default -> number of processors
+            paramFileFolder = os.path.dirname(paramFile)
+            if "log_folder" in data:
+                log_folder = data["log_folder"]
+            else:
+                log_folder = os.path.join(paramFileFolder, "Logs") #default
+            if "report_folder" in data:
+                report_folder = data["report_folder"]
+            else:
+                report_folder = os.path.join(paramFileFolder, "Reports") #default
+    else:
+        print('no Parameter-JSON file specified')
+        sys.exit()
+
+    ## start logging
+    # create logfolder and reportfolder
+    create_folder(report_folder)
+    create_folder(log_folder)
+
+    filename = os.path.splitext(os.path.basename(paramFile))[0]
+    # path to the log file
+    log_file = os.path.join(log_folder, f'{filename}.log')
+    # initialise logging
+    logger = lgf.init_logging(log_file)
+    logger.info(f'******************* Compare caches *******************')
+    logger.info(f'Start logging: {time.ctime()}')
+    start_time = time.time()
+    logger.info(f'Cache: {cache_directory}')
+    logger.info(f'Compare with: {compare_cache_directory}')
+
+    ## levels and tiling schemes of the caches
+    conf_xml = bfn.find_conf_xml(cache_directory)
+    if not conf_xml:
+        logger.error(f'The tiling scheme (conf.xml) of the cache "{cache_directory}" was not found!')
+        raise ValueError(f'The tiling scheme (conf.xml) of the cache "{cache_directory}" was not found!')
+    tiling_scheme = tsf.read_tiling_scheme_xml(conf_xml)
+    compare_conf_xml = bfn.find_conf_xml(compare_cache_directory)
+    if compare_conf_xml:
+        compare_tiling_scheme = tsf.read_tiling_scheme_xml(compare_conf_xml)
+        if (compare_tiling_scheme["tile_origin"] != tiling_scheme["tile_origin"]
+                or [lod["scale"] for lod in compare_tiling_scheme["lods"]] != [lod["scale"] for lod in tiling_scheme["lods"]]):
+            logger.warning('The tiling schemes of the caches are different -> the levels may not be comparable')
+    else:
+        logger.warning(f'The tiling scheme (conf.xml) of the cache "{compare_cache_directory}" was not found')
+    all_levels = bfn.list_levels(cache_directory)
+    compare_levels = bfn.list_levels(compare_cache_directory)
+    if levels is None:
+        levels = sorted(set(all_levels) | set(compare_levels))
+    layers_folder = bfn.find_layers_folder(cache_directory)
+    compare_layers_folder = bfn.find_layers_folder(compare_cache_directory)
+
+    ## compare the levels
+    report = {"cache_directory": cache_directory, "compare_cache_directory": compare_cache_directory,
+              "compare_tiles": compare_tiles, "levels": [], "tasks": []}
+    for level in levels:
+        lod = tsf.get_lod(tiling_scheme, level=level)
+        if not lod:
+            logger.warning(f'Level {level} is not defined in the tiling scheme')
+            continue
+        level_start = time.time()
+        level_name = f'L{level:02d}'
+        differences = bfn.diff_level(os.path.join(layers_folder, level_name),
+                                     os.path.join(compare_layers_folder, level_name),
+                                     compare_tiles, max_workers)
+        blocks = bfn.get_difference_blocks(differences)
+        report_level = {"level": level, "scale": lod["scale"],
+                        "bundles": len(differences),
+                        "tiles": int(sum(int(result.sum()) for result in differences.values())),
+                        "update_extents": []}
+        for block in blocks:
+            update_extent = tsf.format_extent(tsf.get_block_extent(block, lod["scale"], tiling_scheme))
+            report_level["update_extents"].append(update_extent)
+            # tasks in the format of cache_management_functions.run_cache_jobs
+            report["tasks"].append({"name": f'{lod["scale"]:g}_R{block[0]}C{block[2]}', "scale": lod["scale"],
+                                    "update_extent": update_extent,
+                                    "tiles": (block[1] - block[0] + 1) * (block[3] - block[2] + 1)})
+        report["levels"].append(report_level)
+        if report_level["tiles"]:
+            logger.warning(f'Level {level} ({lod["scale"]:g}): {report_level["tiles"]} different tiles in '
+                           f'{report_level["bundles"]} bundles -> {len(blocks)} extents '
+                           f'({round(time.time() - level_start, 1)} sec)')
+        else:
+            logger.info(f'Level {level} ({lod["scale"]:g}): no differences ({round(time.time() - level_start, 1)} sec)')
+    report["tiles"] = sum(report_level["tiles"] for report_level in report["levels"])
+    logger.info(f'Total: {report["tiles"]} different tiles, {len(report["tasks"])} extents')
+    report_file = os.path.join(report_folder, f'{filename}.json')
+    with open(report_file, 'w', encoding='utf-8') as json_file:
+        json.dump(report, json_file, indent=2, ensure_ascii=False)
+    logger.info(f'Report: {report_file}')
+
+    ## end logging
+    end_time = time.time()
+    i_error, i_warning = lgf.get_counts(logger)
+    logger.info("Run Script in " + str(round(end_time - start_time)) + " sec.")
+    logger.info(f'# {i_error} errors found')
+    logger.info(f'# {i_warning} warnings found')
+    logger.info(f'End time: {time.ctime()}')
+    logger.info('****************************************************************\n')
+    lgf.close_logging(logger)
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: estimate_cache
+#
+# Purpose: Script to estimate the number of tiles, the number of bundles, the
+# disk space and the duration of a map service cache before it is created.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, sys, json, time
+import numpy as np
+# python Skript with my own tiling scheme functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'publish'))
+import tiling_scheme_functions as tsf
+# python Skript with my own logging functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'common'))
+import logging_functions as lgf
+
+## globale variables
+# average size of a tile in KB per cache tile format (can be overwritten with the parameter "average_tile_size_kb")
+AVERAGE_TILE_SIZE_KB = {"PNG": 15, "PNG8": 8, "PNG24": 20, "PNG32": 25, "JPEG": 12, "MIXED": 18, "LERC": 30}
+# size of the header and the tile index of a bundle (compact cache V2)
+BUNDLE_INDEX_BYTES = 64 + 128 * 128 * 8
+
+
+def create_folder(folder_path) -> None:
+    """Creates a folder if it does not already exist.
+
+    Required:
+        folder_path -- The path to the folder (e.g. log folder).
+    """
+    if not os.path.isdir(folder_path):
+        try:
+            print(f'Creating a folder: {folder_path}')
+            os.makedirs(folder_path)
+        except:
+            raise ValueError(f'The folder "{folder_path}" does not exist and could not be created!')
+
+def read_aoi_feature_class(area_of_interest) -> list:
+    """Read the rings of all polygons of an area of interest feature class (requires arcpy).
+
+    Required:
+        area_of_interest -- Path to the feature class with the area of interest
+
+    Return:
+        rings -- List with the rings of all polygons
+    """
+    import arcpy
+    rings = []
+    with arcpy.da.SearchCursor(area_of_interest, ["SHAPE@JSON"]) as cursor:
+        for row in cursor:
+            if row[0]:
+                rings.extend(json.loads(row[0]).get("rings", []))
+    return rings
+
+def get_seconds_per_tile(timings_file, service_url = None) -> dict:
+    """Get the average duration per tile from the timings recorded by earlier cache runs
+    (see publish_service_portal.py, file "cache_timings.json" in the folder "service_documents").
+
+    Required:
+        timings_file -- Path to the timings file (JSON)
+
+    Optional:
+        service_url -- Only use the timings of this service (if there are any)
+
+    Return:
+        seconds_per_tile -- Dictionary {scale: seconds per tile, ..., "all": seconds per tile of all scales}
+    """
+    with open(timings_file, encoding='utf-8') as f:
+        timings = json.load(f)
+    if service_url and [record for record in timings if record.get("service_url") == service_url]:
+        timings = [record for record in timings if record.get("service_url") == service_url]
+    timings = [record for record in timings if record.get("tiles")]
+    if not timings:
+        return {}
+    scales = np.asarray([float(record["scale"]) for record in timings])
+    tiles = np.asarray([float(record["tiles"]) for record in timings])
+    seconds = np.asarray([float(record["seconds"]) for record in timings])
+    seconds_per_tile = {"all": float(seconds.sum() / tiles.sum())}
+    for scale in np.unique(scales):
+        selection = scales == scale
+        seconds_per_tile[float(scale)] = float(seconds[selection].sum() / tiles[selection].sum())
+    return seconds_per_tile
+
+
+if __name__ == "__main__":
+    # path to a JSON input file
+    paramFile = sys.argv[1] if len(sys.argv) > 1 else None
+    #paramFile = r'C:\Temp\tutorial\estimate_cache.json'
+
+    if paramFile:
+        with open(paramFile, encoding='utf-8') as f:
+            data = json.load(f)
+            if "publish_parameter_file" in data:
+                # use the cache parameters of a parameter file of publish_service_portal.py
+                with open(data["publish_parameter_file"], encoding='utf-8') as f_publish:
+                    data_publish = json.load(f_publish)
+                enable_cache = data_publish.get("enable_cache", {})
+                manage_cache = data_publish.get("manage_cache", {})
+            else:
+                enable_cache = data.get("enable_cache", {})
+                manage_cache = data.get("manage_cache", {})
+            if "service_url" in data:
+                service_url = data["service_url"]
+            else:
+                service_url = None #default
+            if "aoi_polygon" in data:
+                aoi_polygon = data["aoi_polygon"]
+            else:
+                aoi_polygon = None #default
+            exact_coverage = False #default
+            if "exact_coverage" in data:
+                if data["exact_coverage"] == "True":
+                    exact_coverage = True
+            if "average_tile_size_kb" in data:
+                average_tile_size_kb = float(data["average_tile_size_kb"])
+            else:
+                average_tile_size_kb = None #default -> AVERAGE_TILE_SIZE_KB
+            if "timings_file" in data:
+                timings_file = data["timings_file"]
+            else:
+                timings_file = None #default
+            if "parallel_jobs" in data:
+                parallel_jobs = int(data["parallel_jobs"])
+            else:
+                parallel_jobs = 1 #default
+            paramFileFolder = os.path.dirname(paramFile)
+            if "log_folder" in data:
+                log_folder = data["log_folder"]
+            else:
+                log_folder = os.path.join(paramFileFolder, "Logs") #default
+            if "report_folder" in data:
+                report_folder = data["report_folder"]
+            else:
+                report_folder = os.path.join(paramFileFolder, "Reports") #default
+    else:
+        print('no Parameter-JSON file specified')
+        sys.exit()
+
+    ## start logging
+    # create logfolder and reportfolder
+    create_folder(report_folder)
+    create_folder(log_folder)
+
+    filename = os.path.splitext(os.path.basename(paramFile))[0]
+    # path to the log file
+    log_file = os.path.join(log_folder, f'{filename}.log')
+    # initialise logging
+    logger = lgf.init_logging(log_file)
+    logger.info(f'******************* Estimate cache *******************')
+    logger.info(f'Start logging: {time.ctime()}')
+    start_time = time.time()
+
+    ## tiling scheme and scales
+    tiling_scheme = tsf.get_tiling_scheme(enable_cache)
+    if not tiling_scheme:
+        logger.error('The tiling scheme is not known: "tile_origin" or "predefined_tiling_scheme" is missing in the section "enable_cache"!')
+        raise ValueError('The tiling scheme is not known: "tile_origin" or "predefined_tiling_scheme" is missing in the section "enable_cache"!')
+    if "scales" in manage_cache:
+        scales = [float(scale) for scale in str(manage_cache["scales"]).split(';')]
+    elif tiling_scheme["lods"]:
+        scales = [lod["scale"] for lod in tiling_scheme["lods"]]
+    else:
+        logger.error('No scales defined (parameter "scales" in "manage_cache" or "enable_cache")!')
+        raise ValueError('No scales defined (parameter "scales" in "manage_cache" or "enable_cache")!')
+    cache_tile_format = tiling_scheme["cache_tile_format"]
+    if not average_tile_size_kb:
+        average_tile_size_kb = AVERAGE_TILE_SIZE_KB.get(cache_tile_format.upper(), AVERAGE_TILE_SIZE_KB["PNG"])
+    logger.info(f'Tiling scheme: origin {tiling_scheme["tile_origin"]}, tiles {tiling_scheme["tile_cols"]} x '
+                f'{tiling_scheme["tile_rows"]} px, {tiling_scheme["dpi"]} dpi, format "{cache_tile_format}", '
+                f'storage "{tiling_scheme["storage_format"]}"')
+
+    ## extent (or polygon) of the cache
+    rings = None
+    if aoi_polygon:
+        rings = tsf.read_polygon(aoi_polygon)
+    elif exact_coverage and manage_cache.get("area_of_interest"):
+        rings = read_aoi_feature_class(manage_cache["area_of_interest"])
+    if manage_cache.get("update_extent"):
+        extent = tsf.parse_extent(manage_cache["update_extent"])
+    elif rings:
+        extent = tsf.get_rings_extent(rings)
+    else:
+        logger.error('No extent defined (parameter "update_extent" in "manage_cache" or "aoi_polygon")!')
+        raise ValueError('No extent defined (parameter "update_extent" in "manage_cache" or "aoi_polygon")!')
+    logger.info(f'Extent: {tsf.format_extent(extent)}')
+
+    ## number of tiles and bundles per scale
+    tile_ranges = tsf.get_tile_ranges(extent, scales, tiling_scheme)
+    tiles = tile_ranges["tiles"].copy()
+    bundles = tile_ranges["bundles"].copy()
+    if rings and (exact_coverage or aoi_polygon):
+        logger.info('Calculate the exact tile coverage of the area of interest')
+        for ii, scale in enumerate(scales):
+            row_min, col_min, coverage = tsf.get_covered_tiles(rings, scale, tiling_scheme)
+            tiles[ii] = int(coverage.sum())
+            bundles[ii] = tsf.count_bundles(row_min, col_min, coverage, tiling_scheme["packet_size"])
+
+    ## disk space and duration
+    storage_bytes = tiles * average_tile_size_kb * 1024
+    if tiling_scheme["storage_format"] == "COMPACT":
+        storage_bytes = storage_bytes + bundles * BUNDLE_INDEX_BYTES
+    seconds = None
+    if timings_file:
+        if os.path.isfile(timings_file):
+            seconds_per_tile = get_seconds_per_tile(timings_file, service_url)
+            if seconds_per_tile:
+                seconds = np.asarray([seconds_per_tile.get(float(scale), seconds_per_tile["all"]) for scale in scales]) * tiles
+            else:
+                logger.warning(f'The timings file "{timings_file}" contains no timings')
+        else:
+            logger.warning(f'The timings file "{timings_file}" does not exist')
+
+    ## report
+    report = {"extent": list(extent), "cache_tile_format": cache_tile_format,
+              "average_tile_size_kb": average_tile_size_kb, "scales": []}
+    for ii, scale in enumerate(scales):
+        report_scale = {"scale": scale,
+                        "rows": [int(tile_ranges["row_min"][ii]), int(tile_ranges["row_max"][ii])],
+                        "cols": [int(tile_ranges["col_min"][ii]), int(tile_ranges["col_max"][ii])],
+                        "tiles": int(tiles[ii]),
+                        "bundles": int(bundles[ii]),
+                        "storage_mb": round(float(storage_bytes[ii]) / 1024**2, 1)}
+        message = (f'Scale {scale:g}: rows {report_scale["rows"]}, cols {report_scale["cols"]}, {report_scale["tiles"]} tiles, '
+                   f'{report_scale["bundles"]} bundles, {report_scale["storage_mb"]} MB')
+        if seconds is not None:
+            report_scale["seconds"] = round(float(seconds[ii]))
+            message += f', ~{report_scale["seconds"]} sec'
+        report["scales"].append(report_scale)
+        logger.info(message)
+    report["tiles"] = int(tiles.sum())
+    report["bundles"] = int(bundles.sum())
+    report["storage_mb"] = round(float(storage_bytes.sum()) / 1024**2, 1)
+    logger.info(f'Total: {report["tiles"]} tiles, {report["bundles"]} bundles, {report["storage_mb"]} MB')
+    if seconds is not None:
+        report["seconds"] = round(float(seconds.sum()) / parallel_jobs)
+        logger.info(f'Estimated duration with {parallel_jobs} parallel jobs: {report["seconds"]} sec '
+                    f'({round(report["seconds"] / 3600, 1)} h)')
+    report_file = os.path.join(report_folder, f'{filename}.json')
+    with open(report_file, 'w', encoding='utf-8') as json_file:
+        json.dump(report, json_file, indent=2, ensure_ascii=False)
+    logger.info(f'Report: {report_file}')
+
+    ## end logging
+    end_time = time.time()
+    i_error, i_warning = lgf.get_counts(logger)
+    logger.info("Run Script in " + str(round(end_time - start_time)) + " sec.")
+    logger.info(f'# {i_error} errors found')
+    logger.info(f'# {i_warning} warnings found')
+    logger.info(f'End time: {time.ctime()}')
+    logger.info('****************************************************************\n')
+    lgf.close_logging(logger)
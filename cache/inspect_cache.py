@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: inspect_cache
+#
+# Purpose: Script to inspect the bundles of a compact cache (version 2) on disk:
+# coverage map, number of tiles, missing tiles, empty tiles and tile sizes per
+# level. Only the tile indexes of the bundles are read.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, sys, json, time
+# python Skript with my own bundle functions
+import bundle_functions as bfn
+# python Skript with my own tiling scheme functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'publish'))
+import tiling_scheme_functions as tsf
+# python Skript with my own logging functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'common'))
+import logging_functions as lgf
+
+
+def create_folder(folder_path) -> None:
+    """Creates a folder if it does not already exist.
+
+    Required:
+        folder_path -- The path to the folder (e.g. log folder).
+    """
+    if not os.path.isdir(folder_path):
+        try:
+            print(f'Creating a folder: {folder_path}')
+            os.makedirs(folder_path)
+        except:
+            raise ValueError(f'The folder "{folder_path}" does not exist and could not be created!')
+
+
+if __name__ == "__main__":
+    # path to a JSON input file
+    paramFile = sys.argv[1] if len(sys.argv) > 1 else None
+    #paramFile = r'C:\Temp\tutorial\inspect_cache.json'
+
+    if paramFile:
+        with open(paramFile, encoding='utf-8') as f:
+            data = json.load(f)
+            cache_directory = data["cache_directory"]
+            if "levels" in data:
+                levels = [int(level) for level in str(data["levels"]).split(';')]
+            else:
+                levels = None #default -> all levels
+            if "update_extent" in data:
+                update_extent = data["update_extent"]
+            else:
+                update_extent = None #default
+            if "aoi_polygon" in data:
+                aoi_polygon = data["aoi_polygon"]
+            else:
+                aoi_polygon = None #default
+            if "empty_tile_max_bytes" in data:
+                empty_tile_max_bytes = int(data["empty_tile_max_bytes"])
+            else:
+                empty_tile_max_bytes = 0 #default
+            coverage_maps = True #default
+            if "coverage_maps" in data:
+                if data["coverage_maps"] == "False":
+                    coverage_maps = False
+            if "max_workers" in data:
+                max_workers = int(data["max_workers"])
+            else:
+                max_workers = 8 #default
+            paramFileFolder = os.path.dirname(paramFile)
+            if "log_folder" in data:
+                log_folder = data["log_folder"]
+            else:
+                log_folder = os.path.join(paramFileFolder, "Logs") #default
+            if "report_folder" in data:
+                report_folder = data["report_folder"]
+            else:
+                report_folder = os.path.join(paramFileFolder, "Reports") #default
+    else:
+        print('no Parameter-JSON file specified')
+        sys.exit()
+
+    ## start logging
+    # create logfolder and reportfolder
+    create_folder(report_folder)
+    create_folder(log_folder)
+
+    filename = os.path.splitext(os.path.basename(paramFile))[0]
+    # path to the log file
+    log_file = os.path.join(log_folder, f'{filename}.log')
+    # initialise logging
+    logger = lgf.init_logging(log_file)
+    logger.info(f'******************* Inspect cache *******************')
+    logger.info(f'Start logging: {time.ctime()}')
+    start_time = time.time()
+
+    ## levels and tiling scheme of the cache
+    all_levels = bfn.list_levels(cache_directory)
+    if levels is None:
+        levels = list(all_levels)
+    tiling_scheme = None
+    conf_xml = bfn.find_conf_xml(cache_directory)
+    if conf_xml:
+        tiling_scheme = tsf.read_tiling_scheme_xml(conf_xml)
+    elif update_extent or aoi_polygon:
+        logger.error(f'The tiling scheme (conf.xml) of the cache "{cache_directory}" was not found!')
+        raise ValueError(f'The tiling scheme (conf.xml) of the cache "{cache_directory}" was not found!')
+    rings = None
+    if aoi_polygon:
+        rings = tsf.read_polygon(aoi_polygon)
+        if not update_extent:
+            update_extent = tsf.format_extent(tsf.get_rings_extent(rings))
+    if update_extent:
+        extent = tsf.parse_extent(update_extent)
+        logger.info(f'Expected extent: {tsf.format_extent(extent)}')
+    if coverage_maps:
+        coverage_folder = os.path.join(report_folder, f'{filename}_coverage')
+        create_folder(coverage_folder)
+
+    ## inspect the levels
+    report = {"cache_directory": cache_directory, "empty_tile_max_bytes": empty_tile_max_bytes, "levels": []}
+    total_bytes = 0
+    for level in levels:
+        if level not in all_levels:
+            logger.warning(f'Level {level} does not exist in the cache')
+            continue
+        lod = tsf.get_lod(tiling_scheme, level=level) if tiling_scheme else None
+        tile_range = None
+        expected = None
+        if update_extent:
+            if not lod:
+                logger.warning(f'Level {level} is not defined in the tiling scheme -> the expected extent is ignored')
+            elif rings:
+                row_min, col_min, expected = tsf.get_covered_tiles(rings, lod["scale"], tiling_scheme)
+                tile_range = (row_min, row_min + expected.shape[0] - 1, col_min, col_min + expected.shape[1] - 1)
+            else:
+                tile_range = tsf.get_tile_range(extent, lod["scale"], tiling_scheme)
+        level_start = time.time()
+        # only the tiles within the expected extent (or the area of interest) are counted
+        result = bfn.inspect_level(all_levels[level], empty_tile_max_bytes, tile_range, mask=expected,
+                                   max_workers=max_workers)
+        coverage = result["coverage"]
+        report_level = {"level": level, "scale": lod["scale"] if lod else None,
+                        "bundles": result["bundles"],
+                        "rows": [result["row_min"], result["row_min"] + coverage.shape[0] - 1],
+                        "cols": [result["col_min"], result["col_min"] + coverage.shape[1] - 1],
+                        "tiles": result["tiles"],
+                        "empty_tiles": result["empty_tiles"],
+                        "missing_tiles": result["missing_tiles"],
+                        "size_mb": round(result["bytes"] / 1024**2, 1),
+                        "histogram": result["histogram"]}
+        total_bytes += result["bytes"]
+        if coverage_maps and coverage.size:
+            coverage_file = os.path.join(coverage_folder, f'L{level:02d}.pgm')
+            bfn.write_coverage_map(coverage, coverage_file)
+            report_level["coverage_map"] = coverage_file
+        report["levels"].append(report_level)
+        logger.info(f'Level {level} ({report_level["scale"]}): {report_level["bundles"]} bundles, '
+                    f'{report_level["tiles"]} tiles, {report_level["empty_tiles"]} empty tiles, '
+                    f'{report_level["missing_tiles"]} missing tiles, {report_level["size_mb"]} MB '
+                    f'({round(time.time() - level_start, 1)} sec)')
+        if report_level["missing_tiles"] and update_extent:
+            logger.warning(f'Level {level}: {report_level["missing_tiles"]} tiles of the expected extent are missing')
+    report["size_mb"] = round(total_bytes / 1024**2, 1)
+    report_file = os.path.join(report_folder, f'{filename}.json')
+    with open(report_file, 'w', encoding='utf-8') as json_file:
+        json.dump(report, json_file, indent=2, ensure_ascii=False)
+    logger.info(f'Report: {report_file}')
+
+    ## end logging
+    end_time = time.time()
+    i_error, i_warning = lgf.get_counts(logger)
+    logger.info("Run Script in " + str(round(end_time - start_time)) + " sec.")
+    logger.info(f'# {i_error} errors found')
+    logger.info(f'# {i_warning} warnings found')
+    logger.info(f'End time: {time.ctime()}')
+    logger.info('****************************************************************\n')
+    lgf.close_logging(logger)
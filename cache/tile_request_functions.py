@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: tile_request_functions
+#
+# Purpose: Custom functions to generate tile requests for a cached map service
+# and to send them concurrently over persistent HTTP connections.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import time, json, ssl, threading, http.client
+from urllib.parse import urlsplit, urlencode
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+## globale variables
+# access patterns for the tile requests
+PATTERNS = ["random", "sequential", "pan"]
+# directions of the viewport (pattern "pan"): (rows, columns)
+DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+# response headers of proxies and CDNs which tell if a tile was served from their cache
+CACHE_STATUS_HEADERS = ["X-Cache", "X-Cache-Status", "CF-Cache-Status"]
+
+
+def generate_tile_requests(level, tile_range, pattern = "random", count = None, viewport = (4, 3), seed = None) -> list:
+    """Generate the tile requests of a level within a range of tiles.
+
+    Required:
+        level -- Level id
+        tile_range -- Tuple (row_min, row_max, col_min, col_max)
+
+    Optional:
+        pattern -- Access pattern: "random" (default, random tiles), "sequential" (row by row) or
+                   "pan" (tiles of a viewport which is moved through the range like a user panning the map)
+        count -- Maximum number of requests (default: number of tiles in the range)
+        viewport -- Tuple (columns, rows) with the size of the viewport in tiles (pattern "pan")
+        seed -- Seed of the random generator (same seed -> same requests)
+
+    Return:
+        tile_requests -- List with tuples (level, row, col)
+    """
+    row_min, row_max, col_min, col_max = tile_range
+    rows, cols = row_max - row_min + 1, col_max - col_min + 1
+    count = rows * cols if count is None else min(int(count), rows * cols)
+    rng = np.random.default_rng(seed)
+    if pattern == "sequential":
+        positions = np.arange(count)
+    elif pattern == "random":
+        positions = rng.choice(rows * cols, size=count, replace=False)
+    elif pattern == "pan":
+        viewport_cols, viewport_rows = min(viewport[0], cols), min(viewport[1], rows)
+        row, col = int(rng.integers(0, rows - viewport_rows + 1)), int(rng.integers(0, cols - viewport_cols + 1))
+        direction = (0, 1)
+        seen = set()
+        positions = []
+        steps = 0
+        while len(positions) < count and steps < count * 100:
+            steps += 1
+            # only the tiles which are not yet in the viewport (browser cache) are requested
+            for r in range(row, row + viewport_rows):
+                for c in range(col, col + viewport_cols):
+                    if (r, c) not in seen and len(positions) < count:
+                        seen.add((r, c))
+                        positions.append(r * cols + c)
+            # keep panning in the same direction most of the time, change the direction at the border
+            if rng.random() < 0.3:
+                direction = DIRECTIONS[int(rng.integers(0, 4))]
+            next_row = min(max(row + direction[0], 0), rows - viewport_rows)
+            next_col = min(max(col + direction[1], 0), cols - viewport_cols)
+            if (next_row, next_col) == (row, col):
+                direction = DIRECTIONS[int(rng.integers(0, 4))]
+            row, col = next_row, next_col
+        positions = np.asarray(positions, dtype=np.int64)
+    else:
+        raise ValueError(f'Unknown access pattern "{pattern}" (valid: {PATTERNS})')
+    return [(level, row_min + int(position) // cols, col_min + int(position) % cols) for position in positions]
+
+
+class TileClient:
+    """HTTP client for the tiles of a cached map service. Every worker thread keeps its own
+    persistent connection (keep-alive), so the number of connections equals the concurrency.
+
+    Required:
+        service_url -- URL of the map service (e.g. "https://xxx/server/rest/services/Test/citymaps/MapServer")
+
+    Optional:
+        concurrency -- Number of requests at the same time
+        timeout -- Timeout of a request in seconds
+        token -- Token which is added to every request
+        verify_cert -- If False, the certificate of the server is not verified
+    """
+    def __init__(self, service_url, concurrency = 8, timeout = 30, token = None, verify_cert = True):
+        url = urlsplit(service_url.rstrip('/'))
+        self.scheme = url.scheme
+        self.netloc = url.netloc
+        self.path = url.path
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.token = token
+        self.context = None
+        if self.scheme == "https":
+            self.context = ssl.create_default_context() if verify_cert else ssl._create_unverified_context()
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if self.scheme == "https":
+                connection = http.client.HTTPSConnection(self.netloc, timeout=self.timeout, context=self.context)
+            else:
+                connection = http.client.HTTPConnection(self.netloc, timeout=self.timeout)
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _get(self, path, params = None) -> tuple:
+        params = dict(params or {})
+        if self.token:
+            params["token"] = self.token
+        if params:
+            path = f'{path}?{urlencode(params)}'
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request("GET", path, headers={"Connection": "keep-alive"})
+                response = connection.getresponse()
+                return response.status, response.read(), response.headers
+            except (http.client.HTTPException, ConnectionError):
+                # the server closed the persistent connection -> reconnect once
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+
+    def get_json(self, params = None) -> dict:
+        """Get the JSON description of the service (f=json).
+
+        Return:
+            service -- Dictionary with the description of the service
+        """
+        status, body, headers = self._get(self.path, dict(params or {}, f="json"))
+        if status != 200:
+            raise ValueError(f'The service "{self.scheme}://{self.netloc}{self.path}" returned the status {status}')
+        return json.loads(body)
+
+    def fetch_tile(self, tile_request) -> tuple:
+        """Request a single tile.
+
+        Required:
+            tile_request -- Tuple (level, row, col)
+
+        Return:
+            result -- Tuple (level, status, latency in seconds, bytes, cache miss (True/False/None))
+        """
+        level, row, col = tile_request
+        start = time.perf_counter()
+        try:
+            status, body, headers = self._get(f'{self.path}/tile/{level}/{row}/{col}')
+        except Exception:
+            return (level, 0, time.perf_counter() - start, 0, None)
+        latency = time.perf_counter() - start
+        cache_miss = None
+        for header in CACHE_STATUS_HEADERS:
+            if headers.get(header):
+                cache_miss = "MISS" in headers[header].upper()
+                break
+        return (level, status, latency, len(body), cache_miss)
+
+    def run(self, tile_requests) -> tuple:
+        """Send tile requests concurrently.
+
+        Required:
+            tile_requests -- List with tuples (level, row, col) (see generate_tile_requests)
+
+        Return:
+            results -- List with tuples (level, status, latency, bytes, cache miss) (see fetch_tile)
+            duration -- Duration of all requests in seconds
+        """
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            results = list(executor.map(self.fetch_tile, tile_requests))
+        return results, time.perf_counter() - start
+
+    def close(self) -> None:
+        """Close all persistent connections."""
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+
+
+def summarize_results(results, duration) -> dict:
+    """Summarize the results of tile requests: latency percentiles, throughput and cache misses.
+    Tiles which do not exist (status 404) and tiles which a proxy or CDN reports as "MISS" are
+    counted as cache misses.
+
+    Required:
+        results -- List with tuples (level, status, latency, bytes, cache miss) (see TileClient.fetch_tile)
+        duration -- Duration of the requests in seconds
+
+    Return:
+        summary -- Dictionary with "requests", "errors", "missing", "cache_misses", "miss_ratio", "p50_ms",
+                   "p95_ms", "p99_ms", "mean_ms", "requests_per_sec", "mb_per_sec" (None without results)
+    """
+    if not results:
+        return {"requests": 0, "errors": 0, "missing": 0, "cache_misses": 0, "miss_ratio": None,
+                "p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None,
+                "requests_per_sec": None, "mb_per_sec": None}
+    status = np.asarray([result[1] for result in results])
+    latency = np.asarray([result[2] for result in results]) * 1000
+    size = np.asarray([result[3] for result in results])
+    header_misses = sum(1 for result in results if result[4] and result[1] != 404)
+    missing = int((status == 404).sum())
+    p50, p95, p99 = np.percentile(latency, [50, 95, 99])
+    return {"requests": len(results),
+            "errors": int(((status != 200) & (status != 404)).sum()),
+            "missing": missing,
+            "cache_misses": missing + header_misses,
+            "miss_ratio": round((missing + header_misses) / len(results), 4),
+            "p50_ms": round(float(p50), 1),
+            "p95_ms": round(float(p95), 1),
+            "p99_ms": round(float(p99), 1),
+            "mean_ms": round(float(latency.mean()), 1),
+            "requests_per_sec": round(len(results) / duration, 1) if duration else None,
+            "mb_per_sec": round(float(size.sum()) / 1024**2 / duration, 2) if duration else None}
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: tile_server_functions
+#
+# Purpose: Local stand-in for a cached map service. The tiles are served directly
+# from the bundles of a compact cache (version 2), e.g. to benchmark the tile
+# clients with repeatable numbers.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, re, json, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+import bundle_functions as bfn
+
+## globale variables
+# path of a tile request: .../tile/{level}/{row}/{col}
+TILE_PATH = re.compile(r'/tile/(\d+)/(\d+)/(\d+)$')
+
+
+class TileRequestHandler(BaseHTTPRequestHandler):
+    """Handles the requests of the stand-in tile server: ".../tile/{level}/{row}/{col}" returns
+    the tile (or status 404), every other path returns the description of the service (f=json)."""
+    # HTTP/1.1 -> persistent connections (keep-alive)
+    protocol_version = "HTTP/1.1"
+    # send small responses immediately (no delay by the Nagle algorithm)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        path = urlsplit(self.path).path.rstrip('/')
+        match = TILE_PATH.search(path)
+        if match:
+            data = self.server.get_tile(*[int(value) for value in match.groups()])
+            if data is None:
+                self.send_data(404, b'{"error": {"code": 404, "message": "Tile not found"}}', "application/json")
+            elif data[:4] == b'\x89PNG':
+                self.send_data(200, data, "image/png")
+            elif data[:2] == b'\xff\xd8':
+                self.send_data(200, data, "image/jpeg")
+            else:
+                self.send_data(200, data, "application/octet-stream")
+        else:
+            self.send_data(200, json.dumps(self.server.service_info).encode('utf-8'), "application/json")
+
+    def send_data(self, status, data, content_type) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args) -> None:
+        # no logging of every single request
+        pass
+
+
+class TileServer(ThreadingHTTPServer):
+    """Local HTTP server which serves the tiles of a compact cache like the "tile" resource of
+    a cached map service. The tile indexes of the bundles are kept in memory.
+
+    Required:
+        cache_directory -- Path to the cache of a service (see bundle_functions.find_layers_folder)
+
+    Optional:
+        service_info -- Dictionary which is returned as description of the service (f=json),
+                        e.g. {"tileInfo": ..., "fullExtent": ...}
+        host -- Host name or IP address of the server
+        port -- Port of the server (0 = free port)
+    """
+    daemon_threads = True
+
+    def __init__(self, cache_directory, service_info = None, host = "127.0.0.1", port = 0):
+        super().__init__((host, port), TileRequestHandler)
+        self.levels = bfn.list_levels(cache_directory)
+        self.service_info = service_info or {}
+        self._indexes = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """URL of the stand-in map service."""
+        return f'http://{self.server_address[0]}:{self.server_address[1]}/rest/services/standin/MapServer'
+
+    def get_index(self, bundle_file):
+        with self._lock:
+            if bundle_file not in self._indexes:
+                self._indexes[bundle_file] = bfn.read_bundle_index(bundle_file) if os.path.isfile(bundle_file) else None
+            return self._indexes[bundle_file]
+
+    def get_tile(self, level, row, col) -> bytes:
+        """Read a tile from the bundles.
+
+        Required:
+            level, row, col -- Level id, row and column of the tile
+
+        Return:
+            data -- Tile data or None (if the tile does not exist)
+        """
+        if level not in self.levels:
+            return None
+        bundle_file = os.path.join(self.levels[level], bfn.get_bundle_name(row, col))
+        index = self.get_index(bundle_file)
+        if index is None:
+            return None
+        offsets, sizes = index
+        size = int(sizes[row % bfn.BUNDLE_DIMENSION, col % bfn.BUNDLE_DIMENSION])
+        if size == 0:
+            return None
+        with open(bundle_file, 'rb') as f:
+            f.seek(int(offsets[row % bfn.BUNDLE_DIMENSION, col % bfn.BUNDLE_DIMENSION]))
+            return f.read(size)
+
+    def start(self) -> None:
+        """Start the server in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the server."""
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,10 @@
+@echo off
+chcp 65001
+
+rem Benchmark the tiles of a service
+"C:\Program Files\ArcGIS\Pro\bin\Python\envs\arcgispro-py3\python.exe" "..\benchmark_tiles.py" "benchmark_tiles.json"
+
+rem Benchmark the tiles of a cache on disk (local stand-in server)
+"C:\Program Files\ArcGIS\Pro\bin\Python\envs\arcgispro-py3\python.exe" "..\benchmark_tiles.py" "benchmark_tiles_local.json"
+
+pause
@@ -0,0 +1,7 @@
+@echo off
+chcp 65001
+
+rem Compare caches
+"C:\Program Files\ArcGIS\Pro\bin\Python\envs\arcgispro-py3\python.exe" "..\diff_cache.py" "diff_cache.json"
+
+pause
@@ -0,0 +1,7 @@
+@echo off
+chcp 65001
+
+rem Estimate cache
+"C:\Program Files\ArcGIS\Pro\bin\Python\envs\arcgispro-py3\python.exe" "..\estimate_cache.py" "estimate_cache.json"
+
+pause
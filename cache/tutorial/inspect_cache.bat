@@ -0,0 +1,7 @@
+@echo off
+chcp 65001
+
+rem Inspect cache
+"C:\Program Files\ArcGIS\Pro\bin\Python\envs\arcgispro-py3\python.exe" "..\inspect_cache.py" "inspect_cache.json"
+
+pause
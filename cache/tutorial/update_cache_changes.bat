@@ -0,0 +1,7 @@
+@echo off
+chcp 65001
+
+rem Update the cache of the changed features
+"C:\Program Files\ArcGIS\Pro\bin\Python\envs\arcgispro-py3\python.exe" "..\update_cache_changes.py" "update_cache_changes.json"
+
+pause
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: update_cache_changes
+#
+# Purpose: Script to update the cache of a map service only where the data has
+# changed: the features edited since the last run are read from the editor
+# tracking fields (or a change table) of the source data, their extents are
+# snapped to the tiles of every scale and only these tiles are recreated.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, sys, json, time, datetime
+import arcpy
+from getpass import getpass
+# python Skript with my own cache management and tiling scheme functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'publish'))
+import cache_management_functions as cmf
+import tiling_scheme_functions as tsf
+import project_functions as prf
+# python Skript with my own logging functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'common'))
+import logging_functions as lgf
+
+## globale variables
+# format of the points in time in the state file and in the parameter "since"
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def create_folder(folder_path) -> None:
+    """Creates a folder if it does not already exist.
+
+    Required:
+        folder_path -- The path to the folder (e.g. log folder).
+    """
+    if not os.path.isdir(folder_path):
+        try:
+            print(f'Creating a folder: {folder_path}')
+            os.makedirs(folder_path)
+        except:
+            raise ValueError(f'The folder "{folder_path}" does not exist and could not be created!')
+
+
+def read_last_update(state_file) -> tuple:
+    """Read the point in time of the last successful cache update.
+
+    Required:
+        state_file -- Path to the state file (JSON)
+
+    Return:
+        last_update -- Point in time in local time (datetime) or None (no state file)
+        last_update_utc -- Point in time in UTC (datetime) or None (no state file)
+    """
+    if not os.path.isfile(state_file):
+        return None, None
+    with open(state_file, encoding='utf-8') as f:
+        state = json.load(f)
+    return (datetime.datetime.strptime(state["last_update"], TIME_FORMAT),
+            datetime.datetime.strptime(state["last_update_utc"], TIME_FORMAT))
+
+
+def write_last_update(state_file, last_update, last_update_utc) -> None:
+    """Write the point in time of the last successful cache update.
+
+    Required:
+        state_file -- Path to the state file (JSON)
+        last_update -- Point in time in local time (datetime)
+        last_update_utc -- Point in time in UTC (datetime)
+    """
+    state = {"last_update": last_update.strftime(TIME_FORMAT), "last_update_utc": last_update_utc.strftime(TIME_FORMAT)}
+    temp_file = f'{state_file}.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(temp_file, state_file)
+
+
+if __name__ == "__main__":
+    # path to a JSON input file
+    paramFile = sys.argv[1] if len(sys.argv) > 1 else None
+    #paramFile = r'C:\Temp\tutorial\update_cache_changes.json'
+
+    if paramFile:
+        with open(paramFile, encoding='utf-8') as f:
+            data = json.load(f)
+            # the service, the source data and the cache parameters of a parameter file of publish_service_portal.py
+            with open(data["publish_parameter_file"], encoding='utf-8') as f_publish:
+                data_publish = json.load(f_publish)
+            if 'environment' in data_publish:
+                # if depreciated parameter "environment" is used (old json)
+                stage = data_publish["environment"]
+            else:
+                stage = data_publish.get("stage", "")
+            portal_url = data_publish["portal_url"]
+            federated_server_url = data_publish["federated_server_url"]
+            sign_in_user = data_publish.get("sign_in_user")
+            cert_file = data_publish.get("cert_file")
+            key_file = data_publish.get("key_file")
+            service_name = data_publish["service_name"]
+            server_folder = data_publish["server_folder"]
+            service_documents = data_publish["service_documents"]
+            enable_cache = data_publish.get("enable_cache", {})
+            manage_cache = dict(data_publish.get("manage_cache", {}))
+            if "service_url" in data:
+                service_url = data["service_url"]
+            else:
+                service_path = f'{server_folder}/{service_name}' if server_folder else service_name
+                service_url = f'{federated_server_url}/rest/services/{service_path}/MapServer' #default
+            if "change_sources" in data:
+                change_sources = data["change_sources"]
+                for change_source in change_sources:
+                    change_source["time_in_utc"] = change_source.get("time_in_utc") == "True"
+            else:
+                change_sources = None #default -> layers of the published map with editor tracking
+            if "since" in data:
+                since = datetime.datetime.strptime(data["since"], TIME_FORMAT)
+            else:
+                since = None #default -> point in time of the last successful run
+            if "buffer" in data:
+                buffer = float(data["buffer"])
+            else:
+                buffer = 0 #default
+            if "max_gap" in data:
+                max_gap = int(data["max_gap"])
+            else:
+                max_gap = 0 #default -> only overlapping and neighbouring tiles are merged
+            if "max_parallel_jobs" in data:
+                max_parallel_jobs = int(data["max_parallel_jobs"])
+            else:
+                max_parallel_jobs = int(manage_cache.get("max_parallel_jobs", 1)) #default
+            if "max_retries" in data:
+                max_retries = int(data["max_retries"])
+            else:
+                max_retries = int(manage_cache.get("max_retries", 0)) #default
+            dry_run = False #default
+            if "dry_run" in data:
+                if data["dry_run"] == "True":
+                    dry_run = True
+            filename = f'{service_name}_{stage.lower()}' if stage else service_name
+            if "state_file" in data:
+                state_file = data["state_file"]
+            else:
+                state_file = os.path.join(service_documents, f'{filename}_cache_changes.json') #default
+            paramFileFolder = os.path.dirname(paramFile)
+            if "log_folder" in data:
+                log_folder = data["log_folder"]
+            else:
+                log_folder = os.path.join(paramFileFolder, "Logs") #default
+            if "report_folder" in data:
+                report_folder = data["report_folder"]
+            else:
+                report_folder = os.path.join(paramFileFolder, "Reports") #default
+    else:
+        print('no Parameter-JSON file specified')
+        sys.exit()
+
+    ## start logging
+    # create logfolder and reportfolder
+    create_folder(report_folder)
+    create_folder(log_folder)
+
+    filename = os.path.splitext(os.path.basename(paramFile))[0]
+    # path to the log file
+    log_file = os.path.join(log_folder, f'{filename}.log')
+    # initialise logging
+    logger = lgf.init_logging(log_file)
+    logger.info(f'******************* Update cache changes *******************')
+    logger.info(f'Start logging: {time.ctime()}')
+    start_time = time.time()
+
+    ## tiling scheme and scales
+    if not enable_cache:
+        logger.error('The section "enable_cache" (tiling scheme) is missing in the publish parameter file!')
+        raise ValueError('The section "enable_cache" (tiling scheme) is missing in the publish parameter file!')
+    tiling_scheme = tsf.get_tiling_scheme(enable_cache)
+    if not tiling_scheme:
+        logger.error('The tiling scheme is not known: "tile_origin" or "predefined_tiling_scheme" is missing in the section "enable_cache"!')
+        raise ValueError('The tiling scheme is not known: "tile_origin" or "predefined_tiling_scheme" is missing in the section "enable_cache"!')
+    if "scales" in manage_cache:
+        scales = manage_cache.pop("scales").split(";")
+    elif "update_scales" in manage_cache:
+        # if depreciated parameter update_scales is used (old json)
+        scales = manage_cache.pop("update_scales").split(";")
+    else:
+        scales = [f'{lod["scale"]:g}' for lod in tiling_scheme["lods"]]
+    # parameters for arcpy.server.ManageMapServerCacheTiles (the extents are defined by the tasks)
+    for key in ["max_parallel_jobs", "use_checkpoint", "partition_tiles", "max_retries", "update_extent", "area_of_interest"]:
+        manage_cache.pop(key, None)
+    manage_cache.setdefault("update_mode", "RECREATE_ALL_TILES") #default
+
+    ## changed features since the last run
+    # the point in time is taken before reading the changes -> edits during the run are updated by the next run
+    now, now_utc = datetime.datetime.now(), datetime.datetime.utcnow()
+    if since:
+        since_utc = since + (now_utc - now)
+    else:
+        since, since_utc = read_last_update(state_file)
+    project_cache = prf.ProjectCache(logger)
+    spatial_reference = arcpy.SpatialReference(tiling_scheme["wkid"]) if tiling_scheme["wkid"] else None
+    if not change_sources:
+        m = project_cache.get_map(data_publish["aprx"], data_publish["map"])
+        if not m:
+            logger.error(f'The map "{data_publish["map"]}" was not found in the aprx!')
+            raise ValueError(f'The map "{data_publish["map"]}" was not found in the aprx!')
+        if data_publish.get("layer"):
+            layer = project_cache.get_layer(data_publish["aprx"], data_publish["map"], data_publish["layer"])
+            layers = [layer] if layer else []
+            if layer and layer.isGroupLayer:
+                layers += layer.listLayers()
+        else:
+            layers = m.listLayers()
+        change_sources = cmf.get_change_sources(layers)
+        if not spatial_reference:
+            spatial_reference = m.spatialReference
+    if not change_sources:
+        logger.error('No source data with editor tracking found (use the parameter "change_sources" for a change table)!')
+        raise ValueError('No source data with editor tracking found (use the parameter "change_sources" for a change table)!')
+    for change_source in change_sources:
+        logger.info(f'Changes of "{change_source["data"]}" (field "{change_source["date_field"]}")')
+    if all(change_source.get("editor_tracking") for change_source in change_sources):
+        logger.warning('Only editor tracking is used to find the changes: deleted features and the old position of '
+                       'moved features are not updated (use the parameter "change_sources" for a change table with '
+                       'the deletes and the old geometries)!')
+
+    report = {"service_url": service_url, "since": since.strftime(TIME_FORMAT) if since else None,
+              "changed_features": 0, "tasks": [], "failed_tasks": []}
+    if not since:
+        logger.warning(f'No last cache update found in "{state_file}" -> the point in time is saved for the next run. '
+                       f'Update the whole cache with publish_service_portal.py!')
+    else:
+        logger.info(f'Find the features which have changed since {since.strftime(TIME_FORMAT)}')
+        extents = cmf.get_changed_extents(change_sources, since, since_utc, spatial_reference, buffer, logger)
+        report["changed_features"] = len(extents)
+
+        ## tile aligned extents of the changes
+        report["tasks"] = cmf.get_change_tasks(extents, scales, tiling_scheme, max_gap)
+        for scale in scales:
+            scale_tasks = [task for task in report["tasks"] if task["scale"] == scale]
+            if scale_tasks:
+                logger.info(f'Scale {scale}: {len(scale_tasks)} extents with {sum(task["tiles"] for task in scale_tasks)} tiles')
+        report["tiles"] = sum(task["tiles"] for task in report["tasks"])
+        logger.info(f'Total: {report["changed_features"]} changed features -> {len(report["tasks"])} extents with '
+                    f'{report["tiles"]} tiles')
+
+        ## update the cache
+        if dry_run:
+            logger.info('Dry run: the cache is not updated')
+        elif report["tasks"]:
+            # sign in to the portal (the cache jobs run on the federated server), the worker processes of the
+            # cache jobs sign in with the same credentials
+            pw = None
+            if sign_in_user:
+                pw = getpass(f'Enter password for user "{sign_in_user}": ')
+                arcpy.SignInToPortal(portal_url, sign_in_user, pw)
+            elif cert_file and key_file:
+                arcpy.SignInToPortal(portal_url, cert_file = cert_file, key_file = key_file)
+            elif cert_file:
+                arcpy.SignInToPortal(portal_url, cert_file = cert_file, password="cert.password")
+            credentials = None
+            if sign_in_user or cert_file:
+                credentials = {"portal_url": portal_url, "sign_in_user": sign_in_user, "password": pw,
+                               "cert_file": cert_file, "key_file": key_file}
+            logger.info(f'Update the cache of the service "{service_url}" with up to {max_parallel_jobs} jobs at the same time')
+            # the durations per tile are recorded to estimate future cache runs (see estimate_cache.py)
+            timings_file = os.path.join(service_documents, 'cache_timings.json')
+            report["failed_tasks"] = cmf.run_cache_jobs(service_url, manage_cache, report["tasks"],
+                                                        max_parallel_jobs=max_parallel_jobs, max_retries=max_retries,
+                                                        timings_file=timings_file, credentials=credentials, logger=logger)
+            if report["failed_tasks"]:
+                logger.error(f'Updating the cache failed for: {";".join(report["failed_tasks"])} -> the next run updates '
+                             f'the changes since {since.strftime(TIME_FORMAT)} again')
+    project_cache.clear()
+    if not dry_run and not report["failed_tasks"]:
+        write_last_update(state_file, now, now_utc)
+        logger.info(f'Saved the point in time of the cache update in "{state_file}"')
+    report_file = os.path.join(report_folder, f'{filename}.json')
+    with open(report_file, 'w', encoding='utf-8') as json_file:
+        json.dump(report, json_file, indent=2, ensure_ascii=False)
+    logger.info(f'Report: {report_file}')
+
+    ## end logging
+    end_time = time.time()
+    i_error, i_warning = lgf.get_counts(logger)
+    logger.info("Run Script in " + str(round(end_time - start_time)) + " sec.")
+    logger.info(f'# {i_error} errors found')
+    logger.info(f'# {i_warning} warnings found')
+    logger.info(f'End time: {time.ctime()}')
+    logger.info('****************************************************************\n')
+    lgf.close_logging(logger)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: lazy_import_functions
+#
+# Purpose: Functions to import heavy modules (e.g. arcpy, arcgis) only when they
+# are used, so that the scripts start fast (e.g. parameter checks, --help) and
+# the scripts which do not need arcpy run on machines without ArcGIS Pro.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import importlib, importlib.util, threading
+
+
+class LazyModule:
+    """Module which is imported on the first access to one of its attributes (e.g. arcpy.ListFiles).
+
+    Required:
+        name -- The name of the module (e.g. "arcpy" or "arcgis.gis").
+
+    Optional:
+        hint -- Hint which is added to the error message if the module can not be imported
+                (e.g. "ArcGIS Pro is required for publishing services").
+    """
+    def __init__(self, name, hint = None):
+        self.__dict__["_name"] = name
+        self.__dict__["_hint"] = hint
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    try:
+                        self.__dict__["_module"] = importlib.import_module(self._name)
+                    except ImportError as e:
+                        message = f'The module "{self._name}" could not be imported: {e}'
+                        if self._hint:
+                            message = f'{message} ({self._hint})'
+                        raise ImportError(message) from e
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "imported" if self._module is not None else "not imported"
+        return f'<lazy module "{self._name}" ({state})>'
+
+
+def lazy_import(name, hint = None) -> LazyModule:
+    """Get a module which is imported on the first access to one of its attributes.
+
+    Required:
+        name -- The name of the module (e.g. "arcpy" or "arcgis.gis").
+
+    Optional:
+        hint -- Hint which is added to the error message if the module can not be imported.
+
+    Return:
+        module -- The lazy module.
+    """
+    return LazyModule(name, hint)
+
+
+def is_available(name) -> bool:
+    """Check if a top level module (e.g. "arcpy") can be imported, without importing it.
+
+    Required:
+        name -- The name of the module.
+    """
+    return importlib.util.find_spec(name) is not None
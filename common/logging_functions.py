@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: logging_functions
+#
+# Purpose: Custom logging functions for all scripts: logging to a text file, to
+# a NDJSON file and on the console, counting the warnings and errors while they
+# are logged and streaming the logs of several JSON files into an overall log.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, json, logging, threading
+
+## globale variables
+# format of the text log files and the console
+LOG_FORMAT = '%(asctime)s %(levelname)s %(message)s'
+
+
+class CountingHandler(logging.Handler):
+    """Counts the log records by level while they are logged (instead of searching the log file
+    for "warning" and "error" afterwards).
+    """
+    def __init__(self):
+        super().__init__()
+        self.counts = {}
+        self._count_lock = threading.Lock()
+
+    def emit(self, record) -> None:
+        with self._count_lock:
+            self.counts[record.levelname] = self.counts.get(record.levelname, 0) + 1
+
+    @property
+    def errors(self) -> int:
+        return self.counts.get("ERROR", 0) + self.counts.get("CRITICAL", 0)
+
+    @property
+    def warnings(self) -> int:
+        return self.counts.get("WARNING", 0)
+
+
+class NdjsonFormatter(logging.Formatter):
+    """Formats a log record as one JSON object per line (NDJSON) with "time", "level", "logger" and "message"."""
+    def format(self, record) -> str:
+        entry = {"time": self.formatTime(record), "level": record.levelname, "logger": record.name,
+                 "message": record.getMessage()}
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def init_logging(file, name = 'myapp', ndjson = True, overall_handler = None) -> logging.Logger:
+    """Initialises logging to a file, to a NDJSON file ("{log file}.ndjson") and on the console.
+    The warnings and errors are counted while they are logged (see get_counts).
+
+    Required:
+        file -- The path to the log file.
+
+    Optional:
+        name -- The name of the logger.
+        ndjson -- If True (default), the records are also written to a NDJSON file.
+        overall_handler -- Handler of the overall log file of the run (see open_overall_log).
+
+    Return:
+        logger -- The logger object.
+    """
+    logger = logging.getLogger(name)
+    close_logging(logger)
+    formatter = logging.Formatter(LOG_FORMAT)
+    # logging to file
+    hdlr = logging.FileHandler(file, mode='w', encoding='utf-8')
+    hdlr.setFormatter(formatter)
+    logger.addHandler(hdlr)
+    # logging to NDJSON file
+    if ndjson:
+        ndjson_hdlr = logging.FileHandler(f'{os.path.splitext(file)[0]}.ndjson', mode='w', encoding='utf-8')
+        ndjson_hdlr.setFormatter(NdjsonFormatter())
+        logger.addHandler(ndjson_hdlr)
+    # logging to console
+    consoleHandler = logging.StreamHandler()
+    consoleHandler.setFormatter(formatter)
+    logger.addHandler(consoleHandler)
+    # streaming to the overall log file
+    if overall_handler:
+        logger.addHandler(overall_handler)
+    logger.addHandler(CountingHandler())
+    logger.setLevel(logging.INFO)
+    # the records are not passed to the parent loggers (e.g. "myapp" for "myapp.1")
+    logger.propagate = False
+    return logger
+
+
+def get_counts(logger) -> tuple:
+    """Get the number of errors and warnings logged by a logger (see init_logging).
+
+    Required:
+        logger -- The logger object.
+
+    Return:
+        errors -- The number of errors.
+        warnings -- The number of warnings.
+    """
+    for handler in logger.handlers:
+        if isinstance(handler, CountingHandler):
+            return handler.errors, handler.warnings
+    return 0, 0
+
+
+def close_logging(logger) -> None:
+    """Removes and closes the handlers of a logger (the handler of the overall log file stays open).
+
+    Required:
+        logger -- The logger object.
+    """
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        if not getattr(handler, 'overall', False):
+            handler.close()
+
+
+def open_overall_log(file) -> logging.Handler:
+    """Opens the overall log file of a run with several JSON files. The handler is added to the
+    logger of every JSON file (see init_logging), so that the records are written to the overall
+    log file while they are logged (instead of concatenating the log files at the end).
+
+    Required:
+        file -- The path to the overall log file.
+
+    Return:
+        handler -- The handler of the overall log file.
+    """
+    handler = logging.FileHandler(file, mode='w', encoding='utf-8')
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    handler.overall = True
+    return handler
+
+
+def close_overall_log(handler, lines = None) -> None:
+    """Writes the final lines (e.g. the total number of warnings and errors) to the overall log file and closes it.
+
+    Required:
+        handler -- The handler of the overall log file (see open_overall_log).
+
+    Optional:
+        lines -- List with the lines to write at the end of the file.
+    """
+    handler.acquire()
+    try:
+        for line in lines or []:
+            handler.stream.write(f'{line}\n')
+    finally:
+        handler.release()
+    handler.close()
+
+
+def log_message(message, logger = None, level = "info") -> None:
+    """Log a message or print it if no logger is specified.
+
+    Required:
+        message -- The message to be logged.
+
+    Optional:
+        logger -- Logger object
+        level -- Name of the logging level ("info" (default), "warning" or "error")
+    """
+    if logger:
+        getattr(logger, level)(message)
+    else:
+        print(message)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: sign_in_functions
+#
+# Purpose: Functions to sign in to a portal with arcpy in worker processes
+# (e.g. the staging processes of the webtool pipeline or the processes of the
+# cache jobs), which sign in once with the credentials of the main process.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+# python Skript with my own lazy import functions
+import lazy_import_functions as lzf
+# arcpy is imported when it is used
+arcpy = lzf.lazy_import('arcpy', 'ArcGIS Pro is required for signing in with arcpy')
+
+## globale variables
+# portal to which the current (worker) process is signed in
+_signed_in_portal = None
+
+
+def sign_in(credentials) -> None:
+    """Sign in to a portal with arcpy, if the current process is not yet signed in to this portal
+    (the worker processes sign in once with the credentials of the main process).
+
+    Required:
+        credentials -- Dictionary with "portal_url" and "sign_in_user" and "password" or "cert_file" and "key_file"
+    """
+    global _signed_in_portal
+    if _signed_in_portal == credentials["portal_url"]:
+        return
+    if credentials.get("sign_in_user"):
+        arcpy.SignInToPortal(credentials["portal_url"], credentials["sign_in_user"], credentials["password"])
+    elif credentials.get("key_file"):
+        arcpy.SignInToPortal(credentials["portal_url"], cert_file = credentials["cert_file"], key_file = credentials["key_file"])
+    else:
+        arcpy.SignInToPortal(credentials["portal_url"], cert_file = credentials["cert_file"], password="cert.password")
+    _signed_in_portal = credentials["portal_url"]
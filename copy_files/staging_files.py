@@ -10,33 +10,9 @@
 # Created: 08.10.2023
 # -----------------------------------------------------------------------------
 import os, sys, json
-
-def replace_text(file_path, replace_text):
-    """Search for specific strings anf replace them.
-
-    Required:
-        file_path -- The path to the file (e.g. log file).
-        replace_text -- A dictionary with strings which is to be replace:
-
-    Return:
-        file with replaced text
-
-    """
-    with open(file_path, 'r') as file:
-        data = file.read()
-        for key in replace_text:
-            value = replace_text[key]
-            #print(f'Replace "{key}" with "{value}"')
-            data = data.replace(key, value) # case sensitive
-
-    return data
-
-
-def write_file(data, file_path):
-    if os.path.isfile(file_path):
-        os.remove(file_path) # overwrite existing file
-    with open(file_path, 'w') as file:
-        file.write(data) 
+# python Skript with my own staging functions
+import staging_functions as sgf
+from concurrent.futures import ProcessPoolExecutor
 
 
 # def create_folder(folder_path) -> None:
@@ -53,17 +29,46 @@ def write_file(data, file_path):
 #             raise ValueError(f'The folder "{folder_path}" does not exist and could not be created!')
 
 if __name__ == "__main__":
-    # path to a JSON input file or multiple JSON files
-    paramFile = sys.argv[1]
-   
-    if paramFile:        
+    # options: --dry-run (only count the strings to replace, no files are written),
+    # --parallel (stage the files in worker processes), --max-workers=<n> (number of worker processes)
+    # and --no-cache (stage all files, even if they have not changed since the last run)
+    options = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    dry_run = '--dry-run' in options
+    parallel = '--parallel' in options
+    use_cache = '--no-cache' not in options
+    max_workers = os.cpu_count() #default
+    for option in options:
+        if option.startswith('--max-workers='):
+            max_workers = int(option.split('=', 1)[1])
+    # path to a JSON input file
+    paramFiles = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    paramFile = paramFiles[0] if paramFiles else None
+
+    if paramFile:
         with open(paramFile, encoding='utf-8') as f:
             data = json.load(f)
             copy_from = data["copy_from"]
             #copy_to = data["copy_to"]
             file_types = data["file_types"]
-            replace_text_filename = data["replace_text_filename"]
-            replace_text_data= data["replace_text_data"]
+            if "stages" in data:
+                stages = data["stages"]
+            else:
+                # one stage with the replacements of the JSON file
+                stages = {"default": {"replace_text_filename": data["replace_text_filename"],
+                                      "replace_text_data": data["replace_text_data"]}} #default
+            if "manifest_file" in data:
+                manifest_file = data["manifest_file"]
+            else:
+                filename = os.path.splitext(os.path.basename(paramFile))[0]
+                manifest_file = os.path.join(os.path.dirname(os.path.abspath(paramFile)), f'{filename}_manifest.json') #default
+            if "encoding" in data:
+                encoding = data["encoding"]
+            else:
+                encoding = sgf.ENCODING #default
+            if "stream_size" in data:
+                stream_size = int(float(data["stream_size"]) * 1024 * 1024)
+            else:
+                stream_size = sgf.STREAM_SIZE #default
     else:
         print('no Parameter-JSON file specified')
         sys.exit()
@@ -72,24 +77,108 @@ if __name__ == "__main__":
     if type(file_types) != tuple:
         file_types = tuple(file_types)
 
+    for stage, profile in stages.items():
+        for key in ["replace_text_filename", "replace_text_data"]:
+            if key not in profile:
+                raise ValueError(f'The parameter "{key}" is missing in the stage "{stage}"')
+
+    # compile the strings to replace of every stage (one pass per file, independent of the order of the keys)
+    data_replacers = {stage: sgf.Replacer(profile["replace_text_data"]) for stage, profile in stages.items()}
+    filename_replacers = {stage: sgf.Replacer(profile["replace_text_filename"]) for stage, profile in stages.items()}
+    replace_hashes = {stage: sgf.get_replace_hash(profile["replace_text_data"], profile["replace_text_filename"])
+                      for stage, profile in stages.items()}
+
     print(f'******************* Create staging files *******************')
+    print(f'Stages: {", ".join(stages)}')
+    if dry_run:
+        print('Dry run: the strings are only counted, no files are written')
     # create target folder if not alread exists
     #create_folder(copy_to)
+    ## search the files to stage (one walk for all stages)
+    total_filename_counts = {stage: {} for stage in stages}
+    files = []
     for root, d_names, f_names in os.walk(copy_from):
         print(f'Search files in "{root}"')
         for f_name in f_names:
-            if f_name.lower().endswith(file_types):
-                print(f'Copy file "{f_name}"')
-                input_file_path = os.path.join(root, f_name)
-                out_data = replace_text(input_file_path, replace_text_data)
-                out_f_name = f_name
-                for key in replace_text_filename:
-                    value = replace_text_filename[key]
-                    out_f_name = out_f_name.replace(key, value)
-                print(f'Create file "{out_f_name}"')
-                write_file(out_data, os.path.join(root, out_f_name))
-                               
-
+            input_file_path = os.path.join(root, f_name)
+            if f_name.lower().endswith(file_types) and os.path.abspath(input_file_path) != os.path.abspath(manifest_file):
+                outputs = {}
+                for stage, filename_replacer in filename_replacers.items():
+                    out_f_name, filename_counts = filename_replacer.replace(f_name)
+                    sgf.add_counts(total_filename_counts[stage], filename_counts)
+                    outputs[stage] = os.path.join(root, out_f_name)
+                files.append((input_file_path, outputs))
+    # a file which is created from another file is not staged itself (e.g. "x_prod.json" from "x_test.json")
+    output_paths = set(output_path for input_file_path, outputs in files for output_path in outputs.values()
+                       if output_path != input_file_path)
+    staging_files = []
+    for input_file_path, outputs in files:
+        if input_file_path in output_paths:
+            print(f'Skip file "{input_file_path}": the file is created from another file')
+        elif len(set(outputs.values())) < len(outputs):
+            print(f'Skip file "{input_file_path}": several stages would create the same file (no string of the file name is replaced)')
+        else:
+            staging_files.append((input_file_path, outputs))
+    files = staging_files
+
+    ## stage the files which have changed since the last run (see manifest)
+    manifest = sgf.read_manifest(manifest_file) if use_cache else {}
+    new_manifest = {}
+    results = []
+    jobs = []
+    for input_file_path, outputs in files:
+        key = os.path.relpath(input_file_path, copy_from).replace(os.sep, '/')
+        entry = manifest.get(key)
+        if not dry_run and sgf.is_unchanged(entry, input_file_path, outputs, replace_hashes):
+            # stages which are no longer in the JSON file are removed from the manifest
+            entry = {**entry, "stages": {stage: entry["stages"][stage] for stage in outputs}}
+            new_manifest[key] = entry
+            results.append({"source_path": input_file_path, "entry": entry, "error": None,
+                            "outputs": {stage: {"output_path": output["output_path"], "counts": output.get("counts", {}),
+                                                "status": "unchanged"} for stage, output in entry["stages"].items()}})
+        else:
+            jobs.append((key, input_file_path, outputs, entry))
+    print(f'{len(files)} files, {len(files) - len(jobs)} files have not changed since the last run')
+    if parallel and len(jobs) > 1:
+        profiles = {stage: profile["replace_text_data"] for stage, profile in stages.items()}
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=sgf.init_worker,
+                                 initargs=(profiles,)) as executor:
+            futures = [(key, executor.submit(sgf.stage_file, input_file_path, outputs, replace_hashes, entry,
+                                             None, dry_run, encoding, stream_size))
+                       for key, input_file_path, outputs, entry in jobs]
+            staged = [(key, future.result()) for key, future in futures]
+    else:
+        staged = [(key, sgf.stage_file(input_file_path, outputs, replace_hashes, entry, data_replacers, dry_run,
+                                       encoding, stream_size))
+                  for key, input_file_path, outputs, entry in jobs]
+
+    i_errors = 0
+    for key, result in staged:
+        if result["error"]:
+            i_errors += 1
+            print(f'Error while staging the file "{result["source_path"]}": {result["error"]}')
+            continue
+        results.append(result)
+        if result["entry"]:
+            new_manifest[key] = result["entry"]
+        for stage, output in result["outputs"].items():
+            if dry_run:
+                print(f'File "{output["output_path"]}": {sgf.format_counts(output["counts"])}')
+            elif output["status"] == "staged":
+                print(f'Create file "{output["output_path"]}"')
+    if not dry_run:
+        sgf.write_manifest(new_manifest, manifest_file)
+
+    print(f'{len(files)} files, {i_errors} errors')
+    for stage in stages:
+        total_data_counts = {}
+        i_written = 0
+        for result in results:
+            output = result["outputs"].get(stage)
+            if output:
+                sgf.add_counts(total_data_counts, output["counts"])
+                i_written += output["status"] == "staged"
+        print(f'Stage "{stage}": {i_written} files written')
+        print(f'Strings found in the files: {sgf.format_counts(total_data_counts)}')
+        print(f'Strings found in the file names: {sgf.format_counts(total_filename_counts[stage])}')
     print('****************************************************************\n')
-
-
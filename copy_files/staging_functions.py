@@ -0,0 +1,427 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: staging_functions
+#
+# Purpose: Functions for creating the configuration files of other stages:
+# all strings of a replacement dictionary are searched in one pass with one
+# regular expression (leftmost-longest matches), every file is read once
+# for all stages, the files are staged in worker processes and only staged
+# again if they have changed (manifest).
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, re, json, time, hashlib, codecs, mmap
+
+## globale variables
+# encoding of the staging files (bytes which can not be decoded are kept unchanged)
+ENCODING = 'utf-8' #default
+# files larger than STREAM_SIZE bytes are memory-mapped and replaced in chunks of CHUNK_SIZE bytes
+STREAM_SIZE = 16 * 1024 * 1024 #default
+CHUNK_SIZE = 1024 * 1024 #default
+# replacers of the stages in the current (worker) process {stage: replacer} (see init_worker)
+_replacers = {}
+
+
+class Replacer:
+    """Replaces all keys of a dictionary in one pass over the text (one regular expression).
+
+    The matches do not depend on the order of the keys: at every position the leftmost match is
+    replaced and of several matches at the same position the longest (e.g. "maptest" before "_test"
+    in "maptest_test"). The replaced text is not searched again.
+    """
+    def __init__(self, replace_text):
+        """Compiles the keys of the dictionary into one regular expression.
+
+        Required:
+            replace_text -- A dictionary with the strings to replace (key) and the new strings (value).
+        """
+        self.replace_text = dict(replace_text)
+        for key in self.replace_text:
+            if not key:
+                raise ValueError('An empty string can not be replaced')
+        # the alternatives are tried in order: the longest keys first give the longest match at a position
+        keys = sorted(self.replace_text, key=len, reverse=True)
+        self._pattern = re.compile('|'.join(re.escape(key) for key in keys)) if keys else None
+        self.max_length = max((len(key) for key in self.replace_text), default=0)
+
+    def find(self, text) -> list:
+        """Searches the keys in the text.
+
+        Required:
+            text -- The text to search.
+
+        Return:
+            matches -- List with the non-overlapping leftmost-longest matches (start, end, key).
+        """
+        if self._pattern is None:
+            return []
+        return [(match.start(), match.end(), match.group()) for match in self._pattern.finditer(text)]
+
+    def count(self, text) -> dict:
+        """Counts the matches of every key in the text (e.g. for a dry run).
+
+        Required:
+            text -- The text to search.
+
+        Return:
+            counts -- Dictionary with the number of matches of every key found.
+        """
+        counts = {}
+        for _, _, key in self.find(text):
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def replace(self, text) -> tuple:
+        """Replaces the keys in the text.
+
+        Required:
+            text -- The text.
+
+        Return:
+            text -- The text with the replaced strings.
+            counts -- Dictionary with the number of matches of every key found.
+        """
+        counts = {}
+        text, _ = self.replace_chunk(text, True, counts)
+        return text, counts
+
+    def replace_chunk(self, text, final = True, counts = None) -> tuple:
+        """Replaces the keys in a chunk of a text (e.g. of a large file). Unless it is the final chunk,
+        the end of the chunk in which a key may continue into the next chunk (up to the length of the
+        longest key - 1) is not replaced but returned as rest, which is to be prepended to the next chunk.
+
+        Required:
+            text -- The chunk of the text (with the rest of the previous chunk).
+
+        Optional:
+            final -- If True (default), the text is the last chunk and is replaced completely.
+            counts -- Dictionary with the number of matches of every key, to which the matches are added.
+
+        Return:
+            text -- The replaced text of the chunk.
+            rest -- The rest of the chunk which is not yet replaced.
+        """
+        # a match starting before "safe" ends within the chunk
+        safe = len(text) if final else max(len(text) - self.max_length + 1, 0)
+        if self._pattern is None:
+            return text, ''
+        parts = []
+        pos = 0
+        for match in self._pattern.finditer(text):
+            start, end, key = match.start(), match.end(), match.group()
+            if start >= safe:
+                break
+            parts.append(text[pos:start])
+            parts.append(self.replace_text[key])
+            if counts is not None:
+                counts[key] = counts.get(key, 0) + 1
+            pos = end
+        rest_start = max(pos, safe)
+        if not parts:
+            return text[:rest_start], text[rest_start:]
+        parts.append(text[pos:rest_start])
+        return ''.join(parts), text[rest_start:]
+
+
+def add_counts(total, counts) -> None:
+    """Adds the number of matches of every key to the total numbers.
+
+    Required:
+        total -- Dictionary with the total number of matches of every key.
+        counts -- Dictionary with the number of matches of every key (see Replacer.count).
+    """
+    for key, count in counts.items():
+        total[key] = total.get(key, 0) + count
+
+
+def format_counts(counts) -> str:
+    """Formats the number of matches of every key, e.g. '"TEST": 3, "_test": 1'.
+
+    Required:
+        counts -- Dictionary with the number of matches of every key.
+    """
+    return ', '.join(f'"{key}": {count}' for key, count in sorted(counts.items())) or 'no matches'
+
+
+def get_hash(data) -> str:
+    """Get the hash of bytes (SHA-256).
+
+    Required:
+        data -- The bytes (e.g. the content of a file).
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def get_file_hash(file_path, chunk_size = CHUNK_SIZE) -> str:
+    """Get the hash of a file (SHA-256), the file is read in chunks.
+
+    Required:
+        file_path -- The path to the file.
+
+    Optional:
+        chunk_size -- Number of bytes read at once.
+    """
+    file_hash = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def get_replace_hash(replace_text_data, replace_text_filename) -> str:
+    """Get the hash of the replacements: a changed replacement changes the hash and all files are staged again.
+
+    Required:
+        replace_text_data -- A dictionary with the strings to replace in the files.
+        replace_text_filename -- A dictionary with the strings to replace in the file names.
+    """
+    replacements = {"data": replace_text_data, "filename": replace_text_filename}
+    return get_hash(json.dumps(replacements, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+
+
+def get_file_state(file_path) -> tuple:
+    """Get the size and the modification time (ns) of a file (None if the file does not exist).
+
+    Required:
+        file_path -- The path to the file.
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def read_manifest(manifest_file) -> dict:
+    """Read the manifest of the staged files (written by write_manifest after staging).
+
+    Required:
+        manifest_file -- Path to the manifest file (JSON)
+
+    Return:
+        manifest -- Dictionary {source path: entry} with "source_hash", "source_state" and "stages"
+                    {stage: {"replace_hash", "output_path", "output_hash", "output_state", "counts"}}
+                    (empty if there is no manifest file)
+    """
+    if not manifest_file or not os.path.isfile(manifest_file):
+        return {}
+    try:
+        with open(manifest_file, encoding='utf-8') as f:
+            return json.load(f)["files"]
+    except (ValueError, KeyError):
+        print(f'The manifest file "{manifest_file}" is not valid and is ignored')
+        return {}
+
+
+def write_manifest(manifest, manifest_file) -> None:
+    """Write the manifest of the staged files.
+
+    Required:
+        manifest -- Dictionary {source path: entry} (see read_manifest)
+        manifest_file -- Path to the manifest file (JSON)
+    """
+    temp_file = f'{manifest_file}.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump({"staged": time.ctime(), "files": manifest}, f, indent=2, ensure_ascii=False)
+    os.replace(temp_file, manifest_file)
+
+
+def is_unchanged(entry, source_path, outputs, replace_hashes) -> bool:
+    """Check with the manifest entry if a file was already staged for all stages: the replacements, the size and
+    modification time of the source file and of the output files have not changed (the files are not read).
+
+    Required:
+        entry -- The manifest entry of the source file (see read_manifest)
+        source_path -- The path to the source file.
+        outputs -- Dictionary with the path to the output file of every stage {stage: output path}.
+        replace_hashes -- Dictionary with the hash of the replacements of every stage (see get_replace_hash).
+    """
+    if not entry or list(get_file_state(source_path) or []) != entry.get("source_state"):
+        return False
+    stages = entry.get("stages") or {}
+    for stage, output_path in outputs.items():
+        output = stages.get(stage)
+        if (not output or output.get("replace_hash") != replace_hashes[stage] or output.get("output_path") != output_path
+                or list(get_file_state(output_path) or []) != output.get("output_state")):
+            return False
+    return True
+
+
+def write_file(data, file_path) -> bool:
+    """Writes the bytes to a file, only if the content of an existing file differs (the modification
+    time of an unchanged file is kept). The file is written to a temporary file first and then renamed,
+    so that the file is never read half written.
+
+    Required:
+        data -- The bytes.
+        file_path -- The path to the file.
+
+    Return:
+        written -- True if the file was written.
+    """
+    if os.path.isfile(file_path) and os.path.getsize(file_path) == len(data):
+        with open(file_path, 'rb') as file:
+            if file.read() == data:
+                return False
+    temp_file = f'{file_path}.tmp'
+    with open(temp_file, 'wb') as file:
+        file.write(data)
+    os.replace(temp_file, file_path) # overwrite existing file
+    return True
+
+
+def init_worker(profiles) -> None:
+    """Compiles the replacements of the stages once in a worker process (initializer of the process pool).
+
+    Required:
+        profiles -- Dictionary with the strings to replace in the files of every stage {stage: replace_text_data}.
+    """
+    global _replacers
+    _replacers = {stage: Replacer(replace_text_data) for stage, replace_text_data in profiles.items()}
+
+
+def stream_replace(source_path, outputs, dry_run = False, encoding = ENCODING, chunk_size = CHUNK_SIZE) -> dict:
+    """Replaces the strings in a large file in chunks for all stages: the file is memory-mapped and decoded
+    once and the outputs are streamed to temporary files, so that the memory used does not depend on the size
+    of the file. Keys across the boundary of two chunks are found (see Replacer.replace_chunk). An output file
+    is only replaced if its content differs.
+
+    Required:
+        source_path -- The path to the source file.
+        outputs -- Dictionary with the path to the output file and the replacer of every stage
+                   {stage: (output path, replacer)}.
+
+    Optional:
+        dry_run -- If True, the strings are only counted and no file is written.
+        encoding -- The encoding of the file (bytes which can not be decoded are kept).
+        chunk_size -- Number of bytes replaced at once.
+
+    Return:
+        results -- Dictionary {stage: (counts, output hash, written)} with the number of matches of every key,
+                   the hash of the output (None for a dry run) and True if the output file was written.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors='surrogateescape')
+    streams = {}
+    try:
+        for stage, (output_path, replacer) in outputs.items():
+            temp_file = f'{output_path}.tmp'
+            streams[stage] = {"replacer": replacer, "counts": {}, "rest": '', "output_path": output_path,
+                              "temp_file": temp_file, "output": None if dry_run else open(temp_file, 'wb'),
+                              "encoder": codecs.getincrementalencoder(encoding)(errors='surrogateescape'),
+                              "hash": hashlib.sha256()}
+        with open(source_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for pos in range(0, len(data), chunk_size):
+                final = pos + chunk_size >= len(data)
+                # the chunk is decoded once for all stages
+                text = decoder.decode(data[pos:pos + chunk_size], final)
+                for stream in streams.values():
+                    replaced, stream["rest"] = stream["replacer"].replace_chunk(stream["rest"] + text, final,
+                                                                                 stream["counts"])
+                    if stream["output"]:
+                        chunk = stream["encoder"].encode(replaced, final)
+                        stream["output"].write(chunk)
+                        stream["hash"].update(chunk)
+    except BaseException:
+        for stream in streams.values():
+            if stream["output"]:
+                stream["output"].close()
+                os.remove(stream["temp_file"])
+        raise
+    results = {}
+    for stage, stream in streams.items():
+        if not stream["output"]:
+            results[stage] = (stream["counts"], None, False)
+            continue
+        stream["output"].close()
+        output_path, temp_file = stream["output_path"], stream["temp_file"]
+        output_hash = stream["hash"].hexdigest()
+        if (os.path.isfile(output_path) and os.path.getsize(output_path) == os.path.getsize(temp_file) and
+                get_file_hash(output_path) == output_hash):
+            os.remove(temp_file)
+            results[stage] = (stream["counts"], output_hash, False)
+        else:
+            os.replace(temp_file, output_path) # overwrite existing file
+            results[stage] = (stream["counts"], output_hash, True)
+    return results
+
+
+def stage_file(source_path, outputs, replace_hashes, entry = None, replacers = None, dry_run = False,
+               encoding = ENCODING, stream_size = STREAM_SIZE) -> dict:
+    """Replaces the strings in a file and writes the output file of every stage. The file is read and decoded
+    once for all stages. The output file of a stage is not staged again if the content of the source file, the
+    replacements and the output file have not changed since the last run (see manifest). Files larger than
+    stream_size are replaced in chunks (see stream_replace). The function can run in a worker process
+    (see init_worker).
+
+    Required:
+        source_path -- The path to the source file.
+        outputs -- Dictionary with the path to the output file of every stage {stage: output path}.
+        replace_hashes -- Dictionary with the hash of the replacements of every stage (see get_replace_hash).
+
+    Optional:
+        entry -- The manifest entry of the source file of the last run (see read_manifest).
+        replacers -- Dictionary with the replacer of every stage (default: the replacers of the worker process).
+        dry_run -- If True, the strings are only counted and no file is written.
+        encoding -- The encoding of the files (bytes which can not be decoded are kept).
+        stream_size -- Files larger than this number of bytes are replaced in chunks.
+
+    Return:
+        result -- Dictionary with "source_path", "entry" (the new manifest entry), "outputs" {stage: {"output_path",
+                  "counts", "status" ("staged", "unchanged" or "counted")}} and "error"
+    """
+    result = {"source_path": source_path, "entry": None, "outputs": {}, "error": None}
+    try:
+        replacers = replacers or _replacers
+        source_state = get_file_state(source_path)
+        stream = source_state[0] > stream_size
+        if stream:
+            source_hash = get_file_hash(source_path)
+        else:
+            with open(source_path, 'rb') as file:
+                source_data = file.read()
+            source_hash = get_hash(source_data)
+        stages = {}
+        # same content (e.g. only the modification time changed) and the output file was not changed
+        if not dry_run and entry and entry.get("source_hash") == source_hash:
+            for stage, output_path in outputs.items():
+                output = (entry.get("stages") or {}).get(stage)
+                if (output and output.get("replace_hash") == replace_hashes[stage] and
+                        output.get("output_path") == output_path and os.path.isfile(output_path) and
+                        get_file_hash(output_path) == output.get("output_hash")):
+                    stages[stage] = {**output, "output_state": list(get_file_state(output_path))}
+                    result["outputs"][stage] = {"output_path": output_path, "counts": output.get("counts", {}),
+                                                "status": "unchanged"}
+        todo = {stage: output_path for stage, output_path in outputs.items() if stage not in stages}
+        staged = {}
+        if stream and todo:
+            staged = stream_replace(source_path, {stage: (output_path, replacers[stage])
+                                                  for stage, output_path in todo.items()}, dry_run, encoding)
+        elif todo:
+            # the content is decoded once for all stages
+            text = source_data.decode(encoding, errors='surrogateescape')
+            for stage, output_path in todo.items():
+                if dry_run:
+                    staged[stage] = (replacers[stage].count(text), None, False)
+                    continue
+                replaced, counts = replacers[stage].replace(text)
+                output_data = replaced.encode(encoding, errors='surrogateescape')
+                staged[stage] = (counts, get_hash(output_data), write_file(output_data, output_path))
+        for stage, (counts, output_hash, written) in staged.items():
+            output_path = todo[stage]
+            status = "counted" if dry_run else ("staged" if written else "unchanged")
+            result["outputs"][stage] = {"output_path": output_path, "counts": counts, "status": status}
+            if dry_run:
+                continue
+            # the source file is the output file (no string of the file name is replaced)
+            if output_path == source_path:
+                source_state, source_hash = get_file_state(source_path), output_hash
+            stages[stage] = {"replace_hash": replace_hashes[stage], "output_path": output_path,
+                             "output_hash": output_hash, "output_state": list(get_file_state(output_path)),
+                             "counts": counts}
+        if not dry_run:
+            result["entry"] = {"source_hash": source_hash, "source_state": list(source_state), "stages": stages}
+    except Exception as e:
+        result["error"] = f'{type(e).__name__}: {e}'
+    return result
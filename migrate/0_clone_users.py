@@ -8,52 +8,18 @@
 #
 # Created: 20.03.2023
 # -----------------------------------------------------------------------------
-import os, sys, logging, json, time
-import arcpy
-from arcgis.gis import GIS
+import os, sys, json, time, argparse
 from getpass import getpass
-import xml.dom.minidom as DOM
-from IPython.display import display
 # python Skript with my own portal management functions
 import portal_management_functions as pmf
+# python Skript with my own logging and lazy import functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'common'))
+import logging_functions as lgf
+import lazy_import_functions as lzf
+# the arcgis api for python is imported when it is used (fast start, no ArcGIS Pro required)
+arcgis_gis = lzf.lazy_import('arcgis.gis')
 
 
-def init_logging(file)  -> None:
-    """Initialises logging to a file and on the console.
-
-    Required:
-        file -- The path to the log file.
-    """
-    global logger
-    logger = logging.getLogger('myapp')
-    # logging to file
-    hdlr = logging.FileHandler(file, mode='w')
-    formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
-    hdlr.setFormatter(formatter)
-    logger.addHandler(hdlr)
-    # logging to console
-    consoleHandler = logging.StreamHandler()
-    consoleHandler.setFormatter(formatter)
-    logger.addHandler(consoleHandler)
-    logger.setLevel(logging.INFO)
-
-def search(file, text) -> int:
-    """Search for a specific string in a file.
-
-    Required:
-        file -- The path to the file (e.g. log file).
-        text -- The string which is to be searched for.
-
-    Return:
-        cnt -- The number of occurrences of the string in the file.
-    """
-    cnt = 0
-    with open(file) as f:
-        for line in f:
-            if text in line.lower():
-                cnt=cnt+1
-        return cnt
-
 def create_folder(folder_path) -> None:
     """Creates a folder if it does not already exist.
 
@@ -68,8 +34,10 @@ def create_folder(folder_path) -> None:
             raise ValueError(f'The folder "{folder_path}" does not exist and could not be created!')
 
 if __name__ == "__main__":
-    # path to a JSON input file or multiple JSON files
-    paramFile = arcpy.GetParameterAsText(0)
+    # path to a JSON input file (also the first parameter of an ArcGIS Pro script tool)
+    parser = argparse.ArgumentParser(description='Migrate ArcGIS Portal users from one portal to another.')
+    parser.add_argument('paramFile', nargs='?', help='path to the JSON input file')
+    paramFile = parser.parse_known_args()[0].paramFile
     #paramFile = r'...\0_clone_users.json'
 
     if paramFile:        
@@ -96,7 +64,7 @@ if __name__ == "__main__":
     # path to the log file
     log_file = os.path.join(log_folder, f'{filename}.log')
     # initialise logging
-    init_logging(log_file)
+    logger = lgf.init_logging(log_file)
     logger.info(f'******************* Clone users *******************')
     logger.info(f'Start logging: {time.ctime()}')
     start_time = time.time()
@@ -108,8 +76,8 @@ if __name__ == "__main__":
         if sign_in_user:
             pw = getpass(f'Enter password for user "{sign_in_user}": ')
             try:
-                source = GIS(url=source_url, username=sign_in_user, password=pw, verify_cert=False)
-                target = GIS(url=target_url, username=sign_in_user, password=pw, verify_cert=False)
+                source = arcgis_gis.GIS(url=source_url, username=sign_in_user, password=pw, verify_cert=False)
+                target = arcgis_gis.GIS(url=target_url, username=sign_in_user, password=pw, verify_cert=False)
                 logged_in = True
                 logger.info(f'Successfully logged in')
                 logger.info(f'Source: {source}')
@@ -135,6 +103,9 @@ if __name__ == "__main__":
         else:
             logger.error(f"User '{name}' was not found in the source portal!")
 
+    # resolver for the groups of the target portal (cached on disk for further runs)
+    group_resolver = pmf.GroupResolver(target, logger=logger)
+
     # create list with users of target portal 
     target_usernames = [user.username for user in target.users.search('!esri_ & !admin')]
     # create enterprise users in target Portal if not already exist
@@ -144,7 +115,7 @@ if __name__ == "__main__":
         else:
             try:
                 logger.info(f"Create user '{user.username}'")
-                target_user = pmf.copy_user(target, user, logger = logger)
+                target_user = pmf.copy_user(target, user, logger = logger, group_resolver = group_resolver)
                 if target_user:
                     logger.info(f"Created user '{target_user.username}' in target portal")
                     #display(target_user)
@@ -156,12 +127,11 @@ if __name__ == "__main__":
 
     ## end logging
     end_time = time.time()
-    i_warning = search(log_file, "warning")
-    i_error = search(log_file, "error")
+    i_error, i_warning = lgf.get_counts(logger)
     logger.info("Run Script in " + str(round(end_time - start_time)) + " sec.")
     logger.info(f'# {i_error} errors found')
     logger.info(f'# {i_warning} warnings found')
     logger.info(f'End time: {time.ctime()}')
     logger.info('****************************************************************\n')
-    logger.handlers.clear()
+    lgf.close_logging(logger)
 
@@ -8,9 +8,8 @@
 #
 # Created: 20.03.2023
 # -----------------------------------------------------------------------------
-import tempfile
+import os, json, time, tempfile
 from getpass import getpass
-from arcgis.gis import GIS
 
 ## globale variables
 # sign in Portal user
@@ -31,6 +30,9 @@ RELATIONSHIP_TYPES = frozenset(['Map2Service', 'WMA2Code',
                                 'Service2Service'])
 # Item Types where URLs in the entire text ('get_data()') are to be replaced. Maybe need to be extended..
 REPLACE_URLS_TYPES = frozenset(['Web Mapping Application', 'Mobile Application'])
+# cache of the group ids (shared by all scripts and runs)
+GROUP_CACHE_FILE = os.path.join(tempfile.gettempdir(), "portal_group_cache.json") #default
+GROUP_CACHE_TTL = 3600 #default (sec)
 
 
 def is_hosted(item):
@@ -95,13 +97,145 @@ def get_target_item(target, source_item, replace_urls = None):
     return found_item
 
 
-def copy_user(target, source_user, password = None, logger = None):
+class GroupResolver:
+    """Resolves the groups of a portal by their title. Every title is searched only once and the
+    group ids are kept in a cache file on disk, so that further runs (and other scripts) do not
+    search again until the cache entry is older than the time to live.
+
+    Required:
+        gis -- GIS object of the portal
+
+    Optional:
+        cache_file -- Path to the cache file (JSON) (None = no cache file)
+        ttl -- Time to live of a cache entry in seconds
+        logger -- Logger object
+    """
+    def __init__(self, gis, cache_file = GROUP_CACHE_FILE, ttl = GROUP_CACHE_TTL, logger = None):
+        self.gis = gis
+        self.portal_url = str(gis.url).rstrip('/').lower()
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.logger = logger
+        self._groups = {}
+        self._reported = set()
+        self._cache = self._read_cache()
+
+    def _read_cache(self) -> dict:
+        if not self.cache_file or not os.path.isfile(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, encoding='utf-8') as f:
+                entries = json.load(f).get(self.portal_url, {})
+        except (ValueError, OSError):
+            return {}
+        now = time.time()
+        return {title: entry for title, entry in entries.items() if now - entry["time"] < self.ttl}
+
+    def _write_cache(self) -> None:
+        if not self.cache_file:
+            return
+        try:
+            with open(self.cache_file, encoding='utf-8') as f:
+                cache = json.load(f)
+        except (ValueError, OSError):
+            cache = {}
+        cache[self.portal_url] = self._cache
+        # write to a temporary file first -> other runs never read a half written file
+        temp_file = f'{self.cache_file}.{os.getpid()}.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=2, ensure_ascii=False)
+        os.replace(temp_file, self.cache_file)
+
+    def _log(self, message, level = "info") -> None:
+        if self.logger:
+            getattr(self.logger, level)(message)
+        else:
+            print(message)
+
+    def _search(self, title):
+        for group in self.gis.groups.search(query=f'title:"{title}"'):
+            # check if match exactly
+            if group.title == title:
+                return group
+        return None
+
+    def get_group(self, title):
+        """Get a group by its title. A cached group id is checked with the portal (the group may have been
+        deleted or recreated since it was cached). Groups which are not found are not logged (see callers).
+
+        Required:
+            title -- Title of the group
+
+        Return:
+            group -- Group object or None (if not found)
+        """
+        if title in self._groups:
+            return self._groups[title]
+        group = None
+        dropped = False
+        if title in self._cache:
+            group = self.gis.groups.get(self._cache[title]["id"])
+            if group is None or group.title != title:
+                # the group was deleted or renamed since it was cached
+                group = None
+                del self._cache[title]
+                dropped = True
+        if group is None:
+            group = self._search(title)
+            if group is None:
+                # not found groups are not cached on disk (they may be created later), only for this run
+                if dropped:
+                    self._write_cache()
+                self._groups[title] = None
+                return None
+            self._cache[title] = {"id": group.id, "time": time.time()}
+            self._write_cache()
+        self._groups[title] = group
+        return group
+
+    def get_group_id(self, title) -> str:
+        """Get the id of a group by its title (the cached id is checked, see get_group).
+
+        Required:
+            title -- Title of the group
+
+        Return:
+            group_id -- Id of the group or None (if not found)
+        """
+        group = self.get_group(title)
+        return group.id if group else None
+
+    def get_group_ids(self, titles) -> list:
+        """Get the ids of several groups by their titles (groups which are not found are skipped and
+        logged once as warning).
+
+        Required:
+            titles -- List with the titles of the groups
+
+        Return:
+            group_ids -- List with the ids of the groups
+        """
+        group_ids = []
+        for title in titles:
+            group_id = self.get_group_id(title)
+            if group_id:
+                group_ids.append(group_id)
+            elif title not in self._reported:
+                self._reported.add(title)
+                self._log(f"Group '{title}' was not found in the portal '{self.portal_url}'!", "warning")
+        return group_ids
+
+
+def copy_user(target, source_user, password = None, logger = None, group_resolver = None):
     """Create user in the target Portal
 
     Required:
         target  -- GIS object (target ArcGIS Portal)
         source_group -- Group object
 
+    Optional:
+        group_resolver -- GroupResolver of the target portal (to share the group cache between several users)
+
     Return:
         copied_user -- Created enterprise User in the target ArcGIS Portal
     """ 
@@ -141,24 +275,20 @@ def copy_user(target, source_user, password = None, logger = None):
                 copied_user.update(thumbnail=thumbnail_file)
 
             # add user to groups
+            if group_resolver is None:
+                group_resolver = GroupResolver(target, logger=logger)
             for source_group in source_user.groups:
-                target_group_search = target.groups.search(source_group.title)
-                if target_group_search:
-                    # check if match exactly
-                    for target_group in target_group_search:    
-                        if target_group.title == source_group.title:
-                            if logger:
-                                logger.info(f"Add user to group '{target_group.title}'")
-                            else:
-                                print(f"Add user to group '{target_group.title}'")
-                            target_group.add_users([copied_user.username])
-                        else:
-                            print(f"Group '{target_group.title}' does not exactly match..")
-                else:
+                target_group = group_resolver.get_group(source_group.title)
+                if target_group:
                     if logger:
-                        logger.warning(f"Group '{source_group.title}' was not found in the target portal!")
+                        logger.info(f"Add user to group '{target_group.title}'")
                     else:
-                        print(f"Group '{source_group.title}' was not found in the target portal!")
+                        print(f"Add user to group '{target_group.title}'")
+                    target_group.add_users([copied_user.username])
+                elif logger:
+                    logger.warning(f"Group '{source_group.title}' was not found in the target portal!")
+                else:
+                    print(f"Group '{source_group.title}' was not found in the target portal!")
 
             return copied_user
 
@@ -0,0 +1,846 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: cache_management_functions
+#
+# Purpose: Custom functions to create and manage map service caches with arcpy.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, sys, time, json, hashlib
+import arcpy
+# python Skript with my own tiling scheme functions
+import tiling_scheme_functions as tsf
+# python Skript with my own sign in functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'common'))
+import sign_in_functions as sif
+# python Skript with my own logging functions
+import logging_functions as lgf
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+## globale variables
+# status codes of an arcpy result object (see arcpy "Result")
+RESULT_STATUS = {0: "New", 1: "Submitted", 2: "Waiting", 3: "Executing", 4: "Succeeded",
+                 5: "Failed", 6: "Timed Out", 7: "Canceling", 8: "Canceled", 9: "Deleting",
+                 10: "Deleted"}
+# status codes of finished jobs
+FINISHED_STATUS = frozenset([4, 5, 6, 8, 10])
+# default settings for polling jobs
+POLL_MIN_INTERVAL = 0.2 #default (sec)
+POLL_MAX_INTERVAL = 10 #default (sec)
+POLL_BACKOFF = 1.5 #default (factor by which the interval grows if no job has changed)
+# number of tiles per side of a bundle of a compact cache (the partitions are aligned to the bundles)
+BUNDLE_DIMENSION = 128
+
+
+def run_tool(tool_name, args, kwargs, credentials = None) -> dict:
+    """Execute an arcpy geoprocessing tool in a worker process of the JobMonitor. arcpy is not
+    thread-safe, therefore every tool runs in its own process (see JobMonitor.submit).
+
+    Required:
+        tool_name -- Name of the tool in arcpy (e.g. "server.ManageMapServerCacheTiles")
+        args -- List with the positional parameters of the tool
+        kwargs -- Dictionary with the keyword parameters of the tool
+
+    Optional:
+        credentials -- Credentials to sign in to the portal first (see sif.sign_in), if the process is not yet signed in
+
+    Return:
+        result -- Dictionary with "status" and "messages" (list with [message, severity])
+    """
+    if credentials:
+        sif.sign_in(credentials)
+    tool = arcpy
+    for name in tool_name.split("."):
+        tool = getattr(tool, name)
+    try:
+        result = tool(*args, **kwargs)
+    except arcpy.ExecuteError:
+        # the arcpy exception is not passed to the main process -> raise it again with the messages of the tool
+        raise RuntimeError(arcpy.GetMessages(2))
+    messages = [[result.getMessage(index), result.getSeverity(index)] for index in range(getattr(result, 'messageCount', 0))]
+    return {"status": getattr(result, 'status', 4), "messages": messages}
+
+
+class FutureResult:
+    """Wraps a geoprocessing tool, which is executed in a worker process (see run_tool), so
+    that it can be polled like an asynchronous arcpy result object. The messages of the tool
+    are available when the tool is finished.
+    """
+    def __init__(self, future):
+        self.future = future
+
+    @property
+    def result(self):
+        """The result of run_tool (None while the tool is running)"""
+        if self.future.done() and not self.future.exception():
+            return self.future.result()
+        return None
+
+    @property
+    def status(self) -> int:
+        if not self.future.done():
+            return 3 # Executing
+        if self.future.exception():
+            return 5 # Failed
+        return self.future.result()["status"]
+
+    @property
+    def messageCount(self) -> int:
+        if self.result:
+            return len(self.result["messages"])
+        return 0
+
+    def getMessage(self, index) -> str:
+        return self.result["messages"][index][0]
+
+    def getSeverity(self, index) -> int:
+        return self.result["messages"][index][1]
+
+
+class MonitoredJob:
+    """State of a job watched by the JobMonitor."""
+    def __init__(self, name, result, on_complete = None):
+        self.name = name
+        self.result = result
+        self.on_complete = on_complete
+        self.status = None
+        self.messages = []
+        self.start_time = time.time()
+        self.end_time = None
+        self.error = None
+
+    @property
+    def finished(self) -> bool:
+        return self.end_time is not None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == 4
+
+    @property
+    def duration(self) -> float:
+        """Duration of the job in seconds (until now if the job is still running)"""
+        return (self.end_time or time.time()) - self.start_time
+
+    @property
+    def status_text(self) -> str:
+        return RESULT_STATUS.get(self.status, str(self.status))
+
+
+class JobMonitor:
+    """Watch several arcpy result objects (geoprocessing jobs) at the same time.
+
+    Asynchronous result objects (see add) are polled with an adaptive interval: it starts at
+    min_interval, grows by the factor backoff as long as no job changes and is reset as soon as
+    a job changes its status or reports new messages, which are logged as they arrive. The tools
+    executed in worker processes (see submit) block until they are finished: the monitor wakes up
+    as soon as one of them is finished and logs its messages then. When a job is finished its
+    duration is recorded and the callback "on_complete" is called.
+
+    Optional:
+        logger -- Logger object (if not specified, messages are printed)
+        max_workers -- Number of worker processes for the geoprocessing tools (see submit)
+        credentials -- Credentials with which the worker processes sign in to the portal (see sif.sign_in)
+        min_interval -- Minimum poll interval in seconds
+        max_interval -- Maximum poll interval in seconds
+        backoff -- Factor by which the poll interval grows if no job has changed
+    """
+    def __init__(self, logger = None, max_workers = 4, credentials = None, min_interval = POLL_MIN_INTERVAL,
+                 max_interval = POLL_MAX_INTERVAL, backoff = POLL_BACKOFF):
+        self.logger = logger
+        self.max_workers = max_workers
+        self.credentials = credentials
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jobs = []
+        self._executor = None
+        self._interval = min_interval
+
+    def _log(self, message, severity = 0):
+        lgf.log_message(message, self.logger, {0: "info", 1: "warning", 2: "error"}.get(severity, "info"))
+
+    def add(self, name, result, on_complete = None) -> MonitoredJob:
+        """Add an (asynchronous) arcpy result object to the monitor.
+
+        Required:
+            name -- Name of the job (used in the log messages)
+            result -- arcpy result object (must have the attribute "status")
+
+        Optional:
+            on_complete -- Function which is called with the MonitoredJob when the job is finished
+
+        Return:
+            job -- MonitoredJob object
+        """
+        job = MonitoredJob(name, result, on_complete)
+        self.jobs.append(job)
+        self._interval = self.min_interval
+        return job
+
+    def submit(self, name, tool_name, *args, on_complete = None, **kwargs) -> MonitoredJob:
+        """Execute a geoprocessing tool (e.g. "server.ManageMapServerCacheTiles") in a worker
+        process and add it to the monitor. arcpy is not thread-safe, therefore the tools which
+        run at the same time are executed in separate processes.
+
+        Required:
+            name -- Name of the job (used in the log messages)
+            tool_name -- Name of the tool in arcpy, args and kwargs are passed to the tool
+
+        Optional:
+            on_complete -- Function which is called with the MonitoredJob when the job is finished
+
+        Return:
+            job -- MonitoredJob object
+        """
+        if not self._executor:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        future = self._executor.submit(run_tool, tool_name, args, kwargs, self.credentials)
+        return self.add(name, FutureResult(future), on_complete)
+
+    @property
+    def running_jobs(self) -> list:
+        return [job for job in self.jobs if not job.finished]
+
+    def poll(self) -> list:
+        """Update the status and messages of all running jobs once.
+
+        Return:
+            finished_jobs -- List with the jobs which have finished since the last poll
+        """
+        finished_jobs = []
+        changed = False
+        for job in self.running_jobs:
+            try:
+                status = job.result.status
+                # log new messages
+                message_count = getattr(job.result, 'messageCount', 0)
+                for index in range(len(job.messages), message_count):
+                    message = job.result.getMessage(index)
+                    severity = job.result.getSeverity(index) if hasattr(job.result, 'getSeverity') else 0
+                    job.messages.append(message)
+                    self._log(f'[{job.name}] {message}', severity)
+                    changed = True
+            except Exception as e:
+                status = 5 # Failed
+                job.error = e
+            if isinstance(job.result, FutureResult) and job.result.future.done() and job.result.future.exception():
+                job.error = job.result.future.exception()
+            if status != job.status:
+                job.status = status
+                changed = True
+            if status in FINISHED_STATUS:
+                job.end_time = time.time()
+                if job.error:
+                    self._log(f'[{job.name}] Job failed after {round(job.duration)} sec: {job.error}', 2)
+                else:
+                    self._log(f'[{job.name}] Job finished with status "{job.status_text}" in {round(job.duration)} sec',
+                              0 if job.succeeded else 2)
+                if job.on_complete:
+                    job.on_complete(job)
+                finished_jobs.append(job)
+        # adapt the poll interval
+        if changed:
+            self._interval = self.min_interval
+        else:
+            self._interval = min(self._interval * self.backoff, self.max_interval)
+        return finished_jobs
+
+    def _sleep(self):
+        # wake up early if a job running in a worker process finishes
+        futures = [job.result.future for job in self.running_jobs if isinstance(job.result, FutureResult)
+                   and not job.result.future.done()]
+        if futures and len(futures) == len(self.running_jobs):
+            wait(futures, timeout=self._interval, return_when=FIRST_COMPLETED)
+        else:
+            time.sleep(self._interval)
+
+    def wait(self, jobs = None, timeout = None) -> list:
+        """Wait until the specified jobs (default: all jobs) are finished.
+
+        Optional:
+            jobs -- List with MonitoredJob objects to wait for
+            timeout -- Maximum time to wait in seconds (default: no timeout)
+
+        Return:
+            jobs -- List with the jobs waited for
+        """
+        if jobs is None:
+            jobs = list(self.jobs)
+        deadline = time.time() + timeout if timeout else None
+        while True:
+            self.poll()
+            if all(job.finished for job in jobs):
+                return jobs
+            if deadline and time.time() >= deadline:
+                self._log(f'Timeout: {len([job for job in jobs if not job.finished])} jobs are not finished after {timeout} sec', 1)
+                return jobs
+            self._sleep()
+
+    def wait_any(self, timeout = None) -> list:
+        """Wait until at least one running job is finished.
+
+        Optional:
+            timeout -- Maximum time to wait in seconds (default: no timeout)
+
+        Return:
+            finished_jobs -- List with the jobs which have finished
+        """
+        deadline = time.time() + timeout if timeout else None
+        while self.running_jobs:
+            finished_jobs = self.poll()
+            if finished_jobs:
+                return finished_jobs
+            if deadline and time.time() >= deadline:
+                break
+            self._sleep()
+        return []
+
+    def shutdown(self):
+        """Release the worker processes."""
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def get_caching_capacity(server, logger = None) -> int:
+    """Get the number of instances of the caching tools service ("System/CachingTools")
+    which are available on all machines of the server.
+
+    Required:
+        server -- ArcGIS Server object (arcgis.gis.server.Server)
+
+    Optional:
+        logger -- Logger object
+
+    Return:
+        capacity -- Maximum number of caching service instances or None (if unknown)
+    """
+    try:
+        for service in server.services.list("System"):
+            if service.properties.serviceName == "CachingTools":
+                max_instances = int(service.properties.maxInstancesPerNode)
+                machines = len(server.machines.list())
+                return max_instances * max(machines, 1)
+    except Exception as e:
+        if logger:
+            logger.warning(f'The capacity of the caching tools could not be determined: {e}')
+    return None
+
+
+def get_max_parallel_jobs(num_of_caching_service_instances = None, capacity = None) -> int:
+    """Get the number of cache jobs which can be executed at the same time.
+
+    Optional:
+        num_of_caching_service_instances -- Number of instances used by one cache job
+        capacity -- Number of caching service instances on the server (see get_caching_capacity)
+
+    Return:
+        max_parallel_jobs -- Number of cache jobs (at least 1)
+    """
+    if not capacity:
+        return 1
+    if not num_of_caching_service_instances:
+        # a job uses all instances if the number is not specified
+        return 1
+    return max(1, int(capacity) // int(num_of_caching_service_instances))
+
+
+def order_scales(scales) -> list:
+    """Order the scales of a cache so that the jobs with the largest area in tiles are started first.
+    For the same extent, the number of tiles grows with the square of 1/scale.
+
+    Required:
+        scales -- List with the scales (e.g. ["25000", "10000", "5000"])
+
+    Return:
+        scales -- List with the ordered scales (e.g. ["5000", "10000", "25000"])
+    """
+    return sorted(scales, key=lambda scale: float(scale))
+
+
+def get_checkpoint_key(service_url, manage_cache, tiles_per_partition = None) -> str:
+    """Create a key for the checkpoint of a cache run. Only runs with the same service,
+    the same parameters (without the scales) and the same partitions can be resumed.
+
+    Required:
+        service_url -- Url of the map service
+        manage_cache -- Dictionary with the parameters for arcpy.server.ManageMapServerCacheTiles
+
+    Optional:
+        tiles_per_partition -- Number of tiles per side of a partition (the names of the partitions depend on it)
+
+    Return:
+        key -- Hash of the service url, the parameters and the size of the partitions
+    """
+    parameters = {key: value for key, value in manage_cache.items() if key != 'scales'}
+    key_parts = [service_url, parameters]
+    if tiles_per_partition:
+        key_parts.append(int(tiles_per_partition))
+    text = json.dumps(key_parts, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def load_checkpoint(checkpoint_file, key) -> list:
+    """Load the completed tasks (scales or partitions) of an earlier cache run.
+
+    Required:
+        checkpoint_file -- Path to the checkpoint file (JSON)
+        key -- Key of the cache run (see get_checkpoint_key)
+
+    Return:
+        completed -- List with the names of the completed tasks (empty if the run can not be resumed)
+    """
+    if not checkpoint_file or not os.path.isfile(checkpoint_file):
+        return []
+    try:
+        with open(checkpoint_file, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except ValueError:
+        return []
+    if checkpoint.get('key') != key:
+        return []
+    return checkpoint.get('completed', [])
+
+
+def save_checkpoint(checkpoint_file, key, completed) -> None:
+    """Save the completed tasks (scales or partitions) of a cache run.
+
+    Required:
+        checkpoint_file -- Path to the checkpoint file (JSON)
+        key -- Key of the cache run (see get_checkpoint_key)
+        completed -- List with the names of the completed tasks
+    """
+    temp_file = f'{checkpoint_file}.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump({'key': key, 'completed': completed, 'updated': time.ctime()}, f, indent=2)
+    os.replace(temp_file, checkpoint_file)
+
+
+def record_cache_timing(timings_file, record) -> None:
+    """Append the duration of a cache job to the timings file. The timings are used
+    to estimate the duration of future cache runs (see cache/estimate_cache.py).
+
+    Required:
+        timings_file -- Path to the timings file (JSON)
+        record -- Dictionary {"service_url": ..., "scale": ..., "tiles": ..., "seconds": ..., ...}
+    """
+    timings = []
+    if os.path.isfile(timings_file):
+        try:
+            with open(timings_file, encoding='utf-8') as f:
+                timings = json.load(f)
+        except ValueError:
+            timings = []
+    timings.append(record)
+    temp_file = f'{timings_file}.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(timings, f, indent=2)
+    os.replace(temp_file, timings_file)
+
+
+def run_cache_jobs(service_url, manage_cache, tasks, max_parallel_jobs = 1, max_retries = 0,
+                   checkpoint_file = None, timings_file = None, monitor = None, credentials = None,
+                   tiles_per_partition = None, logger = None) -> list:
+    """Run ManageMapServerCacheTiles jobs for a list of tasks (scale and optional extent) with
+    bounded concurrency. At most max_parallel_jobs jobs are running at the same time and failed
+    tasks are retried up to max_retries times. After every finished job the progress and the
+    estimated remaining time are logged. Completed tasks are written to a checkpoint file so
+    that a failed run can be resumed: tasks which are already completed are skipped.
+
+    Required:
+        service_url -- Url of the map service
+        manage_cache -- Dictionary with the parameters for arcpy.server.ManageMapServerCacheTiles (without "scales")
+        tasks -- List with dictionaries {"name": ..., "scale": ..., "update_extent": ... (optional), "tiles": ... (optional)}.
+                 The tasks are started in the order of the list.
+
+    Optional:
+        max_parallel_jobs -- Maximum number of jobs running at the same time
+        max_retries -- Number of times a failed task is started again
+        checkpoint_file -- Path to the checkpoint file (JSON). If not specified, no checkpoint is written.
+        timings_file -- Path to the file (JSON) in which the durations of the tasks with a number of tiles are recorded
+        monitor -- JobMonitor object (a new monitor is created if not specified)
+        credentials -- Credentials with which the worker processes of a new monitor sign in to the portal (see sif.sign_in)
+        tiles_per_partition -- Number of tiles per side of the partitions of the tasks (part of the checkpoint key)
+        logger -- Logger object
+
+    Return:
+        failed_tasks -- List with the names of the tasks which could not be completed
+    """
+    own_monitor = monitor is None
+    if own_monitor:
+        monitor = JobMonitor(logger=logger, max_workers=max_parallel_jobs, credentials=credentials)
+    key = get_checkpoint_key(service_url, manage_cache, tiles_per_partition)
+    completed = load_checkpoint(checkpoint_file, key)
+    pending_tasks = [task for task in tasks if task["name"] not in completed]
+    if completed:
+        lgf.log_message(f'Resume cache run, {len(completed)} tasks are already completed', logger)
+    total = len(pending_tasks)
+    durations = []
+    attempts = {}
+    failed_tasks = []
+
+    def on_complete(job):
+        task = job.task
+        if job.succeeded and not job.error:
+            completed.append(task["name"])
+            durations.append(job.duration)
+            if checkpoint_file:
+                save_checkpoint(checkpoint_file, key, completed)
+            if timings_file and task.get("tiles"):
+                record_cache_timing(timings_file, {"service_url": service_url, "scale": float(task["scale"]),
+                                                   "tiles": int(task["tiles"]), "seconds": round(job.duration, 3),
+                                                   "update_mode": manage_cache.get("update_mode"),
+                                                   "date": time.strftime("%Y-%m-%d %H:%M:%S")})
+            # progress and estimated remaining time
+            done = len(durations)
+            remaining = total - done - len(failed_tasks)
+            eta = sum(durations) / len(durations) * remaining / max_parallel_jobs
+            lgf.log_message(f'Progress: {done}/{total} tasks ({round(100 * done / total)}%), '
+                            f'estimated remaining time: {round(eta)} sec', logger)
+        elif attempts[task["name"]] <= max_retries:
+            lgf.log_message(f'Task "{task["name"]}" failed -> retry ({attempts[task["name"]]}/{max_retries})', logger, "warning")
+            pending_tasks.append(task)
+        else:
+            failed_tasks.append(task["name"])
+
+    running_jobs = []
+    while pending_tasks or running_jobs:
+        # submit new jobs as long as there are free slots
+        while pending_tasks and len(running_jobs) < max_parallel_jobs:
+            task = pending_tasks.pop(0)
+            attempts[task["name"]] = attempts.get(task["name"], 0) + 1
+            parameters = dict(manage_cache)
+            parameters["scales"] = float(task["scale"])
+            if task.get("update_extent"):
+                parameters["update_extent"] = task["update_extent"]
+                # the tiles are constrained by the extent of the task
+                parameters.pop("area_of_interest", None)
+            lgf.log_message(f'Create cache tiles for "{task["name"]}" - start time: {time.ctime()}', logger)
+            job = monitor.submit(f'ManageMapServerCacheTiles {task["name"]}', "server.ManageMapServerCacheTiles",
+                                 service_url, on_complete=on_complete, **parameters)
+            job.task = task
+            running_jobs.append(job)
+        # wait until a job is finished
+        running_jobs = [job for job in running_jobs if not job.finished]
+        if running_jobs:
+            monitor.wait_any()
+        running_jobs = [job for job in running_jobs if not job.finished]
+
+    if own_monitor:
+        monitor.shutdown()
+    if checkpoint_file and not failed_tasks and os.path.isfile(checkpoint_file):
+        # all tasks are completed -> the next run starts from the beginning
+        os.remove(checkpoint_file)
+    return failed_tasks
+
+
+def schedule_cache_scales(service_url, manage_cache, scales, max_parallel_jobs = 1, max_retries = 0,
+                          checkpoint_file = None, tiling_scheme = None, timings_file = None,
+                          monitor = None, credentials = None, logger = None) -> list:
+    """Create the cache tiles of several scales with concurrent ManageMapServerCacheTiles jobs
+    (one job per scale). The scales are ordered with the largest area in tiles first (see run_cache_jobs).
+
+    Required:
+        service_url -- Url of the map service
+        manage_cache -- Dictionary with the parameters for arcpy.server.ManageMapServerCacheTiles (without "scales")
+        scales -- List with the scales (e.g. ["25000", "10000", "5000"])
+
+    Optional:
+        max_parallel_jobs -- Maximum number of jobs running at the same time
+        max_retries -- Number of times a failed scale is started again
+        checkpoint_file -- Path to the checkpoint file (JSON). If not specified, no checkpoint is written.
+        tiling_scheme -- Dictionary with the tiling scheme (needed to record the timings per tile)
+        timings_file -- Path to the file (JSON) in which the durations per scale are recorded
+        monitor -- JobMonitor object (a new monitor is created if not specified)
+        credentials -- Credentials with which the worker processes of a new monitor sign in to the portal (see sif.sign_in)
+        logger -- Logger object
+
+    Return:
+        failed_scales -- List with the scales which could not be created
+    """
+    extent = None
+    if tiling_scheme:
+        extent, aoi_geometry = get_cache_extent(manage_cache)
+    tasks = []
+    for scale in order_scales(scales):
+        task = {"name": scale, "scale": scale}
+        if extent:
+            row_min, row_max, col_min, col_max = tsf.get_tile_range(extent, scale, tiling_scheme)
+            task["tiles"] = (row_max - row_min + 1) * (col_max - col_min + 1)
+        tasks.append(task)
+    return run_cache_jobs(service_url, manage_cache, tasks, max_parallel_jobs=max_parallel_jobs, max_retries=max_retries,
+                          checkpoint_file=checkpoint_file, timings_file=timings_file, monitor=monitor,
+                          credentials=credentials, logger=logger)
+
+
+def get_partition_size(tiles_per_partition) -> int:
+    """Get the number of tiles per side of a partition: rounded up to a multiple of the bundle size,
+    so that the partitions (see partition_extent) never share a bundle file.
+
+    Required:
+        tiles_per_partition -- Requested number of tiles per side of a partition
+
+    Return:
+        tiles_per_partition -- Number of tiles per side (multiple of BUNDLE_DIMENSION)
+    """
+    bundles = max(1, -(-int(tiles_per_partition) // BUNDLE_DIMENSION))
+    return bundles * BUNDLE_DIMENSION
+
+
+def partition_extent(extent, scale, tiling_scheme, tiles_per_partition, aoi_geometry = None) -> list:
+    """Split an extent into a grid of partitions which are aligned to the bundles of a scale.
+    The grid starts at a bundle boundary and each partition contains a block of up to
+    tiles_per_partition x tiles_per_partition tiles (rounded up to whole bundles, see
+    get_partition_size) -> concurrent jobs never write into the same bundle file. The extent
+    of a partition is shrunk by half a pixel, so that it does not touch the tiles of the
+    neighbouring partitions -> every tile is rendered by exactly one partition.
+
+    Required:
+        extent -- Tuple (xmin, ymin, xmax, ymax)
+        scale -- Scale (e.g. 25000)
+        tiling_scheme -- Dictionary with the tiling scheme (see tiling_scheme_functions.get_tiling_scheme)
+        tiles_per_partition -- Number of tiles per side of a partition
+
+    Optional:
+        aoi_geometry -- arcpy geometry (area of interest), partitions which do not intersect it are skipped
+
+    Return:
+        partitions -- List with dictionaries {"name": "R<row>C<col>", "extent": (xmin, ymin, xmax, ymax), "tiles": ...}
+    """
+    tiles_per_partition = get_partition_size(tiles_per_partition)
+    row_min, row_max, col_min, col_max = tsf.get_tile_range(extent, scale, tiling_scheme)
+    margin = tsf.get_resolution(scale, tiling_scheme) / 2
+    partitions = []
+    for grid_row in range(row_min - row_min % tiles_per_partition, row_max + 1, tiles_per_partition):
+        for grid_col in range(col_min - col_min % tiles_per_partition, col_max + 1, tiles_per_partition):
+            # tiles of the grid cell within the extent
+            block_row, block_col = max(grid_row, row_min), max(grid_col, col_min)
+            block_row_max = min(grid_row + tiles_per_partition - 1, row_max)
+            block_col_max = min(grid_col + tiles_per_partition - 1, col_max)
+            xmin, ymin, xmax, ymax = tsf.get_tile_extent(block_row, block_row_max, block_col, block_col_max, scale, tiling_scheme)
+            # shrink to the inside of the tiles and clip to the requested extent
+            partition = (max(xmin + margin, extent[0]), max(ymin + margin, extent[1]),
+                         min(xmax - margin, extent[2]), min(ymax - margin, extent[3]))
+            if aoi_geometry is not None:
+                if aoi_geometry.disjoint(arcpy.Extent(*partition, spatial_reference=aoi_geometry.spatialReference).polygon):
+                    continue
+            partitions.append({"name": f'R{block_row}C{block_col}', "extent": partition,
+                               "tiles": (block_row_max - block_row + 1) * (block_col_max - block_col + 1)})
+    return partitions
+
+
+def get_aoi(area_of_interest) -> tuple:
+    """Get the extent and the (dissolved) geometry of an area of interest feature class.
+
+    Required:
+        area_of_interest -- Path to the feature class with the area of interest
+
+    Return:
+        extent -- Tuple (xmin, ymin, xmax, ymax)
+        geometry -- arcpy geometry with all features of the feature class
+    """
+    geometry = None
+    with arcpy.da.SearchCursor(area_of_interest, ["SHAPE@"]) as cursor:
+        for row in cursor:
+            if row[0] is None:
+                continue
+            geometry = row[0] if geometry is None else geometry.union(row[0])
+    extent = arcpy.Describe(area_of_interest).extent
+    return (extent.XMin, extent.YMin, extent.XMax, extent.YMax), geometry
+
+
+def get_cache_extent(manage_cache) -> tuple:
+    """Get the extent for which the cache tiles are created.
+
+    Required:
+        manage_cache -- Dictionary with the parameters for arcpy.server.ManageMapServerCacheTiles
+
+    Return:
+        extent -- Tuple (xmin, ymin, xmax, ymax) of "area_of_interest" or "update_extent" (None if not specified)
+        aoi_geometry -- arcpy geometry of "area_of_interest" (None if not specified)
+    """
+    if manage_cache.get("area_of_interest"):
+        return get_aoi(manage_cache["area_of_interest"])
+    if manage_cache.get("update_extent"):
+        return tsf.parse_extent(manage_cache["update_extent"]), None
+    return None, None
+
+
+def schedule_cache_partitions(service_url, manage_cache, scales, tiling_scheme, tiles_per_partition,
+                              max_parallel_jobs = 1, max_retries = 0, checkpoint_file = None,
+                              timings_file = None, monitor = None, credentials = None, logger = None) -> list:
+    """Create the cache tiles of several scales with one ManageMapServerCacheTiles job per partition.
+    The extent ("update_extent" or the extent of "area_of_interest") is split into partitions which are
+    aligned to the tiles of each scale (see partition_extent). The partitions are executed as independent
+    jobs with bounded concurrency and only failed partitions are retried (see run_cache_jobs).
+
+    Required:
+        service_url -- Url of the map service
+        manage_cache -- Dictionary with the parameters for arcpy.server.ManageMapServerCacheTiles (without "scales")
+        scales -- List with the scales (e.g. ["25000", "10000", "5000"])
+        tiling_scheme -- Dictionary with the tiling scheme (see tiling_scheme_functions.get_tiling_scheme)
+        tiles_per_partition -- Number of tiles per side of a partition
+
+    Optional:
+        max_parallel_jobs -- Maximum number of jobs running at the same time
+        max_retries -- Number of times a failed partition is started again
+        checkpoint_file -- Path to the checkpoint file (JSON). If not specified, no checkpoint is written.
+        timings_file -- Path to the file (JSON) in which the durations per partition are recorded
+        monitor -- JobMonitor object (a new monitor is created if not specified)
+        credentials -- Credentials with which the worker processes of a new monitor sign in to the portal (see sif.sign_in)
+        logger -- Logger object
+
+    Return:
+        failed_partitions -- List with the names ("<scale>/R<row>C<col>") of the partitions which could not be created
+    """
+    extent, aoi_geometry = get_cache_extent(manage_cache)
+    if not extent:
+        raise ValueError('Partitioning the cache requires the parameter "update_extent" or "area_of_interest"!')
+    partition_size = get_partition_size(tiles_per_partition)
+    if partition_size != int(tiles_per_partition):
+        lgf.log_message(f'Partitions of {tiles_per_partition} tiles are rounded up to whole bundles: {partition_size} x '
+                        f'{partition_size} tiles', logger)
+    tasks = []
+    for scale in order_scales(scales):
+        partitions = partition_extent(extent, scale, tiling_scheme, partition_size, aoi_geometry)
+        lgf.log_message(f'Scale "{scale}": {len(partitions)} partitions with {sum(p["tiles"] for p in partitions)} tiles', logger)
+        for partition in partitions:
+            tasks.append({"name": f'{scale}/{partition["name"]}', "scale": scale, "tiles": partition["tiles"],
+                          "update_extent": tsf.format_extent(partition["extent"])})
+    return run_cache_jobs(service_url, manage_cache, tasks, max_parallel_jobs=max_parallel_jobs, max_retries=max_retries,
+                          checkpoint_file=checkpoint_file, timings_file=timings_file, monitor=monitor,
+                          credentials=credentials, tiles_per_partition=partition_size, logger=logger)
+
+
+def get_change_sources(layers) -> list:
+    """Get the data sources with editor tracking of layers (e.g. the layers of a published map).
+    The date of the last edit of every feature is used to find the changed features (see get_changed_extents).
+    Editor tracking only knows the current geometry of the existing features: deleted features and the old
+    position of moved features are not found (use a change table for these changes).
+
+    Required:
+        layers -- List with arcpy.mp layer objects
+
+    Return:
+        sources -- List with dictionaries {"data": ..., "date_field": ..., "time_in_utc": True/False, "editor_tracking": True}
+    """
+    sources = []
+    data_sources = set()
+    for layer in layers:
+        if not layer.isFeatureLayer or not layer.supports("DATASOURCE") or layer.dataSource in data_sources:
+            continue
+        data_sources.add(layer.dataSource)
+        desc = arcpy.Describe(layer.dataSource)
+        if getattr(desc, "editorTrackingEnabled", False) and desc.editedAtFieldName:
+            sources.append({"data": layer.dataSource, "date_field": desc.editedAtFieldName,
+                            "time_in_utc": bool(desc.isTimeInUTC), "editor_tracking": True})
+    return sources
+
+
+def get_date_where_clause(data, date_field, since) -> str:
+    """Get a where clause which selects the rows with a date after a point in time. The syntax of
+    the date depends on the database of the data.
+
+    Required:
+        data -- Path to the feature class or table
+        date_field -- Name of the date field
+        since -- Point in time (datetime)
+
+    Return:
+        where_clause -- Where clause (e.g. "last_edited_date > date '2026-10-18 22:00:00'")
+    """
+    field = arcpy.AddFieldDelimiters(data, date_field)
+    timestamp = since.strftime("%Y-%m-%d %H:%M:%S")
+    workspace = arcpy.Describe(data).path
+    if arcpy.Describe(workspace).dataType == "FeatureDataset":
+        workspace = os.path.dirname(workspace)
+    desc = arcpy.Describe(workspace)
+    if desc.workspaceType == "RemoteDatabase":
+        dbclient = desc.connectionProperties.dbclient.lower()
+        if "oracle" in dbclient:
+            return f"{field} > TO_DATE('{timestamp}', 'YYYY-MM-DD HH24:MI:SS')"
+        return f"{field} > '{timestamp}'"
+    return f"{field} > date '{timestamp}'"
+
+
+def get_changed_extents(sources, since, since_utc, spatial_reference = None, buffer = 0, logger = None) -> list:
+    """Get the extents of the features which were changed after a point in time.
+
+    Required:
+        sources -- List with dictionaries {"data": ..., "date_field": ..., "time_in_utc": True/False,
+                   "where_clause": ... (optional), "old_shape_field": ... (optional)} (see get_change_sources).
+                   A change table (e.g. filled by an attribute rule on insert, update and delete) is used in the
+                   same way: the geometry of a row is the new geometry (or the geometry of the deleted feature)
+                   and the text field "old_shape_field" holds the old geometry of an update as Esri JSON
+                   (e.g. Text(Geometry($originalFeature)) in Arcade).
+        since -- Point in time in local time (datetime)
+        since_utc -- The same point in time in UTC (datetime), used for the sources with "time_in_utc"
+
+    Optional:
+        spatial_reference -- arcpy SpatialReference of the cache (the extents are projected)
+        buffer -- Distance in the units of the spatial reference by which the extents are enlarged (e.g. for symbols and labels)
+        logger -- Logger object
+
+    Return:
+        extents -- List with tuples (xmin, ymin, xmax, ymax)
+    """
+    extents = []
+    for source in sources:
+        where_clause = get_date_where_clause(source["data"], source["date_field"],
+                                             since_utc if source.get("time_in_utc") else since)
+        if source.get("where_clause"):
+            where_clause = f'({where_clause}) AND ({source["where_clause"]})'
+        fields = ["SHAPE@"]
+        if source.get("old_shape_field"):
+            fields.append(source["old_shape_field"])
+        count = 0
+        with arcpy.da.SearchCursor(source["data"], fields, where_clause=where_clause,
+                                   spatial_reference=spatial_reference) as cursor:
+            for row in cursor:
+                geometries = [row[0]]
+                if len(row) > 1 and row[1]:
+                    # old geometry of an update (e.g. the old position of a moved feature)
+                    old_geometry = arcpy.AsShape(json.loads(row[1]), True)
+                    if spatial_reference and old_geometry.spatialReference and \
+                            old_geometry.spatialReference.factoryCode != spatial_reference.factoryCode:
+                        old_geometry = old_geometry.projectAs(spatial_reference)
+                    geometries.append(old_geometry)
+                for geometry in geometries:
+                    if geometry is None:
+                        continue
+                    extent = geometry.extent
+                    extents.append((extent.XMin - buffer, extent.YMin - buffer, extent.XMax + buffer, extent.YMax + buffer))
+                count += 1
+        lgf.log_message(f'{count} changed features in "{source["data"]}"', logger)
+    return extents
+
+
+def get_change_tasks(extents, scales, tiling_scheme, max_gap = 0) -> list:
+    """Get the tasks (see run_cache_jobs) which update the tiles of changed extents. The extents are
+    snapped to the tiles of every scale and overlapping or neighbouring blocks of tiles are merged, so that
+    every changed tile is created exactly once.
+
+    Required:
+        extents -- List with tuples (xmin, ymin, xmax, ymax) (see get_changed_extents)
+        scales -- List with the scales (e.g. ["25000", "10000", "5000"])
+        tiling_scheme -- Dictionary with the tiling scheme (see tiling_scheme_functions.get_tiling_scheme)
+
+    Optional:
+        max_gap -- Blocks of tiles which are at most max_gap tiles apart are merged into one task
+
+    Return:
+        tasks -- List with dictionaries {"name": "<scale>/R<row>C<col>", "scale": ..., "update_extent": ..., "tiles": ...}
+    """
+    tasks = []
+    if not extents:
+        return tasks
+    for scale in order_scales(scales):
+        tile_ranges = [tsf.get_tile_range(extent, scale, tiling_scheme) for extent in extents]
+        for tile_range in tsf.merge_tile_ranges(tile_ranges, max_gap):
+            tasks.append({"name": f'{scale}/R{tile_range[0]}C{tile_range[2]}', "scale": scale,
+                          "update_extent": tsf.format_extent(tsf.get_block_extent(tile_range, float(scale), tiling_scheme)),
+                          "tiles": (tile_range[1] - tile_range[0] + 1) * (tile_range[3] - tile_range[2] + 1)})
+    return tasks
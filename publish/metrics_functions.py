@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: metrics_functions
+#
+# Purpose: Custom functions to measure the phases of a publish run (duration,
+# REST calls, sizes) and to export them as JSON or Prometheus textfile.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, json, time, threading
+from contextlib import contextmanager
+
+## globale variables
+# methods of the connection of the ArcGIS API for Python which are counted as REST calls
+REST_METHODS = ["get", "post"]
+# prefix of the Prometheus metrics
+PROMETHEUS_PREFIX = "arcgis_publish"
+
+
+class PublishMetrics:
+    """Metrics of a published service: the duration and the number of REST calls of every
+    phase (e.g. "draft", "staging", "upload") and further values (e.g. "sd_bytes").
+
+    Required:
+        service_name -- Name of the service
+
+    Optional:
+        stage -- Stage of the service (e.g. "TEST", "PROD")
+    """
+    # metrics for which the REST calls are counted (see activate and count_rest_calls)
+    active = None
+
+    def __init__(self, service_name, stage = None):
+        self.service_name = service_name
+        self.stage = stage
+        self.started = time.time()
+        self.phases = {}
+        self.values = {}
+        self.rest_calls = {}
+        self._lock = threading.Lock()
+
+    def activate(self) -> None:
+        """Count the REST calls of all connections (see count_rest_calls) for this service."""
+        PublishMetrics.active = self
+
+    def add_rest_call(self, method) -> None:
+        with self._lock:
+            self.rest_calls[method] = self.rest_calls.get(method, 0) + 1
+
+    def total_rest_calls(self) -> int:
+        with self._lock:
+            return sum(self.rest_calls.values())
+
+    @contextmanager
+    def span(self, phase):
+        """Measure a phase (context manager). The duration and the REST calls of a phase which
+        is measured several times are added up.
+
+        Required:
+            phase -- Name of the phase (e.g. "upload")
+        """
+        start = time.perf_counter()
+        rest_calls = self.total_rest_calls()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            rest_calls = self.total_rest_calls() - rest_calls
+            with self._lock:
+                result = self.phases.setdefault(phase, {"seconds": 0.0, "rest_calls": 0})
+                result["seconds"] = round(result["seconds"] + time.perf_counter() - start, 3)
+                result["rest_calls"] += rest_calls
+                if failed:
+                    result["failed"] = True
+
+    def set_value(self, name, value) -> None:
+        """Set a value of the service (e.g. "sd_bytes")."""
+        self.values[name] = value
+
+    def to_dict(self) -> dict:
+        """Get the metrics as dictionary (JSON)."""
+        return {"service": self.service_name,
+                "stage": self.stage,
+                "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+                "seconds": round(time.time() - self.started, 3),
+                "phases": self.phases,
+                "values": self.values,
+                "rest_calls": dict(self.rest_calls)}
+
+    def write_json(self, file) -> None:
+        """Write the metrics to a JSON file.
+
+        Required:
+            file -- Path to the JSON file
+        """
+        with open(file, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+
+def count_rest_calls(gis) -> None:
+    """Count the REST calls of a GIS object (ArcGIS API for Python) for the active metrics
+    (see PublishMetrics.activate). The connection is wrapped only once.
+
+    Required:
+        gis -- GIS object
+    """
+    con = getattr(gis, "_con", None)
+    if con is None or getattr(con, "_rest_calls_counted", False):
+        return
+    for method in REST_METHODS:
+        function = getattr(con, method, None)
+        if function is None:
+            continue
+        def counted(*args, _function=function, _method=method, **kwargs):
+            if PublishMetrics.active:
+                PublishMetrics.active.add_rest_call(_method)
+            return _function(*args, **kwargs)
+        setattr(con, method, counted)
+    con._rest_calls_counted = True
+
+
+def aggregate_metrics(metrics_list) -> dict:
+    """Aggregate the metrics of several services.
+
+    Required:
+        metrics_list -- List with the metrics of every service (see PublishMetrics.to_dict)
+
+    Return:
+        aggregate -- Dictionary with "services", "seconds", "phases" ({phase: {"seconds", "rest_calls",
+                     "services", "max_seconds"}}), "values" (sums) and "rest_calls"
+    """
+    aggregate = {"services": len(metrics_list), "seconds": 0.0, "phases": {}, "values": {}, "rest_calls": {}}
+    for metrics in metrics_list:
+        aggregate["seconds"] = round(aggregate["seconds"] + metrics["seconds"], 3)
+        for phase, result in metrics["phases"].items():
+            total = aggregate["phases"].setdefault(phase, {"seconds": 0.0, "rest_calls": 0, "services": 0, "max_seconds": 0.0})
+            total["seconds"] = round(total["seconds"] + result["seconds"], 3)
+            total["rest_calls"] += result["rest_calls"]
+            total["services"] += 1
+            total["max_seconds"] = max(total["max_seconds"], result["seconds"])
+        for name, value in metrics["values"].items():
+            if isinstance(value, (int, float)):
+                aggregate["values"][name] = aggregate["values"].get(name, 0) + value
+        for method, calls in metrics["rest_calls"].items():
+            aggregate["rest_calls"][method] = aggregate["rest_calls"].get(method, 0) + calls
+    return aggregate
+
+
+def format_aggregate(aggregate) -> list:
+    """Get readable lines of aggregated metrics (see aggregate_metrics), e.g. for the overall log file."""
+    lines = [f'{aggregate["services"]} services in {round(aggregate["seconds"])} sec']
+    for phase, total in sorted(aggregate["phases"].items(), key=lambda phase: -phase[1]["seconds"]):
+        lines.append(f'{phase}: {round(total["seconds"], 1)} sec (max {round(total["max_seconds"], 1)} sec, '
+                     f'{total["services"]} services, {total["rest_calls"]} REST calls)')
+    for name, value in aggregate["values"].items():
+        lines.append(f'{name}: {value}')
+    lines.append(f'REST calls: {sum(aggregate["rest_calls"].values())} {aggregate["rest_calls"]}')
+    return lines
+
+
+def escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def write_prometheus_textfile(metrics_list, file) -> None:
+    """Write the metrics of several services to a Prometheus textfile (e.g. for the textfile
+    collector of the node exporter). The file is replaced atomically.
+
+    Required:
+        metrics_list -- List with the metrics of every service (see PublishMetrics.to_dict)
+        file -- Path to the textfile (*.prom)
+    """
+    lines = [f'# HELP {PROMETHEUS_PREFIX}_duration_seconds Duration of the publishing of a service.',
+             f'# TYPE {PROMETHEUS_PREFIX}_duration_seconds gauge']
+    for metrics in metrics_list:
+        labels = f'service="{escape_label(metrics["service"])}",stage="{escape_label(metrics["stage"] or "")}"'
+        lines.append(f'{PROMETHEUS_PREFIX}_duration_seconds{{{labels}}} {metrics["seconds"]}')
+    lines += [f'# HELP {PROMETHEUS_PREFIX}_phase_duration_seconds Duration of a phase of the publishing of a service.',
+              f'# TYPE {PROMETHEUS_PREFIX}_phase_duration_seconds gauge']
+    for metrics in metrics_list:
+        labels = f'service="{escape_label(metrics["service"])}",stage="{escape_label(metrics["stage"] or "")}"'
+        for phase, result in metrics["phases"].items():
+            lines.append(f'{PROMETHEUS_PREFIX}_phase_duration_seconds{{{labels},phase="{escape_label(phase)}"}} {result["seconds"]}')
+    lines += [f'# HELP {PROMETHEUS_PREFIX}_rest_calls Number of REST calls of the publishing of a service.',
+              f'# TYPE {PROMETHEUS_PREFIX}_rest_calls gauge']
+    for metrics in metrics_list:
+        labels = f'service="{escape_label(metrics["service"])}",stage="{escape_label(metrics["stage"] or "")}"'
+        for method, calls in metrics["rest_calls"].items():
+            lines.append(f'{PROMETHEUS_PREFIX}_rest_calls{{{labels},method="{escape_label(method)}"}} {calls}')
+    names = sorted({name for metrics in metrics_list for name, value in metrics["values"].items()
+                    if isinstance(value, (int, float))})
+    for name in names:
+        lines += [f'# TYPE {PROMETHEUS_PREFIX}_{name} gauge']
+        for metrics in metrics_list:
+            if name in metrics["values"]:
+                labels = f'service="{escape_label(metrics["service"])}",stage="{escape_label(metrics["stage"] or "")}"'
+                lines.append(f'{PROMETHEUS_PREFIX}_{name}{{{labels}}} {metrics["values"][name]}')
+    lines += [f'# TYPE {PROMETHEUS_PREFIX}_last_run_timestamp_seconds gauge',
+              f'{PROMETHEUS_PREFIX}_last_run_timestamp_seconds {round(time.time())}']
+    temp_file = f'{file}.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(temp_file, file)
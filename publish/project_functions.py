@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: project_functions
+#
+# Purpose: Custom functions to reuse opened ArcGIS Pro projects (aprx) when
+# several services of the same project are published in one run.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os
+import arcpy
+
+
+class ProjectCache:
+    """Cache for opened ArcGIS Pro projects. A project is opened only once per process and
+    reused as long as the aprx file is not modified (the cache is keyed by path and modification
+    time). The maps, layers and tables of a project are indexed by their names.
+
+    Optional:
+        logger -- Logger object (if not specified, messages are printed)
+    """
+    def __init__(self, logger = None):
+        self.logger = logger
+        # {path: {"mtime": ..., "aprx": ..., "maps": {name: map}, "layers": {map name: {name: layer}}, "tables": {...}}}
+        self._projects = {}
+
+    def _log(self, message) -> None:
+        if self.logger:
+            self.logger.info(message)
+        else:
+            print(message)
+
+    def get_project(self, aprx_file):
+        """Get an opened ArcGIS Pro project. The project is opened again if the aprx file
+        has changed since it was opened.
+
+        Required:
+            aprx_file -- Path to the ArcGIS Pro project (aprx)
+
+        Return:
+            aprx -- ArcGISProject object
+        """
+        return self._get_entry(aprx_file)["aprx"]
+
+    def _get_entry(self, aprx_file) -> dict:
+        path = os.path.normcase(os.path.abspath(aprx_file))
+        mtime = os.path.getmtime(path)
+        entry = self._projects.get(path)
+        if entry and entry["mtime"] == mtime:
+            return entry
+        if entry:
+            self._log(f'The aprx "{aprx_file}" has changed -> load the project again')
+            self.release(aprx_file)
+        self._log(f'Load arcgis pro project "{aprx_file}"')
+        entry = {"mtime": mtime, "aprx": arcpy.mp.ArcGISProject(aprx_file), "maps": None, "layers": {}, "tables": {}}
+        self._projects[path] = entry
+        return entry
+
+    def get_map(self, aprx_file, map_name):
+        """Get a map of an ArcGIS Pro project by its name.
+
+        Required:
+            aprx_file -- Path to the ArcGIS Pro project (aprx)
+            map_name -- Name of the map
+
+        Return:
+            map -- Map object or None (if the map does not exist)
+        """
+        entry = self._get_entry(aprx_file)
+        if entry["maps"] is None:
+            entry["maps"] = {m.name: m for m in entry["aprx"].listMaps()}
+        return entry["maps"].get(map_name)
+
+    def get_layer(self, aprx_file, map_name, layer_name):
+        """Get a layer of a map by its name (including the layers in group layers).
+
+        Required:
+            aprx_file -- Path to the ArcGIS Pro project (aprx)
+            map_name -- Name of the map
+            layer_name -- Name of the layer
+
+        Return:
+            layer -- Layer object or None (if the map or the layer does not exist)
+        """
+        m = self.get_map(aprx_file, map_name)
+        if m is None:
+            return None
+        layers = self._get_entry(aprx_file)["layers"]
+        if map_name not in layers:
+            layers[map_name] = {layer.name: layer for layer in m.listLayers()}
+        return layers[map_name].get(layer_name)
+
+    def get_table(self, aprx_file, map_name, table_name):
+        """Get a standalone table of a map by its name.
+
+        Required:
+            aprx_file -- Path to the ArcGIS Pro project (aprx)
+            map_name -- Name of the map
+            table_name -- Name of the table
+
+        Return:
+            table -- Table object or None (if the map or the table does not exist)
+        """
+        m = self.get_map(aprx_file, map_name)
+        if m is None:
+            return None
+        tables = self._get_entry(aprx_file)["tables"]
+        if map_name not in tables:
+            tables[map_name] = {table.name: table for table in m.listTables()}
+        return tables[map_name].get(table_name)
+
+    def release(self, aprx_file) -> None:
+        """Release an ArcGIS Pro project (e.g. before the aprx file is modified).
+
+        Required:
+            aprx_file -- Path to the ArcGIS Pro project (aprx)
+        """
+        entry = self._projects.pop(os.path.normcase(os.path.abspath(aprx_file)), None)
+        if entry:
+            del entry["aprx"]
+
+    def clear(self) -> None:
+        """Release all ArcGIS Pro projects."""
+        for path in list(self._projects):
+            self.release(path)
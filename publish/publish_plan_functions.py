@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: publish_plan_functions
+#
+# Purpose: Custom functions to compare a published service and its portal items
+# with the parameters of a JSON file and to plan the minimal operations
+# (instead of republishing every service).
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, sys, json, time, hashlib
+import service_management_functions as smf
+# python Skript with my own logging functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'common'))
+import logging_functions as lgf
+
+## globale variables
+# parameters of the JSON file which do not change the service definition (applied without republishing),
+# a changed "manage_cache" republishes the service and creates the cache again (no plan operation for the cache)
+NON_SOURCE_PARAMETERS = frozenset(["metadata", "share", "enable_extensions", "portal_folder",
+                                   "sign_in_user", "cert_file", "key_file", "log_folder", "service_ready_timeout",
+                                   "group_cache_ttl"])
+# item properties which are compared with the parameter "metadata"
+METADATA_PROPERTIES = ["accessInformation", "description", "snippet", "tags", "licenseInfo"]
+
+
+def get_source_hash(aprx_file, data) -> str:
+    """Get a hash of the source of a service: the ArcGIS Pro project and all parameters of the JSON file
+    which change the service definition.
+
+    Required:
+        aprx_file -- Path to the ArcGIS Pro project (aprx)
+        data -- Dictionary with the parameters of the JSON file
+
+    Return:
+        source_hash -- Hash (hex string)
+    """
+    source_hash = hashlib.sha256()
+    with open(aprx_file, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            source_hash.update(block)
+    parameters = {key: value for key, value in data.items() if key not in NON_SOURCE_PARAMETERS}
+    source_hash.update(json.dumps(parameters, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    # OGC extensions are enabled after publishing, all other extensions are part of the service definition
+    extensions = sorted(extension for extension in data.get("enable_extensions") or [] if extension not in smf.OGC_EXTENSIONS)
+    source_hash.update(json.dumps(extensions).encode('utf-8'))
+    return source_hash.hexdigest()
+
+
+def read_state(state_file) -> dict:
+    """Read the publish state of a service (written by write_state after publishing).
+
+    Required:
+        state_file -- Path to the state file (JSON)
+
+    Return:
+        state -- Dictionary with "source_hash", "service_url" and "published" (empty if there is no state file)
+    """
+    if not os.path.isfile(state_file):
+        return {}
+    with open(state_file, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_state(state_file, source_hash, service_url) -> None:
+    """Write the publish state of a service.
+
+    Required:
+        state_file -- Path to the state file (JSON)
+        source_hash -- Hash of the source (see get_source_hash)
+        service_url -- URL of the published service
+    """
+    state = {"source_hash": source_hash, "service_url": service_url, "published": time.ctime()}
+    temp_file = f'{state_file}.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(temp_file, state_file)
+
+
+def split_values(values) -> set:
+    """Get a set of the values of a comma separated string or a list (e.g. tags, capabilities)."""
+    if values is None:
+        return set()
+    if isinstance(values, str):
+        values = values.split(',')
+    return {str(value).strip().lower() for value in values if str(value).strip()}
+
+
+def get_live_items(gis, service) -> list:
+    """Get the current state of the portal items of a published service.
+
+    Required:
+        gis -- GIS object of the portal
+        service -- ArcGIS Server service object (arcgis.gis.server.Service)
+
+    Return:
+        items -- List with dictionaries {"item": item, "folder": folder id, "properties": {...},
+                 "everyone": ..., "org": ..., "groups": set with group ids}
+    """
+    portal_items = service.properties.get("portalProperties", {}).get("portalItems", [])
+    items = smf.get_items(gis, [portal_item["itemID"] for portal_item in portal_items])
+    live_items = []
+    for item in items.values():
+        shared_with = item.shared_with
+        live_items.append({"item": item,
+                           "folder": item.ownerFolder,
+                           "properties": {key: item[key] for key in METADATA_PROPERTIES},
+                           "everyone": bool(shared_with.get("everyone")),
+                           "org": bool(shared_with.get("org")),
+                           "groups": {group.id for group in shared_with.get("groups", [])}})
+    return live_items
+
+
+def plan_service(service, live_items, source_hash, state, map_service_web_capabilities = None,
+                 enable_extensions = None, item_properties = None, share = None, folder_id = None) -> list:
+    """Compare a published service and its portal items with the parameters of the JSON file and
+    plan the minimal operations.
+
+    Required:
+        service -- ArcGIS Server service object (None if the service does not exist)
+        live_items -- List with the current state of the portal items (see get_live_items)
+        source_hash -- Hash of the source (see get_source_hash)
+        state -- Publish state of the last run (see read_state)
+
+    Optional:
+        map_service_web_capabilities -- Expected capabilities of the map service (e.g. "Map,Query,Data")
+        enable_extensions -- List with the expected extensions
+        item_properties -- Expected item properties (see service_management_functions.convert_metadata)
+        share -- Expected sharing {"everyone": ..., "org": ..., "groups": [group ids]}
+        folder_id -- Id of the expected portal folder
+
+    Return:
+        operations -- List with the operations, e.g. [{"operation": "publish", "reason": ...}] or
+                      [{"operation": "update_metadata", "items": [...]}, {"operation": "share", "items": [...]}]
+    """
+    if service is None:
+        return [{"operation": "publish", "reason": "the service does not exist"}]
+    if state.get("source_hash") != source_hash:
+        reason = "no publish state of an earlier run" if not state else "the source (aprx or parameters) has changed"
+        return [{"operation": "publish", "reason": reason}]
+    service_data = service.properties
+    if map_service_web_capabilities and split_values(service_data.get("capabilities")) != split_values(map_service_web_capabilities):
+        return [{"operation": "publish", "reason": f'the capabilities are "{service_data.get("capabilities")}"'}]
+    enabled = smf.get_enabled_extensions(service)
+    missing = [extension for extension in enable_extensions or [] if extension not in enabled]
+    if [extension for extension in missing if extension not in smf.OGC_EXTENSIONS]:
+        return [{"operation": "publish", "reason": f'the extensions {missing} are not enabled'}]
+    if not live_items:
+        return [{"operation": "publish", "reason": "the service has no portal items"}]
+
+    operations = []
+    if missing:
+        operations.append({"operation": "enable_extensions", "extensions": missing})
+    move_items, metadata_items, share_items = [], [], []
+    for live_item in live_items:
+        if folder_id and live_item["folder"] != folder_id:
+            move_items.append(live_item["item"])
+        if item_properties:
+            for key in METADATA_PROPERTIES:
+                if key not in item_properties:
+                    continue
+                if key == "tags":
+                    different = split_values(live_item["properties"][key]) != split_values(item_properties[key])
+                else:
+                    different = (live_item["properties"][key] or "") != (item_properties[key] or "")
+                if different:
+                    metadata_items.append(live_item["item"])
+                    break
+        if share and (live_item["everyone"] != share["everyone"] or live_item["org"] != share["org"]
+                      or not set(share["groups"] or []) <= live_item["groups"]):
+            share_items.append(live_item["item"])
+    if move_items:
+        operations.append({"operation": "move", "items": move_items})
+    if metadata_items:
+        operations.append({"operation": "update_metadata", "items": metadata_items})
+    if share_items:
+        operations.append({"operation": "share", "items": share_items})
+    return operations
+
+
+def format_operation(operation) -> str:
+    """Get a readable description of a planned operation (see plan_service)."""
+    if operation["operation"] == "publish":
+        return f'publish ({operation["reason"]})'
+    if operation["operation"] == "enable_extensions":
+        return f'enable extensions {operation["extensions"]}'
+    titles = ", ".join(f'"{item.title}" ({item.type})' for item in operation["items"])
+    return f'{operation["operation"].replace("_", " ")}: {titles}'
+
+
+def apply_plan(service, operations, folder = None, owner = None, item_properties = None, share = None,
+               state = "STARTED", timeout = smf.SERVICE_READY_TIMEOUT, logger = None) -> list:
+    """Apply the planned operations (except "publish") to a service and its portal items.
+
+    Required:
+        service -- ArcGIS Server service object (arcgis.gis.server.Service)
+        operations -- List with the operations (see plan_service)
+
+    Optional:
+        folder, owner, item_properties, share -- Parameters of the operations (see
+                                                 service_management_functions.finalize_item)
+        state -- Expected real time state of the service after enabling extensions
+        timeout -- Maximum time to wait for the service in seconds
+        logger -- Logger object (if not specified, messages are printed)
+
+    Return:
+        timings -- List with the timings of every item (see service_management_functions.finalize_items)
+    """
+    item_steps = {}
+    for operation in operations:
+        if operation["operation"] == "enable_extensions":
+            if not smf.enable_ogc_extensions(service, operation["extensions"], state, timeout, logger):
+                lgf.log_message(f'The extensions {operation["extensions"]} are not ready after {timeout} sec', logger, "error")
+        elif operation["operation"] in ["move", "update_metadata", "share"]:
+            for item in operation["items"]:
+                item_steps.setdefault(item.id, (item, set()))[1].add(operation["operation"])
+    # items with the same steps are processed concurrently
+    groups = {}
+    for item, steps in item_steps.values():
+        groups.setdefault(frozenset(steps), []).append(item)
+    timings = []
+    for steps, items in groups.items():
+        timings.extend(smf.finalize_items(items, folder if "move" in steps else None, owner,
+                                          item_properties if "update_metadata" in steps else None,
+                                          share if "share" in steps else None, logger=logger))
+    return timings
@@ -14,42 +14,19 @@ import arcgis
 from getpass import getpass
 import xml.dom.minidom as DOM
 from IPython.display import display
-
-def init_logging(file)  -> None:
-    """Initialises logging to a file and on the console.
-
-    Required:
-        file -- The path to the log file.
-    """
-    global logger
-    logger = logging.getLogger('myapp')
-    # logging to file
-    hdlr = logging.FileHandler(file, mode='w')
-    formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
-    hdlr.setFormatter(formatter)
-    logger.addHandler(hdlr)
-    # logging to console
-    consoleHandler = logging.StreamHandler()
-    consoleHandler.setFormatter(formatter)
-    logger.addHandler(consoleHandler)
-    logger.setLevel(logging.INFO)
-
-def search(file, text) -> int:
-    """Search for a specific string in a file.
-
-    Required:
-        file -- The path to the file (e.g. log file).
-        text -- The string which is to be searched for.
-
-    Return:
-        cnt -- The number of occurrences of the string in the file.
-    """
-    cnt = 0
-    with open(file) as f:
-        for line in f:
-            if text in line.lower():
-                cnt=cnt+1
-        return cnt
+# python Skript with my own service management functions
+import service_management_functions as smf
+import cache_management_functions as cmf
+import tiling_scheme_functions as tsf
+# python Skript with my own portal management functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'migrate'))
+import portal_management_functions as pmf
+import publish_plan_functions as ppf
+import project_functions as prf
+import metrics_functions as mtf
+# python Skript with my own logging functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'common'))
+import logging_functions as lgf
 
 def create_folder(folder_path) -> None:
     """Creates a folder if it does not already exist.
@@ -67,15 +44,42 @@ def create_folder(folder_path) -> None:
 
 if __name__ == "__main__":
     # path to a JSON input file or multiple JSON files
-    paramFiles = sys.argv[1:]
+    paramFiles = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    # option "--metrics-textfile=<file>": write the metrics of all services to a Prometheus textfile
+    metrics_textfile = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--metrics-textfile='):
+            metrics_textfile = arg.split('=', 1)[1]
+    # option "--plan": compare the published services with the JSON files and only republish if the source has changed,
+    # otherwise apply only the necessary changes (metadata, sharing, portal folder, ogc extensions)
+    # option "--dry-run": only log the planned operations (implies "--plan")
+    dry_run = "--dry-run" in sys.argv[1:]
+    plan_mode = "--plan" in sys.argv[1:] or dry_run
     #paramFiles = [r"K:\GIS_ADMIN\CITYMAPS_MASTER\Publish\Portal\tutorial\publish_citymaps_cache_predefined_test.json"]
 
     # path to the overall log file if there is more than one json input file (stored in the folder "Logs" in the directory of the Python script).
     overall_log_folder = os.path.join(os.path.dirname(__file__), "Logs")
+    # the logs of all json files are streamed into the overall log file while they are written
+    overall_log = None
+    if len(paramFiles) > 1:
+        # create overall logfolder
+        create_folder(overall_log_folder)
+        now = datetime.datetime.now()
+        timestamp_str = now.strftime("%Y-%m-%d_%H-%M-%S")
+        overall_log = lgf.open_overall_log(os.path.join(overall_log_folder, f'publish_services_{timestamp_str}.log'))
 
     count = 0
     portal_url_old =  None
     log_files = []
+    metrics_list = []
+    # resolvers for the servers and services of every portal (cached for all json files)
+    service_resolvers = {}
+    # resolvers for the groups of every portal (cached on disk for further runs)
+    group_resolvers = {}
+    # folders of the signed in user of every portal (loaded once per run)
+    folder_caches = {}
+    # opened ArcGIS Pro projects (reused for all json files with the same aprx)
+    project_cache = prf.ProjectCache(logging.getLogger('myapp'))
     total_warnings = 0
     total_errors = 0
     for paramFile in paramFiles:
@@ -170,6 +174,14 @@ if __name__ == "__main__":
                     in_startupType = data["in_startupType"]
                 else:
                     in_startupType =  "STARTED" #default
+                if "service_ready_timeout" in data:
+                    service_ready_timeout = int(data["service_ready_timeout"])
+                else:
+                    service_ready_timeout = smf.SERVICE_READY_TIMEOUT #default
+                if "group_cache_ttl" in data:
+                    group_cache_ttl = int(data["group_cache_ttl"])
+                else:
+                    group_cache_ttl = pmf.GROUP_CACHE_TTL #default
                 if "share" in data:
                     share = data["share"]
                     share.setdefault("in_override", "OVERRIDE_DEFINITION") #default
@@ -203,6 +215,8 @@ if __name__ == "__main__":
                     metadata.setdefault("summary", "") #default
                     metadata.setdefault("tags", "") #default
                     metadata.setdefault("use_limitations", "") #default
+                else:
+                    metadata = None
                 if "enable_cache" in data:
                     enable_cache = data["enable_cache"]
                     enable_cache.setdefault("service_cache_directory", "D:/arcgisserver/directories/arcgiscache") #default
@@ -222,6 +236,23 @@ if __name__ == "__main__":
                 if "manage_cache" in data:
                     manage_cache = data["manage_cache"]
                     manage_cache.setdefault("update_mode", "RECREATE_ALL_TILES") #default
+                    # settings for scheduling the cache jobs (no parameters of arcpy.server.ManageMapServerCacheTiles)
+                    if "max_parallel_jobs" in manage_cache:
+                        max_parallel_jobs = int(manage_cache.pop("max_parallel_jobs"))
+                    else:
+                        max_parallel_jobs = None #default -> derived from the server capacity
+                    use_checkpoint = True #default
+                    if "use_checkpoint" in manage_cache:
+                        if manage_cache.pop("use_checkpoint") == "False":
+                            use_checkpoint = False
+                    if "partition_tiles" in manage_cache:
+                        partition_tiles = int(manage_cache.pop("partition_tiles"))
+                    else:
+                        partition_tiles = None #default -> one job per scale
+                    if "max_retries" in manage_cache:
+                        max_retries = int(manage_cache.pop("max_retries"))
+                    else:
+                        max_retries = 0 #default
                 else:
                     manage_cache = None      
         else:
@@ -242,11 +273,14 @@ if __name__ == "__main__":
         while log_file in log_files:
             log_file = log_file.replace('.log', f'_{count}.log')
         # initialise logging
-        init_logging(log_file)
+        logger = lgf.init_logging(log_file, overall_handler=overall_log)
         log_files.append(log_file)
         logger.info(f'******************* Publish service "{service_name}" *******************')
         logger.info(f'Start logging: {time.ctime()}')
         start_time = time.time()
+        # duration of the phases and REST calls (written to "{log file}_metrics.json")
+        metrics = mtf.PublishMetrics(service_name, stage)
+        metrics.activate()
 
         ## sign in to the portal (only the first time or if portal_url changes)
         if count == 0 or portal_url != portal_url_old:
@@ -278,472 +312,510 @@ if __name__ == "__main__":
 
         # sign in also to portal for using ArcGIS API for Python
         logger.info('Connect to portal for using ArcGIS API for Python')
-        target = arcgis.GIS(url=portal_url, username=sign_in_user, password=pw, verify_cert=False)
+        with metrics.span("connect"):
+            target = arcgis.GIS(url=portal_url, username=sign_in_user, password=pw, verify_cert=False)
+        # count the REST calls of the ArcGIS API for Python
+        mtf.count_rest_calls(target)
         logger.info(f"target portal: {target}")
 
-        ## create sd draft file
-        # name of the output files
-        try:
-            sddraft_filename = os.path.join(service_documents, f'{filename}.sddraft')
-            sd_filename = os.path.join(service_documents, f'{filename}.sd')
-            # load ArcGIS Pro project
-            logger.info("Load arcgis pro project")
-            aprx = arcpy.mp.ArcGISProject(aprx_name)
-            # list all maps
-            map_list = aprx.listMaps(map_name)
-            # get the correct map
-            found_map = False
-            for map in map_list:
-                if map.name == map_name:
-                    m = map
-                    found_map = True
-            if not found_map:
-                logger.error(f'The map "{map_name}" was not found in the aprx!')
-                raise ValueError(f'The map "{map_name}" was not found in the aprx!')
-            # define server type
-            if stage == "ONLINE":
-                server_type = "MY_HOSTED_SERVICES"
-            else:
-                server_type = "FEDERATED_SERVER"
-            # If a layer is specified, only the layer is published, not the entire map.
-            if layer_name:
-                # list all layers
-                layers_list = m.listLayers(layer_name)
-                found_layer = False
-                # get the correct layer
-                for layer in layers_list:
-                    if layer.name == layer_name:
+        ## plan: compare the published service with the JSON file
+        # the hash of the source (aprx and parameters) is saved after publishing to detect changes
+        state_file = os.path.join(service_documents, f'{filename}_publish_state.json')
+        source_hash = None
+        publish_required = True
+        if plan_mode:
+            with metrics.span("plan"):
+                source_hash = ppf.get_source_hash(aprx_name, data)
+                logger.info(f'Plan the operations for the service "{service_name}"')
+                if portal_url not in service_resolvers:
+                    service_resolvers[portal_url] = smf.ServiceResolver(target, logger)
+                if portal_url not in folder_caches:
+                    folder_caches[portal_url] = (smf.FolderCache(target), target.users.me.username)
+                folder_cache, portal_username = folder_caches[portal_url]
+                service = service_resolvers[portal_url].get_service(federated_server_url, server_folder, service_name, "MapServer")
+                live_items = ppf.get_live_items(target, service) if service else []
+                plan_share = None
+                if share:
+                    if share['in_groups']:
+                        if portal_url not in group_resolvers:
+                            group_resolvers[portal_url] = pmf.GroupResolver(target, ttl=group_cache_ttl, logger=logger)
+                        group_ids = group_resolvers[portal_url].get_group_ids(share['in_groups'])
+                    else:
+                        group_ids = None
+                    plan_share = {"everyone": share["in_public"] == "PUBLIC",
+                                  "org": share["in_organization"] == "SHARE_ORGANIZATION",
+                                  "groups": group_ids}
+                plan_metadata = smf.convert_metadata(metadata) if metadata else None
+                plan_folder = folder_cache.get_folders(portal_username).get(portal_folder)
+                operations = ppf.plan_service(service, live_items, source_hash, ppf.read_state(state_file),
+                                              map_service_web_capabilities, enable_extensions, plan_metadata, plan_share,
+                                              plan_folder["id"] if plan_folder else None)
+                if operations:
+                    for operation in operations:
+                        logger.info(f'Plan: {ppf.format_operation(operation)}')
+                else:
+                    logger.info('Plan: no changes')
+                publish_required = bool(operations) and operations[0]["operation"] == "publish"
+                if dry_run:
+                    logger.info('Dry run: the planned operations are not applied')
+                    publish_required = False
+                elif operations and not publish_required:
+                    if not plan_folder and [operation for operation in operations if operation["operation"] == "move"]:
+                        folder_cache.get_or_create_folder(portal_folder, portal_username, logger)
+                    item_timings = ppf.apply_plan(service, operations, portal_folder, portal_username, plan_metadata,
+                                                  plan_share, state=in_startupType, timeout=service_ready_timeout, logger=logger)
+                    for timing in item_timings:
+                        if "error" not in timing:
+                            logger.info(f'Updated item "{timing["title"]}" of type "{timing["type"]}" in {timing["total"]} sec')
+
+        if publish_required:
+            ## create sd draft file
+            with metrics.span("draft"):
+                # name of the output files
+                try:
+                    sddraft_filename = os.path.join(service_documents, f'{filename}.sddraft')
+                    sd_filename = os.path.join(service_documents, f'{filename}.sd')
+                    # load ArcGIS Pro project (only once for all services of the same aprx)
+                    m = project_cache.get_map(aprx_name, map_name)
+                    if not m:
+                        logger.error(f'The map "{map_name}" was not found in the aprx!')
+                        raise ValueError(f'The map "{map_name}" was not found in the aprx!')
+                    # define server type
+                    if stage == "ONLINE":
+                        server_type = "MY_HOSTED_SERVICES"
+                    else:
+                        server_type = "FEDERATED_SERVER"
+                    # If a layer is specified, only the layer is published, not the entire map.
+                    if layer_name:
+                        layer = project_cache.get_layer(aprx_name, map_name, layer_name)
+                        if not layer:
+                            logger.error(f'The layer "{layer_name}" was not found in the aprx!')
+                            raise ValueError(f'The layer "{layer_name}" was not found in the aprx!')
                         logger.info(f'The layer "{layer.name}" will be published as service "{service_name}"')
                         # create MapImageSharingDraft
                         sddraft = m.getWebLayerSharingDraft(server_type, service_type, service_name, [layer])
                         logger.info('Created sd draft object')
-                        found_layer = True
-                if not found_layer:
-                    logger.error(f'The layer "{layer_name}" was not found in the aprx!')
-                    raise ValueError(f'The layer "{layer_name}" was not found in the aprx!')
-            elif table_name:
-                # list all tables
-                table_list = m.listTables(table_name)
-                found_table = False
-                # get the correct table
-                for table in table_list:
-                    if table.name == table_name:
+                    elif table_name:
+                        table = project_cache.get_table(aprx_name, map_name, table_name)
+                        if not table:
+                            logger.error(f'The table "{table_name}" was not found in the aprx!')
+                            raise ValueError(f'The table "{table_name}" was not found in the aprx!')
                         logger.info(f'The table "{table.name}" will be published as service "{service_name}"')
                         # create MapImageSharingDraft
                         sddraft = m.getWebLayerSharingDraft(server_type, service_type, service_name, [table])
                         logger.info('Created sd draft object')
-                        found_table = True
-                if not found_table:
-                    logger.error(f'The table "{table_name}" was not found in the aprx!')
-                    raise ValueError(f'The table "{table_name}" was not found in the aprx!')
-            else: 
-                logger.info(f'The map "{m.name}" will be published as service "{service_name}"')
-                # create MapImageSharingDraft
-                sddraft = m.getWebLayerSharingDraft(server_type, service_type, service_name)       
-        except Exception:
-            e = sys.exc_info()[1]
-            logger.error(f'Creating MapImageSharingDraft failed: {e.args[0]}')
-            raise ValueError(f'Creating MapImageSharingDraft failed: {e.args[0]}')
-        finally:
-            # release ArcGISPro project
-            if aprx:
-                del aprx       
-
-        logger.info('Update service definition properties')
-        # update service definition with basic settings
-        sddraft.checkUniqueIDAssignment = check_unique_ID_assignment
-        sddraft.copyDataToServer = copy_data_to_server
-        sddraft.federatedServerUrl = federated_server_url
-        sddraft.overwriteExistingService = overwrite_existing_service
-        sddraft.portalFolder = portal_folder
-        sddraft.serverFolder = server_folder
-        # update service definition with metadata (not really necessary -> later in the script with arcgis api)
-        if metadata:
-            sddraft.credits = metadata["credits"]
-            sddraft.description = metadata["description"]
-            sddraft.summary = metadata["summary"]
-            sddraft.tags = metadata["tags"]
-            sddraft.useLimitations = metadata["use_limitations"]
-        try:
-            # create service Definition draft file
-            sddraft.exportToSDDraft(sddraft_filename)
-            logger.info(f'Created sd draft file: {sddraft_filename}')
-        except Exception:
-            e = sys.exc_info()[1]
-            logger.error(f'Creating sd draft file failed: {e.args[0]}')
-            raise ValueError(f'Creating sd draft file failed: {e.args[0]}')
-
-        ## adjust sddraft file to enable extenstions and to set sharing options
-        # read sd draft file
-        if enable_extensions or share:
-            doc = DOM.parse(sddraft_filename)
-        # enable extensions (FeatureServer etc.) in sddraft
-        if enable_extensions:
-            logger.info("Update sddraft file to enable extensions")
-            # find all elements with the name 'TypeName'
-            typeNames = doc.getElementsByTagName('TypeName')
-            for typeName in typeNames:
-                # update TypeName settings. Because of a Bug OGC services can not be staged. Enable later in the script with arcgis api.
-                if typeName.firstChild.data in enable_extensions and typeName.firstChild.data not in ["WMSServer", "WFSServer", "WCSServer"]: 
-                    logger.info(f'Enable extension "{typeName.firstChild.data}"')
-                    extension = typeName.parentNode
-                    for extElement in extension.childNodes:
-                        # enable extension
-                        if extElement.tagName == 'Enabled':
-                            extElement.firstChild.data = 'true'
-
-
-        # set map service capabilites 
-        if map_service_web_capabilities != "Map,Query,Data": # if not default setting
-            configProps  = doc.getElementsByTagName('Info')[0]
-            propArray = configProps.firstChild
-            propSets = propArray.childNodes
-            for propSet in propSets:
-                keyValues = propSet.childNodes
-                for keyValue in keyValues:
-                    if keyValue.tagName == 'Key':
-                        if keyValue.firstChild.data == "WebCapabilities":
-                            # Defaults are Map,Query,Data
-                            keyValue.nextSibling.firstChild.data = map_service_web_capabilities
-
-        # Set feature service properties
-        if enable_extensions:
-            if "FeatureServer" in enable_extensions:
-                if feature_service_web_capabilities != "Query,Create,Update,Delete,Uploads,Editing": # if not default setting
+                    else: 
+                        logger.info(f'The map "{m.name}" will be published as service "{service_name}"')
+                        # create MapImageSharingDraft
+                        sddraft = m.getWebLayerSharingDraft(server_type, service_type, service_name)       
+                except Exception:
+                    e = sys.exc_info()[1]
+                    logger.error(f'Creating MapImageSharingDraft failed: {e.args[0]}')
+                    raise ValueError(f'Creating MapImageSharingDraft failed: {e.args[0]}')
+
+                logger.info('Update service definition properties')
+                # update service definition with basic settings
+                sddraft.checkUniqueIDAssignment = check_unique_ID_assignment
+                sddraft.copyDataToServer = copy_data_to_server
+                sddraft.federatedServerUrl = federated_server_url
+                sddraft.overwriteExistingService = overwrite_existing_service
+                sddraft.portalFolder = portal_folder
+                sddraft.serverFolder = server_folder
+                # update service definition with metadata (not really necessary -> later in the script with arcgis api)
+                if metadata:
+                    sddraft.credits = metadata["credits"]
+                    sddraft.description = metadata["description"]
+                    sddraft.summary = metadata["summary"]
+                    sddraft.tags = metadata["tags"]
+                    sddraft.useLimitations = metadata["use_limitations"]
+                try:
+                    # create service Definition draft file
+                    sddraft.exportToSDDraft(sddraft_filename)
+                    logger.info(f'Created sd draft file: {sddraft_filename}')
+                except Exception:
+                    e = sys.exc_info()[1]
+                    logger.error(f'Creating sd draft file failed: {e.args[0]}')
+                    raise ValueError(f'Creating sd draft file failed: {e.args[0]}')
+
+                ## adjust sddraft file to enable extenstions and to set sharing options
+                # read sd draft file
+                if enable_extensions or share:
+                    doc = DOM.parse(sddraft_filename)
+                # enable extensions (FeatureServer etc.) in sddraft
+                if enable_extensions:
+                    logger.info("Update sddraft file to enable extensions")
+                    # find all elements with the name 'TypeName'
                     typeNames = doc.getElementsByTagName('TypeName')
                     for typeName in typeNames:
-                        # Get the TypeName to enable
-                        if typeName.firstChild.data == "FeatureServer":
+                        # update TypeName settings. Because of a Bug OGC services can not be staged. Enable later in the script with arcgis api.
+                        if typeName.firstChild.data in enable_extensions and typeName.firstChild.data not in ["WMSServer", "WFSServer", "WCSServer"]: 
+                            logger.info(f'Enable extension "{typeName.firstChild.data}"')
                             extension = typeName.parentNode
                             for extElement in extension.childNodes:
-                                if extElement.tagName == 'Info':
-                                    for propSet in extElement.childNodes:
-                                        for prop in propSet.childNodes:
-                                            for prop1 in prop.childNodes:
-                                                if prop1.tagName == "Key":
-                                                    if prop1.firstChild.data == 'WebCapabilities':
-                                                        # Defaults are Query,Create,Update,Delete,Uploads,Editing
-                                                        prop1.nextSibling.firstChild.data = feature_service_web_capabilities
-
-        ## set service parameters
-        # get sharing options from input
-        if share:
-            logger.info("Get sharing options from input")
-            # change following to "true" to share
-            if share['in_public'] == "PUBLIC" or share['in_public'] == "True":
-                share_to_everyone = "true"
-            else:
-                share_to_everyone = "false"
-            if share['in_organization'] == "SHARE_ORGANIZATION" or share['in_organization'] == "True":
-                share_to_organisation = "true"
-            else:
-                share_to_organisation = "false"
-            if share['in_groups']:
-                # get a comma-separated list of group IDs
-                share_to_group = "true"
-                group_ids_str = None
-                group_ids = None
-                group_ids = []
-                for group_name in share['in_groups']:
-                    groups = target.groups.search(query=f"title:{group_name}")
-                    for group in groups:
-                        if group.title == group_name:
-                            group_ids.append(group.id)
-                group_ids_str = ",".join(group_ids)    
-            else:
-                share_to_group = "false"
-        else:
-            share_to_everyone = None
-            share_to_organisation = None
-            share_to_group = None
-            group_ids_str = None
-
-        ## update xml file
-        logger.info("Update sddraft file with service properties")
-        keys = doc.getElementsByTagName('Key')
-        values = doc.getElementsByTagName('Value')
+                                # enable extension
+                                if extElement.tagName == 'Enabled':
+                                    extElement.firstChild.data = 'true'
+
+
+                # set map service capabilites 
+                if map_service_web_capabilities != "Map,Query,Data": # if not default setting
+                    configProps  = doc.getElementsByTagName('Info')[0]
+                    propArray = configProps.firstChild
+                    propSets = propArray.childNodes
+                    for propSet in propSets:
+                        keyValues = propSet.childNodes
+                        for keyValue in keyValues:
+                            if keyValue.tagName == 'Key':
+                                if keyValue.firstChild.data == "WebCapabilities":
+                                    # Defaults are Map,Query,Data
+                                    keyValue.nextSibling.firstChild.data = map_service_web_capabilities
+
+                # Set feature service properties
+                if enable_extensions:
+                    if "FeatureServer" in enable_extensions:
+                        if feature_service_web_capabilities != "Query,Create,Update,Delete,Uploads,Editing": # if not default setting
+                            typeNames = doc.getElementsByTagName('TypeName')
+                            for typeName in typeNames:
+                                # Get the TypeName to enable
+                                if typeName.firstChild.data == "FeatureServer":
+                                    extension = typeName.parentNode
+                                    for extElement in extension.childNodes:
+                                        if extElement.tagName == 'Info':
+                                            for propSet in extElement.childNodes:
+                                                for prop in propSet.childNodes:
+                                                    for prop1 in prop.childNodes:
+                                                        if prop1.tagName == "Key":
+                                                            if prop1.firstChild.data == 'WebCapabilities':
+                                                                # Defaults are Query,Create,Update,Delete,Uploads,Editing
+                                                                prop1.nextSibling.firstChild.data = feature_service_web_capabilities
+
+                ## set service parameters
+                # get sharing options from input
+                if share:
+                    logger.info("Get sharing options from input")
+                    # change following to "true" to share
+                    if share['in_public'] == "PUBLIC" or share['in_public'] == "True":
+                        share_to_everyone = "true"
+                    else:
+                        share_to_everyone = "false"
+                    if share['in_organization'] == "SHARE_ORGANIZATION" or share['in_organization'] == "True":
+                        share_to_organisation = "true"
+                    else:
+                        share_to_organisation = "false"
+                    if share['in_groups']:
+                        # get a comma-separated list of group IDs
+                        share_to_group = "true"
+                        if portal_url not in group_resolvers:
+                            group_resolvers[portal_url] = pmf.GroupResolver(target, ttl=group_cache_ttl, logger=logger)
+                        group_ids = group_resolvers[portal_url].get_group_ids(share['in_groups'])
+                        group_ids_str = ",".join(group_ids)    
+                    else:
+                        share_to_group = "false"
+                        group_ids = None
+                else:
+                    share_to_everyone = None
+                    share_to_organisation = None
+                    share_to_group = None
+                    group_ids_str = None
+
+                ## update xml file
+                logger.info("Update sddraft file with service properties")
+                keys = doc.getElementsByTagName('Key')
+                values = doc.getElementsByTagName('Value')
                                                         
-        # each key has a corresponding value
-        for ii, key in enumerate(keys):
-            if key.hasChildNodes():
-                #print(f"key: '{key.firstChild.nodeValue}'")
-                if key.firstChild.nodeValue == "PackageUnderMyOrg":
-                    if share_to_organisation:
-                        logger.info(f'Share to organisation: "{share_to_organisation}"')
-                        values[ii].firstChild.nodeValue = share_to_organisation
-                if key.firstChild.nodeValue == "PackageIsPublic":
-                    if share_to_everyone:
-                        logger.info(f'Share to public: "{share_to_everyone}"')
-                        values[ii].firstChild.nodeValue = share_to_everyone
-                # if key.firstChild.nodeValue == "PackageShareGroups": # Bug? -> share items with group later with ArcGIS API for Python
-                #     if share_to_group:
-                #         logger.info(f'Share to group: "{share_to_group}"')
-                #         values[ii].firstChild.nodeValue = share_to_group
-                # if share_to_group == "true" and key.firstChild.nodeValue == "PackageGroupIDs":
-                #     if group_ids_str:
-                #         logger.info(f'Share to groups: "{group_ids_str}"')
-                #         values[ii].firstChild.nodeValue = group_ids_str
-                if key.firstChild.data == 'antialiasingMode': 
-                    if antialiasing_mode:
-                        key.nextSibling.firstChild.data = antialiasing_mode 
-                if key.firstChild.data == 'maxScale':
-                    if enable_cache:
-                        key.nextSibling.firstChild.data = max_scale
-                if key.firstChild.data == 'minScale':
-                    if enable_cache:
-                        key.nextSibling.firstChild.data = min_scale
-        # write result into a new file
-        if enable_extensions or share:
-            logger.info("Create new sddraft file")
-            sddraft_mod_xml_file = os.path.join(service_documents, f'{filename}_mod_xml.sddraft')
-            f = open(sddraft_mod_xml_file, 'w')
-            # encoding angeben wegen Umlauten
-            doc.writexml(f, encoding = "ISO-8859-1")
-            f.close()
-            # delete the old file
-            logger.info("Delete the old sddraft file")
-            os.remove(sddraft_filename)
-            logger.info("Rename the new sddraft file to have the original name")
-            # rename the new file
-            os.rename(sddraft_mod_xml_file, sddraft_filename)
-            logger.info("Updated SdDraft file")        
+                # each key has a corresponding value
+                for ii, key in enumerate(keys):
+                    if key.hasChildNodes():
+                        #print(f"key: '{key.firstChild.nodeValue}'")
+                        if key.firstChild.nodeValue == "PackageUnderMyOrg":
+                            if share_to_organisation:
+                                logger.info(f'Share to organisation: "{share_to_organisation}"')
+                                values[ii].firstChild.nodeValue = share_to_organisation
+                        if key.firstChild.nodeValue == "PackageIsPublic":
+                            if share_to_everyone:
+                                logger.info(f'Share to public: "{share_to_everyone}"')
+                                values[ii].firstChild.nodeValue = share_to_everyone
+                        # if key.firstChild.nodeValue == "PackageShareGroups": # Bug? -> share items with group later with ArcGIS API for Python
+                        #     if share_to_group:
+                        #         logger.info(f'Share to group: "{share_to_group}"')
+                        #         values[ii].firstChild.nodeValue = share_to_group
+                        # if share_to_group == "true" and key.firstChild.nodeValue == "PackageGroupIDs":
+                        #     if group_ids_str:
+                        #         logger.info(f'Share to groups: "{group_ids_str}"')
+                        #         values[ii].firstChild.nodeValue = group_ids_str
+                        if key.firstChild.data == 'antialiasingMode': 
+                            if antialiasing_mode:
+                                key.nextSibling.firstChild.data = antialiasing_mode 
+                        if key.firstChild.data == 'maxScale':
+                            if enable_cache:
+                                key.nextSibling.firstChild.data = max_scale
+                        if key.firstChild.data == 'minScale':
+                            if enable_cache:
+                                key.nextSibling.firstChild.data = min_scale
+                # write result into a new file
+                if enable_extensions or share:
+                    logger.info("Create new sddraft file")
+                    sddraft_mod_xml_file = os.path.join(service_documents, f'{filename}_mod_xml.sddraft')
+                    f = open(sddraft_mod_xml_file, 'w')
+                    # encoding angeben wegen Umlauten
+                    doc.writexml(f, encoding = "ISO-8859-1")
+                    f.close()
+                    # delete the old file
+                    logger.info("Delete the old sddraft file")
+                    os.remove(sddraft_filename)
+                    logger.info("Rename the new sddraft file to have the original name")
+                    # rename the new file
+                    os.rename(sddraft_mod_xml_file, sddraft_filename)
+                    logger.info("Updated SdDraft file")        
         
-        ## create sd file
-        # delete sd file if already exists
-        if os.path.exists(sd_filename):
-            logger.info("Delete existing sd file")
-            os.remove(sd_filename)
-
-        logger.info("Create sd file: Start staging")
-        arcpy.server.StageService(sddraft_filename, sd_filename)
-        logger.info("Created sd file")
-        # may include automatic registering of database at server 
-        # -> comment out because not "safe" if unintentional wrong database connection is used
-        # stage the service and analyze the .sddraft file for registered data store 
-        # continue publishing only if data store is registered
-        # stage_service = True
-        # analyze and if register data store if not already registered -> add databas as parameter in Input-JSON
-        # while stage_service:
-        #     arcpy.server.StageService(sddraft_filename, sd_filename)
-        #     # Get analyzer warnings to check if data store is registered
-        #     warnings = arcpy.GetMessages(1)
-        #     logger.warning(warnings)
-        #     # If data store is not registered 
-        #     if "24011" in warnings:
-        #         logger.warning("Datastore is not registered!")
-        #         sys.exit()
-        #         # Register data store
-        #         db_conn = r"C:\Project\db_conn.sde"
-        #         register_msg = arcpy.AddDataStoreItem(federated_server_url, "DATABASE", "datastore_name", db_conn)
-        #         logger.info(f"registered datastore: {0}".format(register_msg))
-        #         # Stage the service again
-        #         stage_service = True
-        #     else:
-        #         stage_service = False
+            ## create sd file
+            # delete sd file if already exists
+            if os.path.exists(sd_filename):
+                logger.info("Delete existing sd file")
+                os.remove(sd_filename)
+
+            with metrics.span("staging"):
+                logger.info("Create sd file: Start staging")
+                arcpy.server.StageService(sddraft_filename, sd_filename)
+                logger.info("Created sd file")
+            metrics.set_value("sd_bytes", os.path.getsize(sd_filename))
+            # may include automatic registering of database at server 
+            # -> comment out because not "safe" if unintentional wrong database connection is used
+            # stage the service and analyze the .sddraft file for registered data store 
+            # continue publishing only if data store is registered
+            # stage_service = True
+            # analyze and if register data store if not already registered -> add databas as parameter in Input-JSON
+            # while stage_service:
+            #     arcpy.server.StageService(sddraft_filename, sd_filename)
+            #     # Get analyzer warnings to check if data store is registered
+            #     warnings = arcpy.GetMessages(1)
+            #     logger.warning(warnings)
+            #     # If data store is not registered 
+            #     if "24011" in warnings:
+            #         logger.warning("Datastore is not registered!")
+            #         sys.exit()
+            #         # Register data store
+            #         db_conn = r"C:\Project\db_conn.sde"
+            #         register_msg = arcpy.AddDataStoreItem(federated_server_url, "DATABASE", "datastore_name", db_conn)
+            #         logger.info(f"registered datastore: {0}".format(register_msg))
+            #         # Stage the service again
+            #         stage_service = True
+            #     else:
+            #         stage_service = False
                 
-        ## publish sd file
-        if share:
-            logger.info("Publish and share service")
-            service_usd = arcpy.server.UploadServiceDefinition(
-                    in_sd_file = sd_filename, in_server = federated_server_url, in_startupType = in_startupType, **share
-                    )
-        else:
-            logger.info("Pulish service")
-            service_usd = arcpy.server.UploadServiceDefinition(in_sd_file = sd_filename, in_server = federated_server_url, in_startupType = in_startupType)    
-        logger.info("published service")
-
-        ## Use ArcGIS API for Python for further settings
-        # get the index of the server where the service was published
-        gis_servers_properties = target.admin.servers.properties
-        server_index = None
-        for ii, server_prop in enumerate(gis_servers_properties.servers): # assuming servers have same indexes as in target.admin.servers.list()
-            if server_prop.url == federated_server_url:
-                server_index = ii
-                break
-        
-        if server_index is None:
-            logger.error(f'Server "{federated_server_url}" not found.')
-        
-        # get the correct server
-        server = target.admin.servers.list()[server_index]
-        logger.info(f'Search service on server {server_prop.url}')
-
-        # get the service
-        service = None
-        for service in server.services.list(server_folder): # assuming there is only one service with that name in that folder
-            if service.properties.serviceName == service_name:
-                break
-
-        if not service:
-            logger.error(f'Service "{service_name}" not found on server "{server.url}".')
+            ## publish sd file
+            with metrics.span("upload"):
+                if share:
+                    logger.info("Publish and share service")
+                    service_usd = arcpy.server.UploadServiceDefinition(
+                            in_sd_file = sd_filename, in_server = federated_server_url, in_startupType = in_startupType, **share
+                            )
+                else:
+                    logger.info("Pulish service")
+                    service_usd = arcpy.server.UploadServiceDefinition(in_sd_file = sd_filename, in_server = federated_server_url, in_startupType = in_startupType)    
+                logger.info("published service")
+
+            ## Use ArcGIS API for Python for further settings
+            with metrics.span("service_edit"):
+                # resolve the published service from the URL returned by the upload (servers and folders are cached for the run)
+                if portal_url not in service_resolvers:
+                    service_resolvers[portal_url] = smf.ServiceResolver(target, logger)
+                service_resolver = service_resolvers[portal_url]
+                server = service_resolver.get_server(federated_server_url)
+                logger.info(f'Search service "{service_usd[0]}" on server {federated_server_url}')
+                service = service_resolver.resolve(service_usd[0], federated_server_url)
+
+                if not service:
+                    logger.error(f'Service "{service_name}" not found on server "{federated_server_url}".')
+                    raise ValueError(f'Service "{service_name}" not found on server "{federated_server_url}".')
        
-        # Retrieve the service information
-        service_data = service.properties
-
-        # enable the extensions of the published service. Only "WMSServer", "WFSServer", "WCSServer" -> other extensions already enabled in sddraft.
-        if enable_extensions:
-            if "WMSServer" in enable_extensions or "WFSServer" in enable_extensions or "WCSServer" in enable_extensions:
-                logger.info(f'Enable the ogc service extensions: {enable_extensions}')
-                for extension in service_data["extensions"]:
-                    if extension["typeName"] in enable_extensions and extension["typeName"] in ["WMSServer", "WFSServer", "WCSServer"]: # other extensions already enabled in sddraft
-                        if share["in_public"] != "PUBLIC" and extension["typeName"] in ["WFSServer", "WMSServer", 'WCSServer']:
-                            logger.warning(f'00297: {extension["typeName"]} layers must be shared with everyone')
-                        logger.warning(f'The portal Item of the "{extension["typeName"]}" service will get a new ItemID if the serivce already exists!')
-                        extension["enabled"] = "true"
-                        extension["properties"]["keyword"] = ""
-                # convert PropertyMap to json
-                service_data_json = json.dumps(dict(service_data))
-                # Edit the service
-                edit_respone = service.edit(service_data_json)
-                # Wait 30 seconds for the service to restart
-                time.sleep(30)
-                # Retrieve the updated service information
+                # wait until the service has started (instead of assuming it is ready right after the upload)
+                if in_startupType == "STARTED":
+                    logger.info(f'Wait until the service "{service_name}" is started')
+                    # a timeout is logged as warning by wait_for_service
+                    smf.wait_for_service(service, timeout=service_ready_timeout, logger=logger)
+
+                # Retrieve the service information
                 service_data = service.properties
 
-        # create portal folder for the singed in user if not alread exists (because of a Bug in arpy.sharing the item is not already in this folder)
-        create_folder__flag = True
-        for folder in target.users.me.folders:
-            if portal_folder == folder['title']:
-                logger.info(f'Portal folder "{portal_folder}" already exists')
-                portal_folder_item = folder
-                create_folder__flag = False         
-        if create_folder__flag:
-            logger.info(f'Create portal folder "{portal_folder}"')
-            portal_folder_item = target.content.create_folder(portal_folder)
- 
-        # get the poral items of the published service
-        for portal_item in service_data["portalProperties"]["portalItems"]:
-            item_id = portal_item["itemID"]
-            items = target.content.search(query=f"id:{item_id}")
-            if items:
-                item = items[0]
-            else:
-                logger.error(f'Item not found with the specified itemID "{item_id}".')
-            # move the item to the portal folder
-            logger.info(f'Move item "{item.title}" of type "{item.type}" to the folder "{portal_folder}"' )
-            item.move(portal_folder, target.users.me.username)
-            # convert metadata keys for sddraft to metadata keys for arcis python api
-            new_metadata = metadata.copy()
-            if 'credits' in metadata:
-                new_metadata['accessInformation'] = new_metadata.pop('credits')
-            if 'use_limitations' in metadata:
-                new_metadata['licenseInfo'] = new_metadata.pop('use_limitations')
-            if 'summary' in metadata:
-                new_metadata['snippet'] = new_metadata.pop('summary')
-            # update item with metadata
-            item.update(new_metadata)
-
-            # share item (already done with arcpy.sharing but do it here again because of a Bug in sharing with groups)
-            if share["in_public"] == "PUBLIC":
-                share_everyone = True
-            else:
-                share_everyone = False
-            if share["in_organization"] == "SHARE_ORGANIZATION":
-                share_org = True
-            else:
-                share_org = False
-            logger.info(f'Share item public:"{share_everyone}", organisation:"{share_org}", groups:"{group_ids_str}"' )
-            item.share(everyone=share_everyone, org=share_org, groups=group_ids)
-
-        ## enable cache
-        if enable_cache:
-            if "predefined_tiling_scheme" in enable_cache:
-                logger.info(f'Create cache scheme with predefined tilling scheme')
-            else:
-                logger.info(f'Create cache scheme with predefined parameters')
-            # define correct url's
-            server_rest_url = f'{federated_server_url}/rest'
-            rest_service = service_usd[0].split("arcgis")
-            service_url = server_rest_url + rest_service[1]
-            try:
-                starttime = time.time()
-                # create cache
-                result = arcpy.server.CreateMapServerCache(service_url, **enable_cache)
-                finishtime = time.time()
-                elapsedtime = round(finishtime - starttime)
-                # log messages to a file
-                while result.status < 4:
-                    time.sleep(0.2)
-                resultValue = result.getMessages()
-                logger.info(f'{str(resultValue)} \n')
-                logger.info(f'Created cache schmeme for {service_url} in {str(elapsedtime)} sec \n' )         
-            except Exception:
-                # If an error occurred, log line number and error message
-                e = sys.exc_info()[1]
-                tb = sys.exc_info()[2]
-                logger.error(f'Failed at step 1 \n Line {tb.tb_lineno} \n {str(e)}')
-            logger.info(f'Cache enabled for service "{service_name}"')
-        else:
-            logger.info('Do not create cache')
-
-        # # restart service (not necessary)     
-        # if enable_cache and manage_cache:
-        #     restart = service.restart()
-        #     logger.info(f'Restart service: {restart}')
-
-        ## manage cache
-        if manage_cache:
-            logger.info('Manage cache')
-            if "scales" in manage_cache:
-                pass
-            elif "update_scales" in manage_cache:
-                # if depreciated parameter update_scales is used (old json)
-                manage_cache['scales'] = manage_cache.pop['update_scales']
-            else:
-                # assume that the same scales should be used as in the section enable_cache
-                if "scales" in enable_cache:
-                    manage_cache['scales'] = enable_cache['scales']
+                # enable the extensions of the published service. Only "WMSServer", "WFSServer", "WCSServer" -> other extensions already enabled in sddraft.
+                if enable_extensions:
+                    ogc_extensions = [extension for extension in enable_extensions if extension in smf.OGC_EXTENSIONS]
+                    if ogc_extensions:
+                        for extension in ogc_extensions:
+                            if share["in_public"] != "PUBLIC":
+                                logger.warning(f'00297: {extension} layers must be shared with everyone')
+                            logger.warning(f'The portal Item of the "{extension}" service will get a new ItemID if the serivce already exists!')
+                        if not smf.enable_ogc_extensions(service, ogc_extensions, state=in_startupType, 
+                                                         timeout=service_ready_timeout, logger=logger):
+                            logger.error(f'The extensions {ogc_extensions} of the service "{service_name}" are not ready after {service_ready_timeout} sec')
+                        # Retrieve the updated service information
+                        service_data = service.properties
+
+            with metrics.span("finalize_items"):
+                # create portal folder for the singed in user if not alread exists (because of a Bug in arpy.sharing the item is not already in this folder)
+                if portal_url not in folder_caches:
+                    folder_caches[portal_url] = (smf.FolderCache(target), target.users.me.username)
+                folder_cache, portal_username = folder_caches[portal_url]
+                portal_folder_item = folder_cache.get_or_create_folder(portal_folder, portal_username, logger)
+
+                # get the poral items of the published service (all items with one request)
+                item_ids = [portal_item["itemID"] for portal_item in service_data["portalProperties"]["portalItems"]]
+                items = smf.get_items(target, item_ids, logger)
+                # convert metadata keys for sddraft to metadata keys for arcis python api
+                new_metadata = smf.convert_metadata(metadata) if metadata else None
+                # share item (already done with arcpy.sharing but do it here again because of a Bug in sharing with groups)
+                share_item = None
+                if share:
+                    share_item = {"everyone": share["in_public"] == "PUBLIC",
+                                  "org": share["in_organization"] == "SHARE_ORGANIZATION",
+                                  "groups": group_ids}
+                # move, update and share the items concurrently
+                item_timings = smf.finalize_items(list(items.values()), portal_folder, portal_username, new_metadata,
+                                                  share_item, logger=logger)
+                for timing in item_timings:
+                    if "error" not in timing:
+                        steps = ", ".join(f'{step} {timing[step]}' for step in ["move", "update", "share"] if step in timing)
+                        logger.info(f'Finalized item "{timing["title"]}" of type "{timing["type"]}" in {timing["total"]} sec ({steps})')
+                # hash of the published source (before the parameters of the cache are changed below)
+                if not source_hash:
+                    source_hash = ppf.get_source_hash(aprx_name, data)
+
+            with metrics.span("cache"):
+                # monitor for the geoprocessing jobs of the cache creation (the tools run in worker processes,
+                # which sign in to the portal with the same credentials)
+                credentials = {"portal_url": portal_url, "sign_in_user": sign_in_user, "password": pw if sign_in_user else None,
+                               "cert_file": cert_file, "key_file": key_file}
+                cache_monitor = cmf.JobMonitor(logger=logger, credentials=credentials)
+                cache_failed = False
+
+                # define correct url's
+                _, service_folder, service_name_usd, service_type = smf.parse_service_url(service_usd[0])
+                service_path = f'{service_folder}/{service_name_usd}' if service_folder else service_name_usd
+                service_url = f'{federated_server_url}/rest/services/{service_path}/{service_type}'
+
+                ## enable cache
+                if enable_cache:
+                    if "predefined_tiling_scheme" in enable_cache:
+                        logger.info(f'Create cache scheme with predefined tilling scheme')
+                    else:
+                        logger.info(f'Create cache scheme with predefined parameters')
+                    try:
+                        # create cache in a worker process (the monitor logs the messages of the job when it is finished)
+                        job = cache_monitor.submit("CreateMapServerCache", "server.CreateMapServerCache", service_url, **enable_cache)
+                        cache_monitor.wait([job])
+                        if job.error:
+                            raise job.error
+                        logger.info(f'Created cache schmeme for {service_url} in {str(round(job.duration))} sec \n' )         
+                    except Exception:
+                        # If an error occurred, log line number and error message
+                        e = sys.exc_info()[1]
+                        tb = sys.exc_info()[2]
+                        logger.error(f'Failed at step 1 \n Line {tb.tb_lineno} \n {str(e)}')
+                        cache_failed = True
+                    logger.info(f'Cache enabled for service "{service_name}"')
                 else:
-                    manage_cache['scales'] = ""            
-            start_time = time.time()
-            scales = manage_cache.pop("scales").split(";")
-            for scale in scales:
-                # create cache tiles 
-                logger.info(f'Create cache tiles for scale "{scale}" - start time: {time.ctime()}')
-                try:
-                    manage_cache["scales"] = float(scale)
-                    starttime = time.time()
-                    result = arcpy.server.ManageMapServerCacheTiles(service_url, **manage_cache)
-                    while result.status < 4:
-                        time.sleep(0.2)
-                    finishtime = time.time()
-                    elapsedtime = round(finishtime - starttime)
-                    resultValue = result.getMessages()
-                    logger.info(f'{str(resultValue)} \n')
-                    logger.info(f'Cache tiles created for scale "{scale}" in {str(elapsedtime)} sec.\n')
-                except Exception:
-                    # If an error occurred, print line number and error message
-                    e = sys.exc_info()[1]
-                    tb = sys.exc_info()[2]
-                    logger.error(f'Failed at step 1 \n Line {tb.tb_lineno} \n {str(e)}') 
-            logger.info(f'Creation of cache tiles finished for service "{service_name}"')
-        else:
-            logger.info("Do not create cache tiles")               
+                    logger.info('Do not create cache')
+
+                # # restart service (not necessary)     
+                # if enable_cache and manage_cache:
+                #     restart = service.restart()
+                #     logger.info(f'Restart service: {restart}')
+
+                ## manage cache
+                if manage_cache:
+                    logger.info('Manage cache')
+                    if "scales" in manage_cache:
+                        pass
+                    elif "update_scales" in manage_cache:
+                        # if depreciated parameter update_scales is used (old json)
+                        manage_cache['scales'] = manage_cache.pop('update_scales')
+                    else:
+                        # assume that the same scales should be used as in the section enable_cache
+                        if "scales" in enable_cache:
+                            manage_cache['scales'] = enable_cache['scales']
+                        else:
+                            manage_cache['scales'] = ""            
+                    scales = manage_cache.pop("scales").split(";")
+                    # number of jobs which can run at the same time
+                    if not max_parallel_jobs:
+                        capacity = cmf.get_caching_capacity(server, logger)
+                        max_parallel_jobs = cmf.get_max_parallel_jobs(manage_cache.get("num_of_caching_service_instances"), capacity)
+                        logger.info(f'Caching capacity of the server: {capacity} instances')
+                    logger.info(f'Create cache tiles with up to {max_parallel_jobs} jobs at the same time')
+                    # completed scales are saved, so that a failed run is resumed with the first unfinished scale
+                    if use_checkpoint:
+                        checkpoint_file = os.path.join(service_documents, f'{filename}_cache_checkpoint.json')
+                    else:
+                        checkpoint_file = None
+                    # the durations per tile are recorded to estimate future cache runs (see cache/estimate_cache.py)
+                    timings_file = os.path.join(service_documents, 'cache_timings.json')
+                    # tiling scheme for the partitions and the timings per tile: from the section "enable_cache" or
+                    # (e.g. existing cache or no "tile_origin") from the tile info of the cached service
+                    tiling_scheme = tsf.get_tiling_scheme(enable_cache) if enable_cache else None
+                    if not tiling_scheme:
+                        tile_info = smf.get_tile_info(target, service_url, logger)
+                        if tile_info:
+                            tiling_scheme = tsf.read_tile_info(tile_info)
+                        else:
+                            logger.warning(f'The tiling scheme of the service "{service_url}" is not known -> no partitions '
+                                           f'and no timings per tile')
+                    if partition_tiles and tiling_scheme:
+                        # split the extent into partitions aligned to the tiles -> one job per partition and scale
+                        logger.info(f'Create cache tiles in partitions of {partition_tiles} x {partition_tiles} tiles')
+                        failed_tasks = cmf.schedule_cache_partitions(service_url, manage_cache, scales, tiling_scheme, partition_tiles,
+                                                                     max_parallel_jobs=max_parallel_jobs, max_retries=max_retries,
+                                                                     checkpoint_file=checkpoint_file, timings_file=timings_file,
+                                                                     credentials=credentials, logger=logger)
+                    else:
+                        failed_tasks = cmf.schedule_cache_scales(service_url, manage_cache, scales, max_parallel_jobs=max_parallel_jobs,
+                                                                 max_retries=max_retries, checkpoint_file=checkpoint_file,
+                                                                 tiling_scheme=tiling_scheme, timings_file=timings_file,
+                                                                 credentials=credentials, logger=logger)
+                    if failed_tasks:
+                        cache_failed = True
+                        logger.error(f'Creating cache tiles failed for: {";".join(failed_tasks)}')
+                        if checkpoint_file:
+                            logger.info(f'Completed scales are saved in "{checkpoint_file}" -> run the script again to resume')
+                    logger.info(f'Creation of cache tiles finished for service "{service_name}"')
+                else:
+                    logger.info("Do not create cache tiles")               
+                cache_monitor.shutdown()
+
+            # save the hash of the published source (see option "--plan"), only if the cache was created as well
+            if cache_failed:
+                logger.warning('The publish state is not saved because the cache failed -> the service is published again with "--plan"')
+            else:
+                ppf.write_state(state_file, source_hash, service.url)
 
         ## end logging
         end_time = time.time()
-        i_warning = search(log_file, "warning")
-        total_warnings += total_warnings
-        i_error = search(log_file, "error")
+        i_error, i_warning = lgf.get_counts(logger)
+        total_warnings += i_warning
         total_errors += i_error
         logger.info("Run Script in " + str(round(end_time - start_time)) + " sec.")
+        for phase, result in metrics.phases.items():
+            logger.info(f'Phase "{phase}": {result["seconds"]} sec, {result["rest_calls"]} REST calls')
+        metrics.write_json(log_file.replace('.log', '_metrics.json'))
+        metrics_list.append(metrics.to_dict())
         logger.info(f'# {i_error} errors found')
         logger.info(f'# {i_warning} warnings found')
         logger.info(f'End time: {time.ctime()}')
         logger.info('****************************************************************\n')
-        logger.handlers.clear()
-
-    # write overall log file
-    if count > 1:
-        # create overall logfolder
-        create_folder(overall_log_folder)
-        now = datetime.datetime.now()
-        timestamp_str = now.strftime("%Y-%m-%d_%H-%M-%S")
-        with open(os.path.join(overall_log_folder, f'publish_services_{timestamp_str}.log'), 'w') as output_file:
-            for log_file in log_files:
-                with open(log_file, "r") as input_file:
-                    output_file.write(input_file.read())          
-            output_file.write('\n****************** Total warnings and errors ******************')
-            output_file.write(f'\n# {total_errors} errors found')
-            output_file.write(f'\n# {total_warnings} warnings found')
-            output_file.write('\n****************************************************************\n')  
+        lgf.close_logging(logger)
+
+    # release the ArcGIS Pro projects
+    project_cache.clear()
+
+    # finish overall log file
+    if overall_log:
+        aggregate = mtf.aggregate_metrics(metrics_list)
+        lgf.close_overall_log(overall_log, ['****************** Total warnings and errors ******************',
+                                            f'# {total_errors} errors found', f'# {total_warnings} warnings found',
+                                            '************************ Total metrics *************************']
+                                           + mtf.format_aggregate(aggregate)
+                                           + ['****************************************************************'])
+        with open(os.path.join(overall_log_folder, f'publish_services_{timestamp_str}_metrics.json'), 'w', encoding='utf-8') as output_file:
+            json.dump({"total": aggregate, "services": metrics_list}, output_file, indent=2, ensure_ascii=False)
+    if metrics_textfile:
+        mtf.write_prometheus_textfile(metrics_list, metrics_textfile)  
@@ -8,77 +8,172 @@
 #
 # Created: 20.03.2023
 # -----------------------------------------------------------------------------
-import os, sys, logging, json, time, datetime
+import os, sys, json, time, datetime
 import arcpy
 from arcgis.gis import GIS
 from getpass import getpass
 import xml.dom.minidom as DOM
 from IPython.display import display
+from functools import partial
+# python Skript with my own webtool and service management functions
+import webtool_management_functions as wmf
+import service_management_functions as smf
+# python Skript with my own logging functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'common'))
+import logging_functions as lgf
 
 
-def init_logging(file)  -> None:
-    """Initialises logging to a file and on the console.
+def create_folder(folder_path) -> None:
+    """Creates a folder if it does not already exist.
 
     Required:
-        file -- The path to the log file.
+        folder_path -- The path to the folder (e.g. log folder).
     """
-    global logger
-    logger = logging.getLogger('myapp')
-    # logging to file
-    hdlr = logging.FileHandler(file, mode='w')
-    formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
-    hdlr.setFormatter(formatter)
-    logger.addHandler(hdlr)
-    # logging to console
-    consoleHandler = logging.StreamHandler()
-    consoleHandler.setFormatter(formatter)
-    logger.addHandler(consoleHandler)
-    logger.setLevel(logging.INFO)
+    if not os.path.isdir(folder_path):
+        try:
+            print(f'Creating a folder: {folder_path}')
+            os.makedirs(folder_path)
+        except:
+            raise ValueError(f'The folder "{folder_path}" does not exist and could not be created!')
 
-def search(file, text) -> int:
-    """Search for a specific string in a file.
+def finish_logging(file_logger, start_time, end_time = None) -> tuple:
+    """Logs the duration and the number of errors and warnings of a JSON file and closes its log file.
 
     Required:
-        file -- The path to the file (e.g. log file).
-        text -- The string which is to be searched for.
+        file_logger -- The logger of the JSON file.
+        start_time -- The start time of the JSON file (seconds since the epoch).
+
+    Optional:
+        end_time -- The end time of the JSON file (default = now).
 
     Return:
-        cnt -- The number of occurrences of the string in the file.
+        i_error -- The number of errors in the log file.
+        i_warning -- The number of warnings in the log file.
     """
-    cnt = 0
-    with open(file) as f:
-        for line in f:
-            if text in line.lower():
-                cnt=cnt+1
-        return cnt
+    if not end_time:
+        end_time = time.time()
+    i_error, i_warning = lgf.get_counts(file_logger)
+    file_logger.info("Run Script in " + str(round(end_time - start_time)) + " sec.")
+    file_logger.info(f'# {i_error} errors found')
+    file_logger.info(f'# {i_warning} warnings found')
+    file_logger.info(f'End time: {time.ctime()}')
+    file_logger.info('****************************************************************\n')
+    lgf.close_logging(file_logger)
+    return i_error, i_warning
 
-def create_folder(folder_path) -> None:
-    """Creates a folder if it does not already exist.
+def publish_webtool(portals, parameters, staged, file_logger) -> list:
+    """Uploads a staged webtool and finalizes its portal items (see finalize_webtool).
 
     Required:
-        folder_path -- The path to the folder (e.g. log folder).
+        portals -- Dictionary with the connections to the portals {portal url: {"gis", "username", "service_resolver", "folder_cache"}}.
+        parameters -- The parameters of the JSON file (see wmf.stage_webtool).
+        staged -- The staged webtool (see wmf.stage_webtool).
+        file_logger -- The logger of the JSON file.
+
+    Return:
+        timings -- List with the timings of the portal items (see smf.finalize_items).
     """
-    if not os.path.isdir(folder_path):
-        try:
-            print(f'Creating a folder: {folder_path}')
-            os.makedirs(folder_path)
-        except:
-            raise ValueError(f'The folder "{folder_path}" does not exist and could not be created!')
+    service_usd = wmf.upload_webtool(staged["sd_file"], parameters["federated_server_url"], parameters["share"], file_logger)
+    return finalize_webtool(portals, parameters, service_usd[0], file_logger)
+
+def finalize_webtool(portals, parameters, service_url, file_logger) -> list:
+    """Moves the portal items of an uploaded webtool to the portal folder and updates the metadata
+    (only REST calls, the pipeline finalizes several webtools at the same time).
+
+    Required:
+        portals -- Dictionary with the connections to the portals {portal url: {"gis", "username", "service_resolver", "folder_cache"}}.
+        parameters -- The parameters of the JSON file (see wmf.stage_webtool).
+        service_url -- The URL of the service returned by the upload (see wmf.upload_webtool).
+        file_logger -- The logger of the JSON file.
+
+    Return:
+        timings -- List with the timings of the portal items (see smf.finalize_items).
+    """
+    ## update portal items and move them to the correct portal folder (bug in publish function above?)
+    # When publishing an SD file, an error message appears if the portal folder does not yet exist. 
+    # And if it does exist, the item is only displayed under all contents. Therefore the ArcGIS API for Python is used here.
+    portal = portals[parameters["portal_url"]]
+    # get the portal items by the ids in the properties of the published service (instead of searching them by title)
+    items = wmf.get_webtool_items(portal["gis"], service_url, parameters["federated_server_url"],
+                                  portal["service_resolver"], file_logger)
+    # create portal folder for the signed in user if not already exists (folders are loaded once per run)
+    portal["folder_cache"].get_or_create_folder(parameters["portal_folder"], portal["username"], file_logger)
+    new_metadata = None
+    if parameters["metadata"]:
+        new_metadata = smf.convert_metadata({key: parameters["metadata"][key] for key in ["credits", "use_limitations", "description"]})
+    # move and update the items concurrently
+    timings = smf.finalize_items(items, parameters["portal_folder"], portal["username"], new_metadata, logger=file_logger)
+    for timing in timings:
+        if "error" not in timing:
+            steps = ", ".join(f'{step} {timing[step]}' for step in ["move", "update"] if step in timing)
+            file_logger.info(f'Finalized item "{timing["title"]}" of type "{timing["type"]}" in {timing["total"]} sec ({steps})')
+    return timings
+
+def finish_pipeline(pipeline, pending) -> tuple:
+    """Waits until all webtools of the pipeline are published and closes their log files.
+
+    Required:
+        pipeline -- The WebtoolPipeline object.
+        pending -- Dictionary with the JSON files in the pipeline {log file: (logger, start time)}.
+
+    Return:
+        total_errors -- The number of errors in the log files.
+        total_warnings -- The number of warnings in the log files.
+    """
+    total_errors = 0
+    total_warnings = 0
+    for result in pipeline.wait():
+        file_logger, start_time = pending.pop(result["name"])
+        i_error, i_warning = finish_logging(file_logger, start_time, result["finished"])
+        total_errors += i_error
+        total_warnings += i_warning
+    return total_errors, total_warnings
 
 
 if __name__ == "__main__":
     # path to a JSON input file or multiple JSON files
-    paramFiles = sys.argv[1:]
+    paramFiles = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    # option "--pipeline": execute and stage the tools in worker processes and upload the staged webtools as soon as they 
+    # are ready (option "--max-workers=<n>": number of worker processes, "--max-uploads=<n>": number of uploaded webtools 
+    # whose portal items are finalized at the same time, the uploads themselves run one after the other)
+    pipeline_mode = "--pipeline" in sys.argv[1:]
+    max_workers = wmf.MAX_STAGING_WORKERS #default
+    max_uploads = wmf.MAX_UPLOADS #default
+    for arg in sys.argv[1:]:
+        if arg.startswith('--max-workers='):
+            max_workers = int(arg.split('=', 1)[1])
+        if arg.startswith('--max-uploads='):
+            max_uploads = int(arg.split('=', 1)[1])
+    # option "--no-cache": always execute the tools and stage the webtools (by default the sd file of an earlier run 
+    # is reused if the toolbox, its scripts and the parameters have not changed)
+    use_cache = "--no-cache" not in sys.argv[1:]
     #paramFiles = [r'C:\temp\tutorial\publish_webtool_ExportStandorteVS_test.json']
 
     # path to the overall log file if there is more than one json input file (stored in the "Logs" folder in the directory of the Python script).
     overall_log_folder = os.path.join(os.path.dirname(__file__), "Logs")
+    # the logs of all json files are streamed into the overall log file while they are written
+    overall_log = None
+    if len(paramFiles) > 1:
+        # create overall logfolder
+        create_folder(overall_log_folder)
+        now = datetime.datetime.now()
+        timestamp_str = now.strftime("%Y-%m-%d_%H-%M-%S")
+        overall_log = lgf.open_overall_log(os.path.join(overall_log_folder, f'publish_webtools_{timestamp_str}.log'))
 
     count = 0
     portal_url_old =  None
     log_files = []
     total_warnings = 0
     total_errors = 0
+    # connections to the portals (one session per portal for all json files, servers, services and folders are cached)
+    portals = {}
+    # credentials of the portals (the worker processes of the pipeline sign in with them)
+    credentials = {}
+    # json files in the pipeline {log file: (logger, start time)}
+    pending = {}
+    pipeline = None
+    if pipeline_mode:
+        pipeline = wmf.WebtoolPipeline(partial(finalize_webtool, portals), max_workers, max_uploads, credentials, use_cache)
     for paramFile in paramFiles:
         if paramFile:        
             with open(paramFile, encoding='utf-8') as f:
@@ -163,8 +258,8 @@ if __name__ == "__main__":
                     capabilities = data["capabilities"]
                 else:
                     capabilities = None
-                if "constant_value" in data:
-                    constant_values = data["constantValues"]
+                if "constant_values" in data:
+                    constant_values = data["constant_values"]
                 else:
                     constant_values = None
                 if "choice_lists" in data:
@@ -208,6 +303,8 @@ if __name__ == "__main__":
                     metadata.setdefault("summary", "") #default
                     metadata.setdefault("tags", "") #default
                     metadata.setdefault("use_limitations", "") #default 
+                else:
+                    metadata = None
         else:
             print('no Parameter-JSON file specified')
             sys.exit()
@@ -224,8 +321,11 @@ if __name__ == "__main__":
         # logfile should be unique
         while log_file in log_files:
             log_file = log_file.replace('.log', f'_{count}.log')
-        # initialise logging
-        init_logging(log_file)
+        # initialise logging (in the pipeline the logger of every json file stays open until the webtool is published)
+        if pipeline_mode:
+            logger = lgf.init_logging(log_file, f'myapp.{len(log_files)}', overall_handler=overall_log)
+        else:
+            logger = lgf.init_logging(log_file, overall_handler=overall_log)
         log_files.append(log_file)
         logger.info(f'******************* Publish webtool "{service_name}" *******************')
         logger.info(f'Start logging: {time.ctime()}')
@@ -234,6 +334,12 @@ if __name__ == "__main__":
         ## sign in to the portal (only the first time or if portal_url changes)
         if count == 0 or portal_url != portal_url_old:
             logged_in = False
+            if pending:
+                # the uploads of the pipeline use the portal to which arcpy is signed in -> finish them first
+                logger.info(f'Wait until the webtools of the portal "{portal_url_old}" are published')
+                i_error, i_warning = finish_pipeline(pipeline, pending)
+                total_errors += i_error
+                total_warnings += i_warning
             logger.info(f'Sign in to Portal "{portal_url}"')
         while logged_in == False:
             if sign_in_user:
@@ -259,167 +365,58 @@ if __name__ == "__main__":
                     logged_in = True
                     logger.info(f'Successfully logged in')  
                 
-        ## Execute Tool
-        try:
-            # import toolbox
-            toolbox = arcpy.ImportToolbox(toolbox_name)
-            # create function object
-            tool = getattr(toolbox,  tool_name)
-            # execute tool
-            logger.info("Execute tool")
-            result = tool(*tool_parameters)
-            logger.info(result.getMessages())
-
-        except Exception:
-            e = sys.exc_info()[1]
-            logger.error(f'Executing tool failed: {e.args[0]}')
-            raise ValueError(f'Executing tool failed: {e.args[0]}')
-            
-        finally:
-            if tool:
-                del tool
-            if toolbox:
-                del toolbox       
-        
-        ## create sd draft file
-        logger.info("Create SdDraft file")
-        try:
-            # name of the output files
-            sddraft_filename = os.path.join(service_documents, f'{filename}.sddraft')
-            sd_filename = os.path.join(service_documents, f'{filename}.sd')
-            logger.info(f'The tool "{tool_name}" will be published as webtool "{service_name}"')
-            # Create service definition draft and return analyzer messages
-            analyzeMessages = arcpy.CreateGPSDDraft(
-                result, sddraft_filename, service_name, server_type=server_type,
-                copy_data_to_server=copy_data_to_server, folder_name=server_folder, 
-                summary=metadata['summary'], tags=metadata['tags'], executionType=execution_type,
-                resultMapServer=result_map_server, showMessages=show_messages, maximumRecords=maximum_records,
-                minInstances=min_instances, maxInstances=max_instances, maxUsageTime=max_usage_time, maxWaitTime=max_wait_time,
-                maxIdleTime=max_idle_time, capabilities=capabilities, constantValues = constant_values) 
-            if analyzeMessages['warnings'] != {}:
-                logger.warning(analyzeMessages['warnings'])
-            if analyzeMessages['errors'] != {}:
-                logger.error(analyzeMessages['errors'])
-                logger.info("Created SdDraft file")
-        except Exception:
-            e = sys.exc_info()[1]
-            logger.error(f'Creating SdDraft file failed: {e.args[0]}')
-            raise ValueError(f'Creating SdDraft file failed: {e.args[0]}')
+        # sign in also to portal for using ArcGIS API for Python (only once per portal)
+        if portal_url not in portals:
+            logger.info("Log in at the portal for using the arcgis api for python")
+            if sign_in_user:
+                target = GIS(url=portal_url, username=sign_in_user, password=pw, verify_cert=False)
+            else:
+                target = GIS(url=portal_url, cert_file=cert_file, key_file=key_file, verify_cert=False)
+            portals[portal_url] = {"gis": target, "username": target.users.me.username, 
+                                   "service_resolver": smf.ServiceResolver(target, logger), "folder_cache": smf.FolderCache(target)}
+            credentials[portal_url] = {"portal_url": portal_url, "sign_in_user": sign_in_user, 
+                                       "password": pw if sign_in_user else None, "cert_file": cert_file, "key_file": key_file}
+        logger.info(f"target: {portals[portal_url]['gis']}")
 
-        ## edit sd draft file
-        try:
-            logger.info("Edit SdDraft file")
-            # allow overwriting the webtool ("https://www.spatialtimes.com/2019/09/python-script-to-overwrite-existing-service-in-arcgis-server/")
-            # read the file
-            with open(sddraft_filename, 'r') as file:
-                filedata = file.read()
-            if overwrite_existing_service:
-                # Replace the target string 
-                filedata = filedata.replace('esriServiceDefinitionType_New', 'esriServiceDefinitionType_Replacement')
-                logger.info("Allow overwriting the webtool")
-            # Write the file out again
-            with open(sddraft_filename, 'w') as file:
-                file.write(filedata)
-            logger.info("SdDraft-Datei bearbeitet")
-        except Exception:
-            e = sys.exc_info()[1]
-            logger.error(f'Editing SdDraft file failed: {e.args[0]}')
-            raise ValueError(f'Editing SdDraft file failed: {e.args[0]}')
+        parameters = {"portal_url": portal_url, "federated_server_url": federated_server_url, "toolbox_name": toolbox_name, 
+                      "tool_name": tool_name, "tool_parameters": tool_parameters, "service_name": service_name, 
+                      "server_folder": server_folder, "portal_folder": portal_folder, "service_documents": service_documents, 
+                      "filename": filename, "server_type": server_type, "copy_data_to_server": copy_data_to_server, 
+                      "overwrite_existing_service": overwrite_existing_service, "execution_type": execution_type, 
+                      "result_map_server": result_map_server, "show_messages": show_messages, "maximum_records": maximum_records, 
+                      "min_instances": min_instances, "max_instances": max_instances, "max_usage_time": max_usage_time, 
+                      "max_wait_time": max_wait_time, "max_idle_time": max_idle_time, "capabilities": capabilities, 
+                      "constant_values": constant_values, "share": share, "metadata": metadata}
+        if pipeline_mode:
+            # execute the tool and stage it in a worker process, the webtool is uploaded as soon as it is staged
+            logger.info("Execute tool and create SD file in a worker process")
+            pipeline.submit(log_file, parameters, logger)
+            pending[log_file] = (logger, start_time)
+            continue
 
-        ## create sd file
-        try:
-            # delete sd file if already exist
-            if os.path.exists(sd_filename):
-                logger.info("Delete existing sd file")
-                os.remove(sd_filename)
-            if analyzeMessages['errors'] == {}:
-                logger.info("Create SD file: Start staging")
-                arcpy.server.StageService(sddraft_filename, sd_filename)
-                logger.info("Created SD file")
-            else:
-                # if the sddraft analysis contained errors, display them
-                logger.info(analyzeMessages['errors'])
-        except Exception:
-            e = sys.exc_info()[1]
-            logger.error(f'Creating SD file failed: {e.args[0]}')
-            raise ValueError(f'Creating SD file failed: {e.args[0]}')
-                
-        ## publish sd file
-        if share:
-            logger.info("Publish and share service")
-            service = arcpy.server.UploadServiceDefinition(
-                    in_sd_file = sd_filename, in_server = federated_server_url, **share
-                    )
-        else:
-            logger.info("Pulish service")
-            service = arcpy.server.UploadServiceDefinition(in_sd_file = sd_filename, in_server = federated_server_url)    
-        logger.info("published service")
-        #display(service)
+        ## execute tool, create and stage the sd file
+        staged = wmf.stage_webtool(parameters, logger=logger, use_cache=use_cache)
+        if staged["error"]:
+            logger.error(staged["error"])
+            raise ValueError(staged["error"])
 
-        ## update portal item and move it to the correct portal folder (bug in publish function above?)
-        # When publishing an SD file, an error message appears if the portal folder does not yet exist. 
-        # And if it does exist, the item is only displayed under all contents. Therefore the ArcGIS API for Python is used here.
-        logger.info('Connect to portal for using ArcGIS API for Python')
-        # sign in to the portal (only the first time or if portal_url changes)
-        logger.info("Log in at the portal for using the arcgis api for python")
-        target = GIS(url=portal_url, username=sign_in_user, password=pw, verify_cert=False)
-        logger.info(f"target: {target}")
-        # search folders of the singed in user
-        create_folder = True
-        for folder in target.users.me.folders:
-            if portal_folder == folder['title']:
-                logger.info(f'Portal folder "{portal_folder}" already exists')
-                portal_folder_item = folder
-                create_folder = False         
-        if create_folder:
-            logger.info(f'Create portal folder "{portal_folder}"')
-            portal_folder_item = target.content.create_folder(portal_folder) 
-        #display(portal_folder_item)  
-        # get poral Item of the published service
-        target_items_search = target.content.search(query=f"title: {service_name} & owner: {target.users.me.username}")
-        if target_items_search:
-            # check if exact match
-            for item in target_items_search:
-                if item.title == service_name:
-                    logger.info(f'Move item "{item.title}" of type "{item.type}" to the folder "{portal_folder}"' )
-                    item.move(portal_folder, target.users.me.username)
-                    # Item Properties aktualisieren
-                    credits = metadata["credits"]
-                    use_limitations = metadata["use_limitations"]
-                    description = metadata["description"]
-                    item_properties = {'licenseInfo': use_limitations, 'accessInformation':credits, 'description': description}
-                    item.update(item_properties)
-                    #display(item)
-                    target_item = item
-                else:
-                    logger.info(f'Item "{item.title}" does not exactly match..')
-        else:
-            logger.error(f'Item "{service_name}" could not be found in the portal!')
+        ## publish sd file and update the portal item
+        publish_webtool(portals, parameters, staged, logger)
 
         ## end logging
-        end_time = time.time()
-        i_warning = search(log_file, "warning")
-        total_warnings += total_warnings
-        i_error = search(log_file, "error")
+        i_error, i_warning = finish_logging(logger, start_time)
         total_errors += i_error
-        logger.info("Run Script in " + str(round(end_time - start_time)) + " sec.")
-        logger.info(f'# {i_error} errors found')
-        logger.info(f'# {i_warning} warnings found')
-        logger.info(f'End time: {time.ctime()}')
-        logger.info('****************************************************************\n')
-        logger.handlers.clear()
+        total_warnings += i_warning
 
-    # write overall log file
-    if count > 1:
-        # create overall logfolder
-        create_folder(overall_log_folder)
-        now = datetime.datetime.now()
-        timestamp_str = now.strftime("%Y-%m-%d_%H-%M-%S")
-        with open(os.path.join(overall_log_folder, f'publish_webtools_{timestamp_str}.log'), 'w') as output_file:
-            for log_file in log_files:
-                with open(log_file, "r") as input_file:
-                    output_file.write(input_file.read())          
-            output_file.write('\n****************** Total warnings and errors ******************')
-            output_file.write(f'\n# {total_errors} errors found')
-            output_file.write(f'\n# {total_warnings} warnings found')
-            output_file.write('\n****************************************************************\n')  
+    # wait until the webtools in the pipeline are published
+    if pipeline:
+        i_error, i_warning = finish_pipeline(pipeline, pending)
+        total_errors += i_error
+        total_warnings += i_warning
+        pipeline.shutdown()
+
+    # finish overall log file
+    if overall_log:
+        lgf.close_overall_log(overall_log, ['****************** Total warnings and errors ******************',
+                                            f'# {total_errors} errors found', f'# {total_warnings} warnings found',
+                                            '****************************************************************'])
@@ -0,0 +1,491 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: service_management_functions
+#
+# Purpose: Custom functions to manage published ArcGIS Server services with the
+# ArcGIS Python API.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, sys, time, random, json, threading
+from concurrent.futures import ThreadPoolExecutor
+# python Skript with my own lazy import functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'common'))
+import lazy_import_functions as lzf
+# python Skript with my own logging functions
+import logging_functions as lgf
+# the arcgis api for python is imported when it is used
+arcgis_server = lzf.lazy_import('arcgis.gis.server')
+arcgis_mapping = lzf.lazy_import('arcgis.mapping')
+
+## globale variables
+# default settings for waiting until a service is ready
+SERVICE_READY_TIMEOUT = 300 #default (sec)
+SERVICE_READY_INITIAL_DELAY = 1 #default (sec)
+SERVICE_READY_MAX_DELAY = 20 #default (sec)
+# service extensions which are enabled after publishing (all other extensions are enabled in the sddraft)
+OGC_EXTENSIONS = ["WMSServer", "WFSServer", "WCSServer"]
+# maximum number of item ids in one search query
+ITEM_SEARCH_BATCH_SIZE = 50
+
+
+def refresh_service(service):
+    """Discard the cached properties of a service so that the next access
+    reloads them from the server.
+
+    Required:
+        service -- ArcGIS Server service object (arcgis.gis.server.Service)
+    """
+    if hasattr(service, '_refresh'):
+        service._refresh()
+    elif hasattr(service, '_hydrated'):
+        service._hydrated = False
+
+
+def get_service_state(service) -> str:
+    """Get the real time state of a service.
+
+    Required:
+        service -- ArcGIS Server service object (arcgis.gis.server.Service)
+
+    Return:
+        state -- Real time state of the service (e.g. "STARTED", "STOPPED") or None
+    """
+    status = service.status
+    if not status:
+        return None
+    return status.get('realTimeState', status.get('configuredState'))
+
+
+def get_enabled_extensions(service) -> set:
+    """Get the type names of all enabled extensions of a service.
+
+    Required:
+        service -- ArcGIS Server service object (arcgis.gis.server.Service)
+
+    Return:
+        enabled -- Set with the type names of the enabled extensions (e.g. {"WMSServer"})
+    """
+    enabled = set()
+    for extension in service.properties.get("extensions", []):
+        if str(extension["enabled"]).lower() == "true":
+            enabled.add(extension["typeName"])
+    return enabled
+
+
+def wait_for_service(service, state = "STARTED", extensions = None, timeout = SERVICE_READY_TIMEOUT,
+                     initial_delay = SERVICE_READY_INITIAL_DELAY, max_delay = SERVICE_READY_MAX_DELAY,
+                     logger = None) -> bool:
+    """Wait until a service reports the expected state and has all expected extensions enabled.
+    The service is polled with an exponential backoff (with jitter) until the timeout is reached.
+
+    Required:
+        service -- ArcGIS Server service object (arcgis.gis.server.Service)
+
+    Optional:
+        state -- Expected real time state of the service ("STARTED" (default) or "STOPPED")
+        extensions -- List with the type names of extensions that must be enabled (e.g. ["WMSServer"])
+        timeout -- Maximum time to wait in seconds
+        initial_delay -- Delay in seconds before the second poll (is doubled for every further poll)
+        max_delay -- Maximum delay in seconds between two polls
+        logger -- Logger object (if not specified, messages are printed)
+
+    Return:
+        ready -- True if the service is ready, False if the timeout was reached
+    """
+    expected_extensions = set(extensions) if extensions else set()
+    start = time.time()
+    deadline = start + timeout
+    delay = initial_delay
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            refresh_service(service)
+            current_state = get_service_state(service)
+            missing_extensions = expected_extensions - get_enabled_extensions(service)
+        except Exception as e:
+            # the service may not respond while it is restarting
+            current_state = None
+            missing_extensions = expected_extensions
+            lgf.log_message(f'Service not reachable yet (attempt {attempt}): {e}', logger)
+        if current_state == state and not missing_extensions:
+            lgf.log_message(f'Service is {state} after {round(time.time() - start, 1)} sec ({attempt} polls)', logger)
+            return True
+        now = time.time()
+        if now >= deadline:
+            lgf.log_message(f'Service is not ready after {timeout} sec (state: "{current_state}", '
+                            f'extensions not yet enabled: {sorted(missing_extensions)})', logger, "warning")
+            return False
+        # exponential backoff with jitter -> avoid polling in lockstep with other clients
+        sleep_time = min(delay / 2 + random.uniform(0, delay / 2), deadline - now)
+        time.sleep(sleep_time)
+        delay = min(delay * 2, max_delay)
+
+
+def normalize_url(url) -> str:
+    """Normalize the URL of a server for comparisons (lower case, without "/admin" and trailing "/").
+
+    Required:
+        url -- URL of the server (e.g. "https://xxx/server/admin/")
+
+    Return:
+        url -- Normalized URL (e.g. "https://xxx/server")
+    """
+    url = str(url).strip().rstrip('/').lower()
+    if url.endswith('/admin'):
+        url = url[:-len('/admin')]
+    return url
+
+
+def parse_service_url(service_url) -> tuple:
+    """Split the URL of a service (e.g. the URL returned by arcpy.server.UploadServiceDefinition)
+    into the server URL, the folder, the name and the type of the service.
+
+    Required:
+        service_url -- URL of the service (e.g. "https://xxx/server/services/Test/citymaps/MapServer"
+                       or "https://xxx/server/rest/services/citymaps/MapServer")
+
+    Return:
+        server_url -- URL of the server (e.g. "https://xxx/server")
+        folder -- Folder of the service (None if the service is in the root folder)
+        name -- Name of the service
+        service_type -- Type of the service (e.g. "MapServer")
+    """
+    server_part, separator, service_path = str(service_url).partition('/services/')
+    if not separator:
+        raise ValueError(f'"{service_url}" is not the URL of a service')
+    if server_part.endswith('/rest'):
+        server_part = server_part[:-len('/rest')]
+    parts = [part for part in service_path.split('/') if part]
+    if len(parts) == 2:
+        return server_part, None, parts[0], parts[1]
+    elif len(parts) == 3:
+        return server_part, parts[0], parts[1], parts[2]
+    raise ValueError(f'"{service_url}" is not the URL of a service')
+
+
+class ServiceResolver:
+    """Resolves the federated servers and the services of a portal. The servers are listed once and
+    the services are listed once per server and folder, the results are cached for the whole run.
+    The services are identified by their URL, so that listing a folder does not load the
+    properties of every service in it. The resolver can be used by several threads.
+
+    Required:
+        gis -- GIS object of the portal (arcgis.GIS)
+
+    Optional:
+        logger -- Logger object (if not specified, messages are printed)
+    """
+    def __init__(self, gis, logger = None):
+        self.gis = gis
+        self.logger = logger
+        self._servers = None
+        self._services = {}
+        self._lock = threading.RLock()
+
+    def _load_servers(self) -> dict:
+        servers = {}
+        for server in self.gis.admin.servers.list():
+            servers[normalize_url(server.url)] = server
+        # the servers are listed with their admin URL, the federated URL is found in the server properties
+        for server_prop in self.gis.admin.servers.properties.servers:
+            server = servers.get(normalize_url(server_prop.get("adminUrl", "")))
+            if server is None:
+                lgf.log_message(f'The federated server "{server_prop.url}" was not found by its admin URL '
+                                f'"{server_prop.get("adminUrl", "")}" in the servers of the portal.', self.logger, "warning")
+                continue
+            servers[normalize_url(server_prop.url)] = server
+        return servers
+
+    def get_server(self, server_url):
+        """Get a federated server by its URL.
+
+        Required:
+            server_url -- URL of the server (e.g. "https://xxx/server")
+
+        Return:
+            server -- Server object (arcgis.gis.server.Server) or None (if not found)
+        """
+        with self._lock:
+            if self._servers is None:
+                self._servers = self._load_servers()
+            return self._servers.get(normalize_url(server_url))
+
+    def _load_services(self, server, folder) -> dict:
+        services = {}
+        for service in server.services.list(folder):
+            # ".../services/{folder}/{name}.{type}" -> (name, type)
+            name, _, service_type = service.url.rstrip('/').rsplit('/', 1)[-1].rpartition('.')
+            services[(name.lower(), service_type.lower())] = service
+        return services
+
+    def get_service(self, server_url, folder, name, service_type = "MapServer"):
+        """Get a service by its server, folder, name and type. The folder is only listed again
+        if the service is not yet known (e.g. the service was published after the last listing).
+
+        Required:
+            server_url -- URL of the server (e.g. "https://xxx/server")
+            folder -- Folder of the service (None or "" for the root folder)
+            name -- Name of the service
+
+        Optional:
+            service_type -- Type of the service (e.g. "MapServer")
+
+        Return:
+            service -- Service object (arcgis.gis.server.Service) or None (if not found)
+        """
+        server = self.get_server(server_url)
+        if server is None:
+            lgf.log_message(f'Server "{server_url}" not found.', self.logger, "error")
+            return None
+        folder = folder or None
+        key = (normalize_url(server_url), (folder or "").lower())
+        service_key = (name.lower(), service_type.lower())
+        with self._lock:
+            if key not in self._services or service_key not in self._services[key]:
+                self._services[key] = self._load_services(server, folder)
+            return self._services[key].get(service_key)
+
+    def resolve(self, service_url, server_url = None):
+        """Get a service by its URL (e.g. the URL returned by arcpy.server.UploadServiceDefinition).
+        The service object is created from the URL, the folder of the service is not listed.
+
+        Required:
+            service_url -- URL of the service (see parse_service_url)
+
+        Optional:
+            server_url -- URL of the server, if it differs from the server in the URL of the service
+                          (e.g. the federated server URL instead of the URL of the machine)
+
+        Return:
+            service -- Service object (arcgis.gis.server.Service) or None (if not found)
+        """
+        parsed_server_url, folder, name, service_type = parse_service_url(service_url)
+        server_url = server_url or parsed_server_url
+        server = self.get_server(server_url)
+        if server is None:
+            lgf.log_message(f'Server "{server_url}" not found.', self.logger, "error")
+            return None
+        admin_url = f'{server.url.rstrip("/")}/services/{folder + "/" if folder else ""}{name}.{service_type}'
+        return arcgis_server.Service(admin_url, server)
+
+
+def get_tile_info(gis, service_url, logger = None) -> dict:
+    """Get the tile info (tiling scheme) of a cached map service from the REST API of the service.
+
+    Required:
+        gis -- GIS object of the portal (arcgis.GIS)
+        service_url -- REST URL of the map service (e.g. "https://xxx/server/rest/services/Test/citymaps/MapServer")
+
+    Optional:
+        logger -- Logger object (if not specified, messages are printed)
+
+    Return:
+        tile_info -- Dictionary with the tile info or None (if the service is not cached or not reachable)
+    """
+    try:
+        tile_info = arcgis_mapping.MapImageLayer(service_url, gis=gis).properties.get("tileInfo")
+    except Exception as e:
+        lgf.log_message(f'The tile info of the service "{service_url}" could not be read: {e}', logger, "warning")
+        return None
+    return dict(tile_info) if tile_info else None
+
+
+def enable_ogc_extensions(service, extensions, state = "STARTED", timeout = SERVICE_READY_TIMEOUT, logger = None) -> bool:
+    """Enable OGC extensions (WMSServer, WFSServer, WCSServer) of a service and wait until the
+    service has restarted with the extensions enabled.
+
+    Required:
+        service -- ArcGIS Server service object (arcgis.gis.server.Service)
+        extensions -- List with the type names of the extensions (other extensions than OGC extensions are ignored)
+
+    Optional:
+        state -- Expected real time state of the service after the restart
+        timeout -- Maximum time to wait in seconds
+        logger -- Logger object (if not specified, messages are printed)
+
+    Return:
+        ready -- True if the service is ready with the extensions enabled
+    """
+    ogc_extensions = [extension for extension in extensions if extension in OGC_EXTENSIONS]
+    if not ogc_extensions:
+        return True
+    lgf.log_message(f'Enable the ogc service extensions: {ogc_extensions}', logger)
+    service_data = service.properties
+    for extension in service_data["extensions"]:
+        if extension["typeName"] in ogc_extensions:
+            extension["enabled"] = "true"
+            extension["properties"]["keyword"] = ""
+    # convert PropertyMap to json and edit the service
+    service.edit(json.dumps(dict(service_data)))
+    # wait until the service has restarted with the ogc extensions enabled
+    lgf.log_message(f'Wait until the service has restarted with the extensions {ogc_extensions}', logger)
+    return wait_for_service(service, state=state, extensions=ogc_extensions, timeout=timeout, logger=logger)
+
+
+def convert_metadata(metadata) -> dict:
+    """Convert the metadata keys of the sddraft (parameter "metadata") to the item properties
+    of the ArcGIS API for Python.
+
+    Required:
+        metadata -- Dictionary with "credits", "description", "summary", "tags" and "use_limitations"
+
+    Return:
+        item_properties -- Dictionary with "accessInformation", "description", "snippet", "tags" and "licenseInfo"
+    """
+    item_properties = metadata.copy()
+    if 'credits' in metadata:
+        item_properties['accessInformation'] = item_properties.pop('credits')
+    if 'use_limitations' in metadata:
+        item_properties['licenseInfo'] = item_properties.pop('use_limitations')
+    if 'summary' in metadata:
+        item_properties['snippet'] = item_properties.pop('summary')
+    return item_properties
+
+
+def get_items(gis, item_ids, logger = None) -> dict:
+    """Get several portal items by their ids with as few requests as possible: the items are searched
+    in batches ("id:... OR id:..."), items which are not yet in the search index (e.g. just published)
+    are fetched one by one.
+
+    Required:
+        gis -- GIS object of the portal
+        item_ids -- List with the ids of the items
+
+    Optional:
+        logger -- Logger object (if not specified, messages are printed)
+
+    Return:
+        items -- Dictionary {item id: item} (items which are not found are missing)
+    """
+    items = {}
+    item_ids = list(dict.fromkeys(item_ids))
+    for ii in range(0, len(item_ids), ITEM_SEARCH_BATCH_SIZE):
+        batch = item_ids[ii:ii + ITEM_SEARCH_BATCH_SIZE]
+        query = " OR ".join(f"id:{item_id}" for item_id in batch)
+        for item in gis.content.search(query=query, max_items=len(batch)):
+            if item.id in batch:
+                items[item.id] = item
+    for item_id in item_ids:
+        if item_id not in items:
+            item = gis.content.get(item_id)
+            if item:
+                items[item_id] = item
+            else:
+                lgf.log_message(f'Item not found with the specified itemID "{item_id}".', logger, "error")
+    return items
+
+
+class FolderCache:
+    """Caches the portal folders of the users for a whole run, so that the folder list
+    is only loaded once per user (instead of once per service). The cache can be used by several threads.
+
+    Required:
+        gis -- GIS object of the portal
+    """
+    def __init__(self, gis):
+        self.gis = gis
+        self._folders = {}
+        self._lock = threading.RLock()
+
+    def get_folders(self, username) -> dict:
+        """Get the folders of a user.
+
+        Required:
+            username -- Name of the user
+
+        Return:
+            folders -- Dictionary {folder title: folder}
+        """
+        with self._lock:
+            if username not in self._folders:
+                self._folders[username] = {folder['title']: folder for folder in self.gis.users.get(username).folders}
+            return self._folders[username]
+
+    def get_or_create_folder(self, folder_title, username, logger = None):
+        """Get a folder of a user or create it if it does not exist.
+
+        Required:
+            folder_title -- Title of the folder
+            username -- Name of the user
+
+        Optional:
+            logger -- Logger object (if not specified, messages are printed)
+
+        Return:
+            folder -- Folder (dictionary with "title", "id", ...)
+        """
+        with self._lock:
+            folders = self.get_folders(username)
+            if folder_title in folders:
+                lgf.log_message(f'Portal folder "{folder_title}" already exists', logger)
+            else:
+                lgf.log_message(f'Create portal folder "{folder_title}"', logger)
+                folders[folder_title] = self.gis.content.create_folder(folder_title, owner=username)
+            return folders[folder_title]
+
+
+def finalize_item(item, folder = None, owner = None, metadata = None, share = None, logger = None) -> dict:
+    """Move a portal item to a folder, update its metadata and share it.
+
+    Required:
+        item -- Portal item
+
+    Optional:
+        folder -- Title of the portal folder
+        owner -- Name of the owner of the folder
+        metadata -- Dictionary with the item properties to update (e.g. {"snippet": ...})
+        share -- Dictionary with the parameters of item.share ("everyone", "org", "groups")
+        logger -- Logger object (if not specified, messages are printed)
+
+    Return:
+        timings -- Dictionary with the item id, the title and the duration of every step in seconds
+    """
+    timings = {"item_id": item.id, "title": item.title, "type": item.type}
+    start = time.time()
+    if folder:
+        lgf.log_message(f'Move item "{item.title}" of type "{item.type}" to the folder "{folder}"', logger)
+        item.move(folder, owner)
+        timings["move"] = round(time.time() - start, 2)
+    if metadata:
+        step_start = time.time()
+        item.update(metadata)
+        timings["update"] = round(time.time() - step_start, 2)
+    if share:
+        step_start = time.time()
+        lgf.log_message(f'Share item "{item.title}" public:"{share.get("everyone")}", organisation:"{share.get("org")}", '
+                        f'groups:"{share.get("groups")}"', logger)
+        item.share(**share)
+        timings["share"] = round(time.time() - step_start, 2)
+    timings["total"] = round(time.time() - start, 2)
+    return timings
+
+
+def finalize_items(items, folder = None, owner = None, metadata = None, share = None, max_workers = 4,
+                   logger = None) -> list:
+    """Move, update and share several portal items concurrently (see finalize_item).
+
+    Required:
+        items -- List with portal items
+
+    Optional:
+        folder, owner, metadata, share -- See finalize_item
+        max_workers -- Number of items which are processed at the same time
+        logger -- Logger object (if not specified, messages are printed)
+
+    Return:
+        timings -- List with the timings of every item (see finalize_item), failed items contain "error"
+    """
+    def finalize(item):
+        try:
+            return finalize_item(item, folder, owner, metadata, share, logger)
+        except Exception as e:
+            lgf.log_message(f'Finalizing item "{item.title}" ({item.id}) failed: {e}', logger, "error")
+            return {"item_id": item.id, "title": item.title, "type": item.type, "error": str(e)}
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+        return list(executor.map(finalize, items))
@@ -0,0 +1,454 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: tiling_scheme_functions
+#
+# Purpose: Custom functions to calculate with the tiling scheme of a map service
+# cache (tile rows/columns, tile extents, bundles). The functions do not need arcpy.
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import math, json
+import numpy as np
+import xml.dom.minidom as DOM
+
+## globale variables
+# meters per inch (the resolution of a scale depends on the dpi of the tiling scheme)
+INCH_TO_METER = 0.0254
+# number of tile rows/columns of a bundle (compact cache)
+DEFAULT_PACKET_SIZE = 128
+
+
+def parse_extent(extent) -> tuple:
+    """Convert an extent string into a tuple.
+
+    Required:
+        extent -- Extent string "xmin ymin xmax ymax"
+
+    Return:
+        extent -- Tuple (xmin, ymin, xmax, ymax)
+    """
+    xmin, ymin, xmax, ymax = [float(value) for value in str(extent).split()[:4]]
+    return (xmin, ymin, xmax, ymax)
+
+
+def format_extent(extent) -> str:
+    """Convert an extent tuple into a string which can be used as "update_extent".
+
+    Required:
+        extent -- Tuple (xmin, ymin, xmax, ymax)
+
+    Return:
+        extent -- Extent string "xmin ymin xmax ymax"
+    """
+    return " ".join(f'{value:.6f}' for value in extent)
+
+
+def read_tiling_scheme_xml(xml_file) -> dict:
+    """Read a tiling scheme file (e.g. a predefined tiling scheme or the conf.xml of a cache).
+
+    Required:
+        xml_file -- Path to the tiling scheme file (XML)
+
+    Return:
+        tiling_scheme -- Dictionary with the tiling scheme (see get_tiling_scheme)
+    """
+    doc = DOM.parse(xml_file)
+    def get_value(tag_name, parent = doc, default = None):
+        elements = parent.getElementsByTagName(tag_name)
+        if elements and elements[0].firstChild:
+            return elements[0].firstChild.data
+        return default
+    tile_origin = doc.getElementsByTagName('TileOrigin')[0]
+    lods = []
+    for lod_info in doc.getElementsByTagName('LODInfo'):
+        lods.append({"level": int(get_value('LevelID', lod_info)),
+                     "scale": float(get_value('Scale', lod_info)),
+                     "resolution": float(get_value('Resolution', lod_info))})
+    storage_format = get_value('StorageFormat', default="esriMapCacheStorageModeCompactV2")
+    return {"tile_origin": (float(get_value('X', tile_origin)), float(get_value('Y', tile_origin))),
+            "tile_cols": int(get_value('TileCols', default=256)),
+            "tile_rows": int(get_value('TileRows', default=256)),
+            "dpi": float(get_value('DPI', default=96)),
+            "wkid": get_value('LatestWKID', default=get_value('WKID')),
+            "lods": lods,
+            "cache_tile_format": get_value('CacheTileFormat', default="PNG"),
+            "storage_format": "EXPLODED" if "Exploded" in storage_format else "COMPACT",
+            "packet_size": int(get_value('PacketSize', default=DEFAULT_PACKET_SIZE))}
+
+
+def get_tiling_scheme(enable_cache) -> dict:
+    """Get the tiling scheme of a cache from the parameters of the section "enable_cache"
+    or from the predefined tiling scheme file (XML).
+
+    Required:
+        enable_cache -- Dictionary with the parameters for arcpy.server.CreateMapServerCache
+
+    Return:
+        tiling_scheme -- Dictionary {"tile_origin": (x, y), "tile_cols": ..., "tile_rows": ..., "dpi": ...,
+                         "lods": [{"level": ..., "scale": ..., "resolution": ...}, ...], "cache_tile_format": ...,
+                         "storage_format": ..., "packet_size": ...} or None if the tiling scheme is not known
+                         (no predefined tiling scheme and no "tile_origin")
+    """
+    if enable_cache.get("predefined_tiling_scheme") and enable_cache.get("tiling_scheme_type") == "PREDEFINED":
+        return read_tiling_scheme_xml(enable_cache["predefined_tiling_scheme"])
+    if not enable_cache.get("tile_origin"):
+        # the origin is chosen by the server when the cache is created
+        return None
+    tile_cols, tile_rows = [int(value) for value in enable_cache.get("tile_size", "256 x 256").lower().split('x')]
+    tile_origin = [float(value) for value in enable_cache["tile_origin"].split()]
+    dpi = float(enable_cache.get("dots_per_inch", 96))
+    lods = []
+    if enable_cache.get("scales"):
+        # the levels are numbered from the smallest scale (largest scale denominator)
+        scales = sorted([float(scale) for scale in str(enable_cache["scales"]).split(';')], reverse=True)
+        for level, scale in enumerate(scales):
+            lods.append({"level": level, "scale": scale, "resolution": scale * INCH_TO_METER / dpi})
+    return {"tile_origin": (tile_origin[0], tile_origin[1]),
+            "tile_cols": tile_cols,
+            "tile_rows": tile_rows,
+            "dpi": dpi,
+            "wkid": None,
+            "lods": lods,
+            "cache_tile_format": enable_cache.get("cache_tile_format", "PNG"),
+            "storage_format": enable_cache.get("storage_format", "COMPACT"),
+            "packet_size": DEFAULT_PACKET_SIZE}
+
+
+def read_tile_info(tile_info) -> dict:
+    """Read the tiling scheme from the "tileInfo" of a cached map service (REST API, f=json).
+
+    Required:
+        tile_info -- Dictionary with the tile info of the service
+
+    Return:
+        tiling_scheme -- Dictionary with the tiling scheme (see get_tiling_scheme)
+    """
+    spatial_reference = tile_info.get("spatialReference", {})
+    return {"tile_origin": (float(tile_info["origin"]["x"]), float(tile_info["origin"]["y"])),
+            "tile_cols": int(tile_info.get("cols", 256)),
+            "tile_rows": int(tile_info.get("rows", 256)),
+            "dpi": float(tile_info.get("dpi", 96)),
+            "wkid": spatial_reference.get("latestWkid", spatial_reference.get("wkid")),
+            "lods": [{"level": int(lod["level"]), "scale": float(lod["scale"]), "resolution": float(lod["resolution"])}
+                     for lod in tile_info.get("lods", [])],
+            "cache_tile_format": tile_info.get("format", "PNG"),
+            "storage_format": "COMPACT",
+            "packet_size": DEFAULT_PACKET_SIZE}
+
+
+def get_tile_info(tiling_scheme) -> dict:
+    """Get the "tileInfo" of a cached map service (REST API, f=json) from a tiling scheme.
+
+    Required:
+        tiling_scheme -- Dictionary with the tiling scheme (see get_tiling_scheme)
+
+    Return:
+        tile_info -- Dictionary with the tile info
+    """
+    tile_info = {"rows": tiling_scheme["tile_rows"], "cols": tiling_scheme["tile_cols"], "dpi": tiling_scheme["dpi"],
+                 "format": tiling_scheme["cache_tile_format"],
+                 "origin": {"x": tiling_scheme["tile_origin"][0], "y": tiling_scheme["tile_origin"][1]},
+                 "lods": [dict(lod) for lod in tiling_scheme["lods"]]}
+    if tiling_scheme["wkid"]:
+        tile_info["spatialReference"] = {"wkid": int(tiling_scheme["wkid"])}
+    return tile_info
+
+
+def get_lod(tiling_scheme, scale = None, level = None) -> dict:
+    """Get the level of detail of a scale or level id.
+
+    Required:
+        tiling_scheme -- Dictionary with the tiling scheme (see get_tiling_scheme)
+
+    Optional:
+        scale -- Scale (e.g. 25000)
+        level -- Level id (e.g. 0)
+
+    Return:
+        lod -- Dictionary {"level": ..., "scale": ..., "resolution": ...} or None (if not found)
+    """
+    for lod in tiling_scheme["lods"]:
+        if level is not None and lod["level"] == int(level):
+            return lod
+        if scale is not None and math.isclose(lod["scale"], float(scale), rel_tol=1e-6):
+            return lod
+    return None
+
+
+def get_resolution(scale, tiling_scheme) -> float:
+    """Get the size of a pixel in map units at a scale. The resolution of the tiling
+    scheme is used if the scale is a level of the tiling scheme.
+
+    Required:
+        scale -- Scale (e.g. 25000)
+        tiling_scheme -- Dictionary with the tiling scheme (see get_tiling_scheme)
+
+    Return:
+        resolution -- Size of a pixel in map units
+    """
+    lod = get_lod(tiling_scheme, scale=scale)
+    if lod:
+        return lod["resolution"]
+    return float(scale) * INCH_TO_METER / float(tiling_scheme["dpi"])
+
+
+def get_tile_size(scale, tiling_scheme) -> tuple:
+    """Get the width and height of a tile in map units at a scale.
+
+    Required:
+        scale -- Scale (e.g. 25000)
+        tiling_scheme -- Dictionary with the tiling scheme (see get_tiling_scheme)
+
+    Return:
+        tile_size -- Tuple (width, height)
+    """
+    resolution = get_resolution(scale, tiling_scheme)
+    return (tiling_scheme["tile_cols"] * resolution, tiling_scheme["tile_rows"] * resolution)
+
+
+def get_tile_range(extent, scale, tiling_scheme) -> tuple:
+    """Get the rows and columns of the tiles which intersect an extent at a scale.
+
+    Required:
+        extent -- Tuple (xmin, ymin, xmax, ymax)
+        scale -- Scale (e.g. 25000)
+        tiling_scheme -- Dictionary with the tiling scheme (see get_tiling_scheme)
+
+    Return:
+        tile_range -- Tuple (row_min, row_max, col_min, col_max) (inclusive)
+    """
+    origin_x, origin_y = tiling_scheme["tile_origin"]
+    tile_width, tile_height = get_tile_size(scale, tiling_scheme)
+    xmin, ymin, xmax, ymax = extent
+    col_min = math.floor((xmin - origin_x) / tile_width)
+    col_max = math.ceil((xmax - origin_x) / tile_width) - 1
+    row_min = math.floor((origin_y - ymax) / tile_height)
+    row_max = math.ceil((origin_y - ymin) / tile_height) - 1
+    return (row_min, max(row_min, row_max), col_min, max(col_min, col_max))
+
+
+def get_tile_ranges(extent, scales, tiling_scheme) -> dict:
+    """Get the rows, columns and the number of tiles which intersect an extent for several
+    scales at once (vectorized version of get_tile_range).
+
+    Required:
+        extent -- Tuple (xmin, ymin, xmax, ymax)
+        scales -- List with the scales (e.g. [25000, 10000, 5000])
+        tiling_scheme -- Dictionary with the tiling scheme (see get_tiling_scheme)
+
+    Return:
+        tile_ranges -- Dictionary with numpy arrays (one value per scale): "scale", "row_min", "row_max",
+                       "col_min", "col_max", "tiles", "bundles"
+    """
+    origin_x, origin_y = tiling_scheme["tile_origin"]
+    scales = np.asarray([float(scale) for scale in scales])
+    resolutions = np.asarray([get_resolution(scale, tiling_scheme) for scale in scales])
+    tile_width = tiling_scheme["tile_cols"] * resolutions
+    tile_height = tiling_scheme["tile_rows"] * resolutions
+    xmin, ymin, xmax, ymax = extent
+    col_min = np.floor((xmin - origin_x) / tile_width).astype(np.int64)
+    col_max = np.maximum(np.ceil((xmax - origin_x) / tile_width).astype(np.int64) - 1, col_min)
+    row_min = np.floor((origin_y - ymax) / tile_height).astype(np.int64)
+    row_max = np.maximum(np.ceil((origin_y - ymin) / tile_height).astype(np.int64) - 1, row_min)
+    packet_size = tiling_scheme.get("packet_size", DEFAULT_PACKET_SIZE)
+    bundles = ((row_max // packet_size - row_min // packet_size + 1) *
+               (col_max // packet_size - col_min // packet_size + 1))
+    return {"scale": scales, "row_min": row_min, "row_max": row_max, "col_min": col_min, "col_max": col_max,
+            "tiles": (row_max - row_min + 1) * (col_max - col_min + 1), "bundles": bundles}
+
+
+def get_tile_extent(row_min, row_max, col_min, col_max, scale, tiling_scheme) -> tuple:
+    """Get the extent covered by a block of tiles.
+
+    Required:
+        row_min, row_max, col_min, col_max -- Rows and columns of the block (inclusive)
+        scale -- Scale (e.g. 25000)
+        tiling_scheme -- Dictionary with the tiling scheme (see get_tiling_scheme)
+
+    Return:
+        extent -- Tuple (xmin, ymin, xmax, ymax)
+    """
+    origin_x, origin_y = tiling_scheme["tile_origin"]
+    tile_width, tile_height = get_tile_size(scale, tiling_scheme)
+    return (origin_x + col_min * tile_width, origin_y - (row_max + 1) * tile_height,
+            origin_x + (col_max + 1) * tile_width, origin_y - row_min * tile_height)
+
+
+def get_block_extent(tile_range, scale, tiling_scheme) -> tuple:
+    """Get the extent of a block of tiles, shrunk by half a pixel so that the
+    neighbouring tiles are not included when the extent is used to update the cache.
+
+    Required:
+        tile_range -- Tuple (row_min, row_max, col_min, col_max)
+        scale -- Scale (e.g. 25000)
+        tiling_scheme -- Dictionary with the tiling scheme (see get_tiling_scheme)
+
+    Return:
+        extent -- Tuple (xmin, ymin, xmax, ymax)
+    """
+    xmin, ymin, xmax, ymax = get_tile_extent(*tile_range, scale, tiling_scheme)
+    margin = get_resolution(scale, tiling_scheme) / 2
+    return (xmin + margin, ymin + margin, xmax - margin, ymax - margin)
+
+
+def merge_tile_ranges(tile_ranges, max_gap = 0) -> list:
+    """Merge overlapping or neighbouring blocks of tiles into their bounding blocks. The
+    merged blocks do not overlap, so that no tile is contained in two blocks.
+
+    Required:
+        tile_ranges -- List with tuples (row_min, row_max, col_min, col_max)
+
+    Optional:
+        max_gap -- Blocks which are at most max_gap tiles apart are merged (0 = overlapping and
+                   neighbouring blocks)
+
+    Return:
+        tile_ranges -- List with the merged tuples (row_min, row_max, col_min, col_max)
+    """
+    merged = []
+    for tile_range in sorted(tile_ranges, key=lambda tile_range: (tile_range[2], tile_range[0])):
+        row_min, row_max, col_min, col_max = tile_range
+        ii = 0
+        while ii < len(merged):
+            other = merged[ii]
+            if (other[0] <= row_max + 1 + max_gap and row_min <= other[1] + 1 + max_gap and
+                    other[2] <= col_max + 1 + max_gap and col_min <= other[3] + 1 + max_gap):
+                row_min, row_max = min(row_min, other[0]), max(row_max, other[1])
+                col_min, col_max = min(col_min, other[2]), max(col_max, other[3])
+                merged.pop(ii)
+                # the block has grown -> check all merged blocks again
+                ii = 0
+            else:
+                ii += 1
+        merged.append((row_min, row_max, col_min, col_max))
+    return merged
+
+
+def read_polygon(polygon_file) -> list:
+    """Read the rings of a polygon from a GeoJSON or an Esri JSON file.
+
+    Required:
+        polygon_file -- Path to the JSON file (GeoJSON FeatureCollection/Feature/Polygon/MultiPolygon or Esri JSON)
+
+    Return:
+        rings -- List with the rings of all polygons (each ring is a list of [x, y] coordinates)
+    """
+    with open(polygon_file, encoding='utf-8') as f:
+        data = json.load(f)
+    rings = []
+    def add_geometry(geometry):
+        if not geometry:
+            return
+        if "rings" in geometry: # Esri JSON
+            rings.extend(geometry["rings"])
+        elif geometry.get("type") == "Polygon":
+            rings.extend(geometry["coordinates"])
+        elif geometry.get("type") == "MultiPolygon":
+            for polygon in geometry["coordinates"]:
+                rings.extend(polygon)
+    if "features" in data:
+        for feature in data["features"]:
+            add_geometry(feature.get("geometry"))
+    elif "geometry" in data:
+        add_geometry(data["geometry"])
+    else:
+        add_geometry(data)
+    return rings
+
+
+def get_rings_extent(rings) -> tuple:
+    """Get the extent of polygon rings.
+
+    Required:
+        rings -- List with the rings of the polygon (see read_polygon)
+
+    Return:
+        extent -- Tuple (xmin, ymin, xmax, ymax)
+    """
+    points = np.concatenate([np.asarray(ring, dtype=float)[:, :2] for ring in rings])
+    return (points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max())
+
+
+def get_covered_tiles(rings, scale, tiling_scheme) -> tuple:
+    """Get the tiles which intersect a polygon at a scale (exact tile coverage).
+    A tile is covered if one of its corners is inside the polygon (even-odd rule, holes are
+    respected) or if an edge of the polygon passes through the tile.
+
+    Required:
+        rings -- List with the rings of the polygon (see read_polygon)
+        scale -- Scale (e.g. 25000)
+        tiling_scheme -- Dictionary with the tiling scheme (see get_tiling_scheme)
+
+    Return:
+        row_min, col_min -- Row and column of the upper left tile of the coverage grid
+        coverage -- 2d numpy array (bool) with the covered tiles (rows x columns)
+    """
+    origin_x, origin_y = tiling_scheme["tile_origin"]
+    tile_width, tile_height = get_tile_size(scale, tiling_scheme)
+    row_min, row_max, col_min, col_max = get_tile_range(get_rings_extent(rings), scale, tiling_scheme)
+    n_rows = row_max - row_min + 1
+    n_cols = col_max - col_min + 1
+    # all edges of all rings: start (x0, y0) and end (x1, y1), in tile units relative to the grid
+    edges = []
+    for ring in rings:
+        points = np.asarray(ring, dtype=float)[:, :2]
+        if not np.array_equal(points[0], points[-1]):
+            points = np.vstack([points, points[:1]])
+        col = (points[:, 0] - origin_x) / tile_width - col_min
+        row = (origin_y - points[:, 1]) / tile_height - row_min
+        edges.append(np.column_stack([col[:-1], row[:-1], col[1:], row[1:]]))
+    edges = np.concatenate(edges)
+    c0, r0, c1, r1 = edges[:, 0], edges[:, 1], edges[:, 2], edges[:, 3]
+
+    # 1. corners inside the polygon: scanline over the horizontal grid lines (row = 0..n_rows)
+    corners_inside = np.zeros((n_rows + 1, n_cols + 1), dtype=bool)
+    corner_cols = np.arange(n_cols + 1, dtype=float)
+    for line in range(n_rows + 1):
+        crossing = (r0 <= line) != (r1 <= line)
+        if not crossing.any():
+            continue
+        t = (line - r0[crossing]) / (r1[crossing] - r0[crossing])
+        x_crossings = np.sort(c0[crossing] + t * (c1[crossing] - c0[crossing]))
+        # a corner is inside if an odd number of crossings is left of it
+        corners_inside[line] = np.searchsorted(x_crossings, corner_cols, side='right') % 2 == 1
+    coverage = (corners_inside[:-1, :-1] | corners_inside[:-1, 1:] |
+                corners_inside[1:, :-1] | corners_inside[1:, 1:])
+
+    # 2. tiles crossed by an edge: split each edge at the grid lines, the middle of each piece lies in a crossed tile
+    for x0, y0, x1, y1 in edges:
+        t_values = [np.array([0.0, 1.0])]
+        if x1 != x0:
+            grid_cols = np.arange(math.ceil(min(x0, x1)), math.floor(max(x0, x1)) + 1)
+            t_values.append((grid_cols - x0) / (x1 - x0))
+        if y1 != y0:
+            grid_rows = np.arange(math.ceil(min(y0, y1)), math.floor(max(y0, y1)) + 1)
+            t_values.append((grid_rows - y0) / (y1 - y0))
+        t = np.unique(np.clip(np.concatenate(t_values), 0, 1))
+        t_middle = (t[:-1] + t[1:]) / 2
+        cols = np.floor(x0 + t_middle * (x1 - x0)).astype(np.int64)
+        rows = np.floor(y0 + t_middle * (y1 - y0)).astype(np.int64)
+        valid = (rows >= 0) & (rows < n_rows) & (cols >= 0) & (cols < n_cols)
+        coverage[rows[valid], cols[valid]] = True
+    return row_min, col_min, coverage
+
+
+def count_bundles(row_min, col_min, coverage, packet_size = DEFAULT_PACKET_SIZE) -> int:
+    """Count the bundles (compact cache) which contain at least one covered tile.
+
+    Required:
+        row_min, col_min -- Row and column of the upper left tile of the coverage grid
+        coverage -- 2d numpy array (bool) with the covered tiles (see get_covered_tiles)
+
+    Optional:
+        packet_size -- Number of tile rows/columns of a bundle
+
+    Return:
+        bundles -- Number of bundles
+    """
+    rows, cols = np.nonzero(coverage)
+    if rows.size == 0:
+        return 0
+    bundle_ids = ((rows + row_min) // packet_size) * (1 << 32) + (cols + col_min) // packet_size
+    return int(np.unique(bundle_ids).size)
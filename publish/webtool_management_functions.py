@@ -0,0 +1,470 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Name: webtool_management_functions
+#
+# Purpose: Custom functions to publish python webtools with arcpy: execute the
+# tool, stage the service definition and upload it, either one after the other
+# or in a pipeline (staging in worker processes, concurrent uploads).
+#
+# Author: Timo Wicki
+#
+# Created: 19.10.2026
+# -----------------------------------------------------------------------------
+import os, sys, json, time, hashlib, threading
+import arcpy
+# python Skript with my own service management functions
+import service_management_functions as smf
+# python Skript with my own sign in functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'common'))
+import sign_in_functions as sif
+# python Skript with my own logging functions
+import logging_functions as lgf
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+## globale variables
+# default settings for the pipeline
+MAX_STAGING_WORKERS = 4 #default (worker processes which execute and stage the tools)
+MAX_UPLOADS = 2 #default (uploaded webtools whose portal items are finalized at the same time)
+# parameters which do not change the staged service definition (see get_stage_key)
+NON_STAGE_PARAMETERS = frozenset(["portal_url", "portal_folder", "service_documents", "filename", "share"])
+# extensions of the script files of a toolbox (in the folder of the toolbox and its subfolders, see get_toolbox_hash)
+SCRIPT_EXTENSIONS = (".py",)
+# caches of the current (worker) process: imported toolboxes {path: (modification time, toolbox)},
+# hashes of the toolbox and script files {path: (modification time, size, hash)} and results of the tools {result key: result}
+_toolboxes = {}
+_file_hashes = {}
+_results = {}
+
+
+class MessageLog:
+    """Collects the messages of a step, so that the messages of a worker process can be
+    logged by the main process (loggers can not be passed to other processes).
+
+    Optional:
+        logger -- Logger object (if specified, the messages are also logged immediately)
+    """
+    def __init__(self, logger = None):
+        self.logger = logger
+        self.messages = []
+
+    def log(self, message, level = "info") -> None:
+        self.messages.append([level, message])
+        if self.logger:
+            getattr(self.logger, level)(message)
+
+
+def replay_messages(messages, logger = None) -> None:
+    """Log the messages collected by a MessageLog (e.g. in a worker process).
+
+    Required:
+        messages -- List with [level, message]
+
+    Optional:
+        logger -- Logger object (if not specified, messages are printed)
+    """
+    for level, message in messages:
+        lgf.log_message(message, logger, level)
+
+
+def import_toolbox(toolbox_name):
+    """Import a toolbox only once per process (the toolbox is imported again if the file has changed).
+
+    Required:
+        toolbox_name -- Path to the toolbox (e.g. tbx, atbx, pyt)
+
+    Return:
+        toolbox -- Imported toolbox (see arcpy.ImportToolbox)
+    """
+    path = os.path.abspath(toolbox_name)
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    if path not in _toolboxes or _toolboxes[path][0] != mtime:
+        _toolboxes[path] = (mtime, arcpy.ImportToolbox(toolbox_name))
+    return _toolboxes[path][1]
+
+
+def get_file_hash(path) -> str:
+    """Get the hash of a file (cached per process as long as the file is not modified).
+
+    Required:
+        path -- Path to the file
+
+    Return:
+        file_hash -- Hash (hex string)
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    if path in _file_hashes and _file_hashes[path][:2] == (stat.st_mtime, stat.st_size):
+        return _file_hashes[path][2]
+    file_hash = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            file_hash.update(block)
+    _file_hashes[path] = (stat.st_mtime, stat.st_size, file_hash.hexdigest())
+    return _file_hashes[path][2]
+
+
+def get_toolbox_hash(toolbox_name) -> str:
+    """Get the hash of a toolbox file and of the script files in the folder of the toolbox and its
+    subfolders (e.g. the scripts of the tools of a tbx or the helper modules of a pyt), so that a
+    change of a script also changes the hash.
+
+    Required:
+        toolbox_name -- Path to the toolbox
+
+    Return:
+        toolbox_hash -- Hash (hex string)
+    """
+    path = os.path.abspath(toolbox_name)
+    hashes = [get_file_hash(path)]
+    folder = os.path.dirname(path)
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        for file in sorted(files):
+            if file.lower().endswith(SCRIPT_EXTENSIONS):
+                script = os.path.join(root, file)
+                hashes.append([os.path.relpath(script, folder), get_file_hash(script)])
+    return hashlib.sha256(json.dumps(hashes).encode('utf-8')).hexdigest()
+
+
+def get_result_key(toolbox_hash, tool_name, tool_parameters) -> str:
+    """Get the key of the result of a tool run: hash of the toolbox, name of the tool and parameters."""
+    key = json.dumps([toolbox_hash, tool_name, tool_parameters], ensure_ascii=False)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def get_stage_key(toolbox_hash, parameters) -> str:
+    """Get the key of a staged webtool: hash of the toolbox (with its scripts) and all parameters which change the
+    service definition (the sd file of an earlier run with the same key can be uploaded again).
+
+    Required:
+        toolbox_hash -- Hash of the toolbox (see get_toolbox_hash)
+        parameters -- Parameters of the webtool (see stage_webtool)
+
+    Return:
+        stage_key -- Hash (hex string)
+    """
+    stage_parameters = {key: value for key, value in parameters.items() if key not in NON_STAGE_PARAMETERS}
+    key = json.dumps([toolbox_hash, stage_parameters], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def read_stage_state(state_file) -> dict:
+    """Read the stage state of a webtool (written by write_stage_state after staging).
+
+    Required:
+        state_file -- Path to the state file (JSON)
+
+    Return:
+        state -- Dictionary with "stage_key", "sd_file" and "staged" (empty if there is no state file)
+    """
+    if not os.path.isfile(state_file):
+        return {}
+    with open(state_file, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_stage_state(state_file, stage_key, sd_file) -> None:
+    """Write the stage state of a webtool.
+
+    Required:
+        state_file -- Path to the state file (JSON)
+        stage_key -- Key of the staged webtool (see get_stage_key)
+        sd_file -- Path to the sd file
+    """
+    state = {"stage_key": stage_key, "sd_file": sd_file, "staged": time.ctime()}
+    temp_file = f'{state_file}.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(temp_file, state_file)
+
+
+def stage_webtool(parameters, credentials = None, logger = None, use_cache = True) -> dict:
+    """Execute the tool, create the service definition draft and stage it (sd file).
+    The messages are collected, so that the function can run in a worker process.
+
+    Required:
+        parameters -- Dictionary with the parameters of the JSON file (see publish_webtool_portal.py) and
+                      "filename" (name of the sddraft and sd file without extension)
+
+    Optional:
+        credentials -- Credentials to sign in to the portal first (see sif.sign_in), if the process is not yet signed in
+        logger -- Logger object (if specified, the messages are also logged immediately)
+        use_cache -- If True (default), the sd file of an earlier run is reused if the toolbox, its scripts and
+                     the parameters have not changed and the result of a tool run with the same parameters is reused within the process
+
+    Return:
+        staged -- Dictionary with "sd_file", "seconds", "cached" (True if the sd file of an earlier run is reused),
+                  "messages" (list with [level, message]) and "error" (None if the webtool was staged)
+    """
+    log = MessageLog(logger)
+    start = time.time()
+    staged = {"sd_file": None, "seconds": None, "cached": False, "messages": log.messages, "error": None}
+    metadata = parameters["metadata"] or {}
+    # name of the output files
+    sddraft_filename = os.path.join(parameters["service_documents"], f'{parameters["filename"]}.sddraft')
+    sd_filename = os.path.join(parameters["service_documents"], f'{parameters["filename"]}.sd')
+    state_file = os.path.join(parameters["service_documents"], f'{parameters["filename"]}_stage_state.json')
+
+    ## reuse the sd file of an earlier run if the toolbox, its scripts and the parameters have not changed
+    try:
+        toolbox_hash = get_toolbox_hash(parameters["toolbox_name"])
+    except OSError as e:
+        staged["error"] = f'Reading the toolbox "{parameters["toolbox_name"]}" failed: {e}'
+        return staged
+    stage_key = get_stage_key(toolbox_hash, parameters)
+    if use_cache:
+        state = read_stage_state(state_file)
+        if state.get("stage_key") == stage_key and os.path.isfile(sd_filename):
+            log.log(f'The toolbox, its scripts and the parameters have not changed since the staging at {state["staged"]}: reuse the sd file "{sd_filename}"')
+            staged.update({"sd_file": sd_filename, "seconds": round(time.time() - start, 2), "cached": True})
+            return staged
+    if os.path.exists(state_file):
+        os.remove(state_file)
+    if credentials:
+        sif.sign_in(credentials)
+
+    ## execute tool (only once per process for the same toolbox, tool and parameters)
+    result_key = get_result_key(toolbox_hash, parameters["tool_name"], parameters["tool_parameters"])
+    if use_cache and result_key in _results:
+        log.log(f'Reuse the result of the tool "{parameters["tool_name"]}" with the same parameters')
+        result = _results[result_key]
+    else:
+        try:
+            # import toolbox (only once per process)
+            toolbox = import_toolbox(parameters["toolbox_name"])
+            # create function object
+            tool = getattr(toolbox, parameters["tool_name"])
+            # execute tool
+            log.log("Execute tool")
+            result = tool(*parameters["tool_parameters"])
+            log.log(result.getMessages())
+        except Exception as e:
+            staged["error"] = f'Executing tool failed: {e.args[0] if e.args else e}'
+            return staged
+        _results[result_key] = result
+
+    ## create sd draft file
+    log.log("Create SdDraft file")
+    try:
+        log.log(f'The tool "{parameters["tool_name"]}" will be published as webtool "{parameters["service_name"]}"')
+        # Create service definition draft and return analyzer messages
+        analyzeMessages = arcpy.CreateGPSDDraft(
+            result, sddraft_filename, parameters["service_name"], server_type=parameters["server_type"],
+            copy_data_to_server=parameters["copy_data_to_server"], folder_name=parameters["server_folder"],
+            summary=metadata.get('summary', ""), tags=metadata.get('tags', ""), executionType=parameters["execution_type"],
+            resultMapServer=parameters["result_map_server"], showMessages=parameters["show_messages"],
+            maximumRecords=parameters["maximum_records"], minInstances=parameters["min_instances"],
+            maxInstances=parameters["max_instances"], maxUsageTime=parameters["max_usage_time"],
+            maxWaitTime=parameters["max_wait_time"], maxIdleTime=parameters["max_idle_time"],
+            capabilities=parameters["capabilities"], constantValues=parameters["constant_values"])
+        if analyzeMessages['warnings'] != {}:
+            log.log(analyzeMessages['warnings'], "warning")
+        if analyzeMessages['errors'] != {}:
+            staged["error"] = f'Analyzing the SdDraft file failed: {analyzeMessages["errors"]}'
+            return staged
+        log.log("Created SdDraft file")
+    except Exception as e:
+        staged["error"] = f'Creating SdDraft file failed: {e.args[0] if e.args else e}'
+        return staged
+
+    ## edit sd draft file
+    try:
+        log.log("Edit SdDraft file")
+        # allow overwriting the webtool ("https://www.spatialtimes.com/2019/09/python-script-to-overwrite-existing-service-in-arcgis-server/")
+        with open(sddraft_filename, 'r') as file:
+            filedata = file.read()
+        if parameters["overwrite_existing_service"]:
+            filedata = filedata.replace('esriServiceDefinitionType_New', 'esriServiceDefinitionType_Replacement')
+            log.log("Allow overwriting the webtool")
+        with open(sddraft_filename, 'w') as file:
+            file.write(filedata)
+        log.log("Edited SdDraft file")
+    except Exception as e:
+        staged["error"] = f'Editing SdDraft file failed: {e.args[0] if e.args else e}'
+        return staged
+
+    ## create sd file
+    try:
+        # delete sd file if already exist
+        if os.path.exists(sd_filename):
+            log.log("Delete existing sd file")
+            os.remove(sd_filename)
+        log.log("Create SD file: Start staging")
+        arcpy.server.StageService(sddraft_filename, sd_filename)
+        log.log("Created SD file")
+    except Exception as e:
+        staged["error"] = f'Creating SD file failed: {e.args[0] if e.args else e}'
+        return staged
+    write_stage_state(state_file, stage_key, sd_filename)
+    staged["sd_file"] = sd_filename
+    staged["seconds"] = round(time.time() - start, 2)
+    return staged
+
+
+def upload_webtool(sd_file, federated_server_url, share = None, logger = None):
+    """Upload a staged webtool (sd file) to the federated server and share it.
+
+    Required:
+        sd_file -- Path to the sd file
+        federated_server_url -- URL of the federated server
+
+    Optional:
+        share -- Dictionary with the sharing parameters of arcpy.server.UploadServiceDefinition
+        logger -- Logger object (if not specified, messages are printed)
+
+    Return:
+        result -- Result object of arcpy.server.UploadServiceDefinition
+    """
+    if share:
+        lgf.log_message("Publish and share service", logger)
+        result = arcpy.server.UploadServiceDefinition(in_sd_file = sd_file, in_server = federated_server_url, **share)
+    else:
+        lgf.log_message("Publish service", logger)
+        result = arcpy.server.UploadServiceDefinition(in_sd_file = sd_file, in_server = federated_server_url)
+    lgf.log_message("Published service", logger)
+    return result
+
+
+def get_webtool_items(gis, service_url, federated_server_url, resolver = None, logger = None) -> list:
+    """Get the portal items of a published webtool: the service is resolved from the URL returned by
+    the upload and the items are fetched by the ids in the portal properties of the service.
+    If the service has no portal items (e.g. not published to a federated server), the items
+    are searched by the name of the service.
+
+    Required:
+        gis -- GIS object of the portal (signed in as the owner of the webtool)
+        service_url -- URL of the service returned by arcpy.server.UploadServiceDefinition
+        federated_server_url -- URL of the federated server
+
+    Optional:
+        resolver -- ServiceResolver object of the portal (see smf.ServiceResolver, cached for the whole run)
+        logger -- Logger object (if not specified, messages are printed)
+
+    Return:
+        items -- List with the portal items of the webtool
+    """
+    if resolver is None:
+        resolver = smf.ServiceResolver(gis, logger)
+    lgf.log_message(f'Search service "{service_url}" on server {federated_server_url}', logger)
+    service = resolver.resolve(service_url, federated_server_url)
+    item_ids = []
+    if service:
+        portal_properties = service.properties.get("portalProperties") or {}
+        item_ids = [portal_item["itemID"] for portal_item in portal_properties.get("portalItems", [])]
+    if item_ids:
+        return list(smf.get_items(gis, item_ids, logger).values())
+    # search the portal item by the name of the service
+    _, _, service_name, _ = smf.parse_service_url(service_url)
+    lgf.log_message(f'No portal items found in the properties of the service "{service_url}": search the items by title', logger, "warning")
+    username = gis.users.me.username
+    items = [item for item in gis.content.search(query=f"title: {service_name} & owner: {username}")
+             if item.title == service_name]
+    if not items:
+        lgf.log_message(f'Item "{service_name}" could not be found in the portal!', logger, "error")
+    return items
+
+
+class WebtoolPipeline:
+    """Publishes several webtools in a pipeline: the tools are executed and staged in a pool of
+    worker processes (CPU and disk bound) and every staged webtool is uploaded as soon as it is
+    ready, so that staging and uploading overlap. arcpy is not thread-safe, therefore the sd files
+    are uploaded one after the other by a single upload thread, only the portal items of the
+    uploaded webtools (REST) are finalized by a bounded number of threads at the same time.
+
+    Required:
+        finalize -- Function finalize(parameters, service_url, logger) which finalizes the portal items of
+                    an uploaded webtool (called in a finalize thread, see get_webtool_items)
+
+    Optional:
+        max_workers -- Number of worker processes for executing and staging the tools
+        max_uploads -- Number of uploaded webtools which are finalized at the same time
+        credentials -- Dictionary {portal url: credentials} to sign in the worker processes (see sif.sign_in)
+        use_cache -- If False, the sd files and results of earlier runs are not reused (see stage_webtool)
+    """
+    def __init__(self, finalize, max_workers = MAX_STAGING_WORKERS, max_uploads = MAX_UPLOADS, credentials = None,
+                 use_cache = True):
+        self.finalize = finalize
+        self.credentials = credentials if credentials is not None else {}
+        self.use_cache = use_cache
+        self._staging = ProcessPoolExecutor(max_workers=max(1, max_workers))
+        self._uploads = ThreadPoolExecutor(max_workers=1)
+        self._finalizing = ThreadPoolExecutor(max_workers=max(1, max_uploads))
+        self._jobs = []
+
+    def submit(self, name, parameters, logger = None) -> None:
+        """Stage a webtool in a worker process and upload it as soon as it is staged.
+
+        Required:
+            name -- Name of the job (e.g. name of the log file)
+            parameters -- Parameters of the webtool (see stage_webtool)
+
+        Optional:
+            logger -- Logger object of the webtool (if not specified, messages are printed)
+        """
+        job = {"name": name, "parameters": parameters, "logger": logger, "staged": None, "upload": None,
+               "finished": None, "done": threading.Event()}
+        self._jobs.append(job)
+        job["staging"] = self._staging.submit(stage_webtool, parameters, self.credentials.get(parameters["portal_url"]),
+                                              use_cache=self.use_cache)
+        job["staging"].add_done_callback(lambda future: self._staged(job))
+
+    def _staged(self, job) -> None:
+        try:
+            try:
+                job["staged"] = job["staging"].result()
+            except Exception as e:
+                job["staged"] = {"sd_file": None, "seconds": None, "cached": False, "messages": [], "error": f'Staging failed: {e}'}
+            replay_messages(job["staged"]["messages"], job["logger"])
+            if job["staged"]["error"]:
+                lgf.log_message(job["staged"]["error"], job["logger"], "error")
+            else:
+                lgf.log_message(f'Staged webtool "{job["parameters"]["service_name"]}" in {job["staged"]["seconds"]} sec', job["logger"])
+                job["upload"] = self._uploads.submit(self._upload, job)
+        finally:
+            if not job["upload"]:
+                job["finished"] = time.time()
+            job["done"].set()
+
+    def _upload(self, job):
+        # the upload (arcpy) runs in the single upload thread, the finalizing (REST) in the finalize threads
+        try:
+            parameters = job["parameters"]
+            result = upload_webtool(job["staged"]["sd_file"], parameters["federated_server_url"], parameters["share"],
+                                    job["logger"])
+            return self._finalizing.submit(self._finalize, job, result[0])
+        except Exception:
+            job["finished"] = time.time()
+            raise
+
+    def _finalize(self, job, service_url):
+        try:
+            return self.finalize(job["parameters"], service_url, job["logger"])
+        finally:
+            job["finished"] = time.time()
+
+    def wait(self) -> list:
+        """Wait until all submitted webtools are staged and uploaded (the pipeline can be used again afterwards).
+
+        Return:
+            results -- List with dictionaries {"name", "staged", "result" (return value of finalize), "error",
+                       "finished" (time when the webtool was published)} in the order of submission
+        """
+        results = []
+        jobs, self._jobs = self._jobs, []
+        for job in jobs:
+            job["done"].wait()
+            result = {"name": job["name"], "staged": job["staged"], "result": None, "error": job["staged"]["error"]}
+            if job["upload"]:
+                try:
+                    result["result"] = job["upload"].result().result()
+                except Exception as e:
+                    result["error"] = f'Publishing failed: {e}'
+                    lgf.log_message(f'Publishing webtool "{job["parameters"]["service_name"]}" failed: {e}', job["logger"], "error")
+            result["finished"] = job["finished"]
+            results.append(result)
+        return results
+
+    def shutdown(self) -> None:
+        self._staging.shutdown()
+        self._uploads.shutdown()
+        self._finalizing.shutdown()
@@ -8,49 +8,18 @@
 #
 # Created: 13.11.2023
 # -----------------------------------------------------------------------------
-import os, sys, logging, json, time, datetime
-import arcpy
-from arcgis.gis import GIS
+import os, sys, json, time, datetime, argparse
 from getpass import getpass
-from IPython.display import display
-from arcgis.mapping import WebMap
-from arcgis.mapping import WebScene
-
-def init_logging(file)  -> None:
-    """Initialises logging to a file and on the console.
-
-    Required:
-        file -- The path to the log file.
-    """
-    global logger
-    logger = logging.getLogger('myapp')
-    # logging to file
-    hdlr = logging.FileHandler(file, mode='w')
-    formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
-    hdlr.setFormatter(formatter)
-    logger.addHandler(hdlr)
-    # logging to console
-    consoleHandler = logging.StreamHandler()
-    consoleHandler.setFormatter(formatter)
-    logger.addHandler(consoleHandler)
-    logger.setLevel(logging.INFO)
-
-def search(file, text) -> int:
-    """Search for a specific string in a file.
-
-    Required:
-        file -- The path to the file (e.g. log file).
-        text -- The string which is to be searched for.
-
-    Return:
-        cnt -- The number of occurrences of the string in the file.
-    """
-    cnt = 0
-    with open(file) as f:
-        for line in f:
-            if text in line.lower():
-                cnt=cnt+1
-        return cnt
+# python Skript with my own portal management functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'migrate'))
+import portal_management_functions as pmf
+# python Skript with my own logging and lazy import functions
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'common'))
+import logging_functions as lgf
+import lazy_import_functions as lzf
+# the arcgis api for python is imported when it is used (fast start, no ArcGIS Pro required)
+arcgis_gis = lzf.lazy_import('arcgis.gis')
+arcgis_mapping = lzf.lazy_import('arcgis.mapping')
 
 def create_folder(folder_path) -> None:
     """Creates a folder if it does not already exist.
@@ -66,8 +35,10 @@ def create_folder(folder_path) -> None:
             raise ValueError(f'The folder "{folder_path}" does not exist and could not be created!')
     
 if __name__ == "__main__":
-    # path to a JSON input file or multiple JSON files
-    paramFile = arcpy.GetParameterAsText(0)
+    # path to a JSON input file (also the first parameter of an ArcGIS Pro script tool)
+    parser = argparse.ArgumentParser(description='List all services and items that use them, of each hosted and federated server.')
+    parser.add_argument('paramFile', nargs='?', help='path to the JSON input file')
+    paramFile = parser.parse_known_args()[0].paramFile
 
     if paramFile:        
         with open(paramFile, encoding='utf-8') as f:
@@ -101,7 +72,7 @@ if __name__ == "__main__":
     # path to the log file
     log_file = os.path.join(log_folder, f'{filename}.log')
     # initialise logging
-    init_logging(log_file)
+    logger = lgf.init_logging(log_file)
     logger.info(f'******************* User reports *******************')
     logger.info(f'Start logging: {time.ctime()}')
     start_time = time.time()
@@ -124,7 +95,7 @@ if __name__ == "__main__":
         if sign_in_user:
             pw = getpass(f'Enter password for user "{sign_in_user}": ')
             try:
-                gis = GIS(url=portal_url, username=sign_in_user, password=pw, verify_cert=False)
+                gis = arcgis_gis.GIS(url=portal_url, username=sign_in_user, password=pw, verify_cert=False)
                 logged_in = True
                 logger.info(f'Successfully logged in')
             except:
@@ -137,7 +108,7 @@ if __name__ == "__main__":
     web_map_references = {}
     for ii, item in enumerate(gis.content.search(query='* AND type:"Web Map"', max_items=1000)):  # Increase max_items if needed
         print(f"{ii}: web map item '{item.title}'")
-        webmap_obj = WebMap(item)
+        webmap_obj = arcgis_mapping.WebMap(item)
         web_map_references[item.id] = {
             "title": item.title,
             "itemid": item.itemid ,
@@ -174,7 +145,7 @@ if __name__ == "__main__":
     web_scene_references = {}
     for ii, item in enumerate(gis.content.search(query='* AND type:"Web Scene"', max_items=1000)):  # Increase max_items if needed
         print(f"{ii}: web scence item '{item.title}'")
-        webscene_obj = WebScene(item)
+        webscene_obj = arcgis_mapping.WebScene(item)
         web_scene_references[item.id] = {
             "title": item.title,
             "itemid": item.itemid ,
@@ -367,21 +338,20 @@ if __name__ == "__main__":
                         report_data[service.url]['isHosted'] = service.properties.portalProperties.isHosted
 
     # write json to file
-    with open(report_file_wm, 'w') as json_file:
-        json.dump(web_map_references, json_file, indent=2, ensure_ascii=False).encode('utf8')
-    with open(report_file_ws, 'w') as json_file:
-        json.dump(web_scene_references, json_file, indent=2, ensure_ascii=False).encode('utf8')
-    with open(report_file_services, 'w') as json_file:
-        json.dump(report_data, json_file, indent=2, ensure_ascii=False).encode('utf8')
+    with open(report_file_wm, 'w', encoding='utf-8') as json_file:
+        json.dump(web_map_references, json_file, indent=2, ensure_ascii=False)
+    with open(report_file_ws, 'w', encoding='utf-8') as json_file:
+        json.dump(web_scene_references, json_file, indent=2, ensure_ascii=False)
+    with open(report_file_services, 'w', encoding='utf-8') as json_file:
+        json.dump(report_data, json_file, indent=2, ensure_ascii=False)
 
     ## end logging
     end_time = time.time()
-    i_warning = search(log_file, "warning")
-    i_error = search(log_file, "error")
+    i_error, i_warning = lgf.get_counts(logger)
     logger.info("Run Script in " + str(round(end_time - start_time)) + " sec.")
     logger.info(f'# {i_error} errors found')
     logger.info(f'# {i_warning} warnings found')
     logger.info(f'End time: {time.ctime()}')
     logger.info('****************************************************************\n')
-    logger.handlers.clear()
+    lgf.close_logging(logger)
 